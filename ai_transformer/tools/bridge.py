@@ -11,6 +11,7 @@ from ai_transformer.transformer.profile_settings import AiProfileSettings
 from ai_transformer.transformer.user_settings import AiUserSettings
 from tasks.tools.log_level import LogLevel
 from tasks.tools.log_receiver import LogReceiver
+from tasks.tools.stop_token import StopToken
 
 
 class Bridge(LogReceiver, ABC):
@@ -18,10 +19,19 @@ class Bridge(LogReceiver, ABC):
     def __init__(self):
         self._log: Optional[LogReceiver] = None
         self._model: Optional[ModelInfo] = None
+        self._stop_token: StopToken = StopToken()
 
     def set_log_receiver(self, log: LogReceiver) -> None:
         self._log = log
 
+    def set_stop_token(self, stop_token: StopToken) -> None:
+        self._stop_token = stop_token
+
+    @property
+    def stop_token(self) -> StopToken:
+        """The token that is set if the user requests to stop the transformation."""
+        return self._stop_token
+
     def log_message(self, level: LogLevel, message: str, details: str = None) -> None:
         self._log.log_message(level, message, details)
 
@@ -61,10 +71,12 @@ class Bridge(LogReceiver, ABC):
         Make a completion request to the model, using the prepared message list.
 
         In case of any technical problem (limits, access, etc.), this method shall raise a TransformerError and
-        not return a chat response.
+        not return a chat response. If the stop token is set while waiting for the model, this method shall
+        abort the request and raise a TransformerStopped exception.
 
         :param messages: The prepared message list.
         :return: A valid chat response that contains output from the model.
         :raises TransformerError: If there is a technical problem.
+        :raises TransformerStopped: If the user requested to stop the transformation.
         """
         pass
@@ -2,9 +2,14 @@
 #  According to the copyright terms specified in the file "COPYRIGHT.md".
 #  SPDX-License-Identifier: GPL-3.0-or-later
 import json
-from typing import Optional
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Optional, Callable, TypeVar
 
+import httpx
 import openai
+from openai.types import CompletionUsage
 
 from django.utils.translation import gettext_lazy as _
 from ai_transformer.tools.bridge import Bridge
@@ -12,11 +17,36 @@ from ai_transformer.tools.chat_messages import AiChatMessages
 from ai_transformer.tools.chat_response import AiChatResponse
 from ai_transformer.transformer.profile_settings import AiProfileSettings
 from ai_transformer.transformer.user_settings import AiUserSettings
-from backend.transformer.error import TransformerError
+from backend.transformer.error import TransformerError, TransformerStopped
 from tasks.tools.log_level import LogLevel
 
+T = TypeVar("T")
+
+
+@dataclass
+class _StreamedCompletion:
+    """The completion that was collected from a streamed response."""
+
+    content: str
+    finish_reason: Optional[str]
+    usage: Optional[CompletionUsage]
+
+
+class _StreamReadError(Exception):
+    """Reading a streamed response failed, after a part of the completion was received."""
+
+    def __init__(self, error: Exception, partial_content: str):
+        super().__init__(str(error))
+        self.partial_content = partial_content
+
 
 class OpenAIBridge(Bridge):
+    """
+    The bridge to the OpenAI API.
+
+    Responses are streamed in a separate thread. This allows aborting a request as soon as the user requests
+    a stop, and closing the stream stops the generation of further tokens by the model.
+    """
 
     CONTINUE_REQUEST_PROMPT = "continue"
     MAXIMUM_CONTINUE_REQUESTS = 5
@@ -76,22 +106,32 @@ class OpenAIBridge(Bridge):
                 failure_input=response.collected_input,
                 failure_output=response.collected_output,
             )
+        except _StreamReadError as e:
+            raise TransformerError(
+                _("The connection to the OpenAI API failed while receiving the response: %(error_message)s")
+                % {"error_message": str(e)},
+                failure_input=response.collected_input,
+                failure_output=response.collected_output + e.partial_content,
+            )
 
     def _retrieve_complete_response(self, messages: AiChatMessages, chat_response: AiChatResponse) -> AiChatResponse:
         chat_response.add_user_message(messages.user_prompt)
         for continue_try in range(self.MAXIMUM_CONTINUE_REQUESTS):
             request_json = self._prepare_request_json(messages)
             self.log_debug("Sending completion request", json.dumps(request_json, indent=4))
-            client_response = self._client.chat.completions.create(**request_json)
-            self.log_debug("Received a response.", client_response.to_json(indent=4))
-            self._handle_token_counts(messages, client_response, chat_response)
-            success = self._handle_model_response(client_response, chat_response)
+            completion = self._run_interruptible(lambda: self._request_streamed_completion(request_json))
+            self.log_debug(
+                f"Received a response. finish_reason={completion.finish_reason}",
+                completion.content,
+            )
+            self._handle_token_counts(messages, completion.usage, chat_response)
+            success = self._handle_model_response(completion, chat_response)
             if success:  # We got a complete request, return it.
                 return chat_response
             # The model stopped somewhere in the middle, encourage it to continue.
             continue_request = self.CONTINUE_REQUEST_PROMPT
             chat_response.add_user_message(continue_request)
-            messages = messages.create_followup(client_response.choices[0].message.content, continue_request)
+            messages = messages.create_followup(completion.content, continue_request)
         # At this point, we exceeded the number of continue requests.
         self.log_debug("Incomplete output. Asking the model to continue.")
         raise TransformerError(
@@ -104,23 +144,97 @@ class OpenAIBridge(Bridge):
             failure_output=chat_response.collected_output,
         )
 
+    def _run_interruptible(self, function: Callable[[], T]) -> T:
+        """
+        Run a blocking function in a separate thread, and return early if the stop token is set.
+
+        :param function: The function to run.
+        :return: The result of the function.
+        :raises TransformerStopped: If the stop token was set before the function returned.
+        """
+        if self.stop_token.is_set:
+            raise TransformerStopped()
+        future: Future = Future()
+
+        def run() -> None:
+            try:
+                future.set_result(function())
+            except BaseException as error:
+                future.set_exception(error)
+
+        wake_up = threading.Event()
+        future.add_done_callback(lambda _: wake_up.set())
+        with self.stop_token.on_stop(wake_up.set):
+            threading.Thread(target=run, name="openai-request", daemon=True).start()
+            wake_up.wait()
+        if self.stop_token.is_set:
+            self.log_info("Aborted the request to the model, because the user requested a stop.")
+            raise TransformerStopped()
+        return future.result()
+
+    def _request_streamed_completion(self, request_json: dict) -> _StreamedCompletion:
+        """
+        Send a completion request and collect the streamed response.
+
+        If the stop token is set, the stream is closed immediately, so the model stops generating tokens.
+
+        :param request_json: The arguments for the request.
+        :return: The collected completion.
+        :raises TransformerStopped: If the stop token was set before the response was complete.
+        :raises _StreamReadError: If reading the response failed, e.g. because the connection was lost.
+        """
+        stream = self._client.chat.completions.create(**request_json)
+        content_parts: list[str] = []
+        finish_reason: Optional[str] = None
+        usage: Optional[CompletionUsage] = None
+        with self.stop_token.on_stop(stream.close):
+            try:
+                for chunk in stream:
+                    if self.stop_token.is_set:
+                        raise TransformerStopped()
+                    if chunk.usage:
+                        usage = chunk.usage
+                    if not chunk.choices:
+                        continue
+                    choice = chunk.choices[0]
+                    if choice.delta and choice.delta.content:
+                        content_parts.append(choice.delta.content)
+                    if choice.finish_reason:
+                        finish_reason = choice.finish_reason
+            except Exception as error:
+                if self.stop_token.is_set:
+                    raise TransformerStopped()  # Reading from the closed stream failed.
+                if isinstance(error, (httpx.HTTPError, httpx.StreamError, openai.OpenAIError)):
+                    raise _StreamReadError(error, "".join(content_parts)) from error
+                raise
+            finally:
+                stream.close()
+        if self.stop_token.is_set:
+            raise TransformerStopped()
+        return _StreamedCompletion(content="".join(content_parts), finish_reason=finish_reason, usage=usage)
+
     def _prepare_request_json(self, messages: AiChatMessages):
         response_args = {
             "model": self.model.identifier,
             "messages": messages.to_json(),
+            "stream": True,
+            "stream_options": {"include_usage": True},
         }
         if self._force_json_format:
             response_args["response_format"] = {"type": "json_object"}
         return response_args
 
     def _handle_token_counts(
-        self, messages: AiChatMessages, client_response: openai.ChatCompletion, chat_response: AiChatResponse
+        self, messages: AiChatMessages, usage: Optional[CompletionUsage], chat_response: AiChatResponse
     ):
-        prompt_tokens = client_response.usage.prompt_tokens
+        if usage is None:
+            self.log_warning("The response did not contain token counts.")
+            return
+        prompt_tokens = usage.prompt_tokens
         chat_response.add_token_counts(
             input_tokens=prompt_tokens,
-            output_tokens=client_response.usage.completion_tokens,
-            total_tokens=client_response.usage.total_tokens,
+            output_tokens=usage.completion_tokens,
+            total_tokens=usage.total_tokens,
         )
         messages_token_count = messages.token_count
         if messages_token_count != prompt_tokens:
@@ -133,18 +247,16 @@ class OpenAIBridge(Bridge):
                 f"does not match the token count returned by the API ({prompt_tokens} tokens)",
             )
 
-    def _handle_model_response(self, client_response: openai.ChatCompletion, chat_response: AiChatResponse) -> bool:
+    def _handle_model_response(self, completion: _StreamedCompletion, chat_response: AiChatResponse) -> bool:
         """
         Handle the model response.
 
-        :param client_response: The raw response from the client.
+        :param completion: The completion collected from the streamed response.
         :param chat_response: The response object.
         :return: `True` on success, `False` if continue shall be requested.
         """
-        choice = client_response.choices[0]
-        model_response = choice.message.content
-        chat_response.add_assistant_message(model_response)
-        match choice.finish_reason:
+        chat_response.add_assistant_message(completion.content)
+        match completion.finish_reason:
             case "stop":
                 return True
             case "length":
@@ -165,7 +277,7 @@ class OpenAIBridge(Bridge):
                     failure_output=chat_response.collected_output,
                 )
             case _:
-                self.log_error(f"Received unknown finish reason: {choice.finish_reason}")
+                self.log_error(f"Received unknown finish reason: {completion.finish_reason}")
                 raise TransformerError(
                     _("An unknown finish reason was received from the API."),
                     failure_input=chat_response.collected_input,
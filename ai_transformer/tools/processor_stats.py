@@ -15,6 +15,7 @@ from ai_transformer.tools.constants import (
     STATISTIC_CURRENCY,
 )
 from ai_transformer.tools.model_info import ModelInfo
+from tasks.actions.metric_keys import METRIC_LLM_REQUESTS, METRIC_LLM_INPUT_TOKENS, METRIC_LLM_OUTPUT_TOKENS
 
 
 class AiProcessorStats:
@@ -24,6 +25,7 @@ class AiProcessorStats:
         self.output_tokens: int = 0
         self.input_tokens: int = 0
         self.total_tokens: int = 0
+        self.request_count: int = 0
         self.currency: str = "USD"
 
     def get_total_cost(self, model_info: ModelInfo) -> float:
@@ -47,7 +49,15 @@ class AiProcessorStats:
             STATISTIC_CURRENCY: self.currency,
         }
 
+    def to_metric_values(self) -> dict[str, float]:
+        return {
+            METRIC_LLM_REQUESTS: float(self.request_count),
+            METRIC_LLM_INPUT_TOKENS: float(self.input_tokens),
+            METRIC_LLM_OUTPUT_TOKENS: float(self.output_tokens),
+        }
+
     def add_response(self, response: AiChatResponse):
+        self.request_count += 1
         self.input_tokens += response.input_tokens
         self.output_tokens += response.output_tokens
         self.total_tokens += response.total_tokens
@@ -62,6 +62,7 @@ class AiProcessor(Processor[AiProfileSettings, AiUserSettings]):
         )
         self.bridge = self.model_info.create_bridge()
         self.bridge.set_log_receiver(self)
+        self.bridge.set_stop_token(self.stop_token)
         self.bridge.set_model_info(self.model_info)
         self.bridge.setup(self.user_settings, self.profile_settings)
         self.bridge.initialize()
@@ -155,3 +156,6 @@ class AiProcessor(Processor[AiProfileSettings, AiUserSettings]):
 
     def get_status_values(self) -> dict[str, str]:
         return self.stats.to_status(self.model_info)
+
+    def get_metric_values(self) -> dict[str, float]:
+        return self.stats.to_metric_values()
@@ -8,3 +8,4 @@ from .ingest_generate_preview import IngestGeneratePreview
 from .ingest_import_documents import IngestImportDocuments
 from .new_revision import NewRevision
 from .transformation_transform_fragments import TransformationTransformFragments
+from .update_review_states import UpdateReviewStates
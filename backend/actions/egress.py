@@ -2,7 +2,6 @@
 #  According to the copyright terms specified in the file "COPYRIGHT.md".
 #  SPDX-License-Identifier: GPL-3.0-or-later
 import logging
-import zipfile
 from pathlib import Path
 from typing import Optional
 
@@ -11,9 +10,9 @@ from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 
 from backend.enums.egress_step import EgressStep
-from backend.models import Revision
+from backend.models import Document, Revision
 from backend.models.egress_assistant import EgressAssistant
-from tasks.actions import ActionBase, ActionError
+from tasks.actions import ActionBase, ActionError, TaskQueue
 
 
 class EgressAction(ActionBase):
@@ -24,6 +23,7 @@ class EgressAction(ActionBase):
     name = "egress"
     progress_title = _("Exporting Documents")
     progress_subject = _("Document Export")
+    queue = TaskQueue.EGRESS
 
     def __init__(self, task_id: str, log: logging.Logger):
         super().__init__(task_id, log)
@@ -66,15 +66,16 @@ class EgressAction(ActionBase):
         Export all selected documents into a new ZIP file.
         """
         self.zip_file = self.working_dir / "export.zip"
-        document_count = self.egress_assistant.documents.count()
-        with zipfile.ZipFile(self.zip_file, mode="w") as zip_handle:
-            for index, document in enumerate(self.egress_assistant.get_selected_documents()):
-                self.set_progress(
-                    float(index), float(document_count), _("Writing document: %(path)s") % {"path": document.path}
-                )
-                with zip_handle.open(document.path, mode="w", force_zip64=True) as fp:
-                    for fragment in document.fragments.order_by("position"):
-                        fp.write(fragment.final_text.encode(document.encoding))
+        export = self.egress_assistant.create_export(worker_count=settings.BACKEND_EGRESS_COMPRESSION_WORKERS)
+        document_count = len(export.documents)
+
+        def progress(index: int, document: Document) -> None:
+            self.set_progress(
+                float(index), float(document_count), _("Writing document: %(path)s") % {"path": document.path}
+            )
+
+        with self.zip_file.open("wb") as fp:
+            export.write_zip(fp, progress)
 
     def run(self, input_data: dict) -> None:
         self.log_info(_("Start analyzing the upload."))
@@ -87,7 +88,8 @@ class EgressAction(ActionBase):
             self.create_working_dir()
         # In the next atomic operation, create the export and switch the step to DONE.
         with transaction.atomic():
-            self.build_zip_file()
+            with self.span("build_zip"):
+                self.build_zip_file()
             self.egress_assistant.step = EgressStep.DONE
             self.egress_assistant.save()
             self.log_info(_("Successfully exported all selected documents."))
@@ -52,10 +52,11 @@ class IngestAnalyzeUpload(IngestBase):
             self.create_working_directory()
         with transaction.atomic():
             try:
-                if self.uploaded_file.suffix.lower() == ".zip":
-                    self.extract_zip()
-                else:
-                    self.copy_and_add_single_document()
+                with self.span("extract"):
+                    if self.uploaded_file.suffix.lower() == ".zip":
+                        self.extract_zip()
+                    else:
+                        self.copy_and_add_single_document()
                 # Successfully analyzed and unpacked the uploaded file.
                 self.ingest_assistant.step = IngestStep.SETUP
                 self.ingest_assistant.save()
@@ -11,7 +11,7 @@ from django.utils.translation import gettext_lazy as _
 
 from backend.models.ingest_assistant import IngestAssistant
 from backend.models.revision import Revision
-from tasks.actions import ActionBase, ActionError
+from tasks.actions import ActionBase, ActionError, TaskQueue
 
 
 class IngestBase(ActionBase, ABC):
@@ -19,6 +19,8 @@ class IngestBase(ActionBase, ABC):
     The base class of all ingest actions.
     """
 
+    queue = TaskQueue.INGEST
+
     def __init__(self, task_id: str, log: logging.Logger):
         super().__init__(task_id, log)
         self.ingest_assistant: Optional[IngestAssistant] = None
@@ -51,7 +51,8 @@ class IngestGeneratePreview(IngestBase):
                 for index, ingest_document in enumerate(ingest_documents):
                     self.document_index = index
                     self.ingest_document = ingest_document
-                    self.process_document()
+                    with self.span("split"):
+                        self.process_document()
 
                 self.ingest_assistant.step = IngestStep.PREVIEW
                 self.ingest_assistant.statistics = {
@@ -15,7 +15,7 @@ from backend.enums.new_revision_step import NewRevisionStep
 from backend.models import Revision, Document, Fragment, Project, RevisionAssistant
 from backend.size_calculator.base import SizeCalculatorBase
 from backend.size_calculator.manager import size_calculator_manager
-from tasks.actions import ActionBase, ActionError
+from tasks.actions import ActionBase, ActionError, TaskQueue
 
 
 class NewRevision(ActionBase):
@@ -26,6 +26,7 @@ class NewRevision(ActionBase):
     name = "new_revision"
     progress_title = _("Creating a New Revision")
     progress_subject = _("Creation of New Revision")
+    queue = TaskQueue.INGEST
 
     def __init__(self, task_id: str, log: logging.Logger):
         super().__init__(task_id, log)
@@ -45,7 +46,9 @@ class NewRevision(ActionBase):
             with transaction.atomic():
                 self.initialize(input_data)
                 self.create_new_revision_object()
-                self.create_new_documents()
+                with self.span("copy_documents"):
+                    self.create_new_documents()
+                self.new_revision.update_state_counters_from_documents()
                 self.revision_assistant.step = NewRevisionStep.DONE
                 self.revision_assistant.save()
             self.set_progress(100.0, 100.0, _("Successfully created the new revision"))
@@ -115,15 +118,12 @@ class NewRevision(ActionBase):
         """
         new_document = document.create_copy_for_revision(self.new_revision)
         size_calculator: SizeCalculatorBase = size_calculator_manager.get_extension(document.size_unit)
-        line_number = 1
-        for fragment in document.fragments.order_by("position"):
-            new_fragment = fragment.create_copy_for_revision(
-                document=new_document,
-                size_calculator=size_calculator,
-                first_line_number=line_number,
-                copy_review=self.copy_review,
-            )
-            line_number += new_fragment.size_lines
+        fragments = document.fragments.select_related("content", "edit__content", "transformation__content").order_by(
+            "position"
+        )
+        Fragment.create_copies_for_revision(
+            fragments, document=new_document, size_calculator=size_calculator, copy_review=self.copy_review
+        )
 
     def re_split_document(self, document: Document) -> None:
         """
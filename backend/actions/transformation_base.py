@@ -10,7 +10,7 @@ from django.utils.translation import gettext_lazy as _
 
 from backend.models.transformation import Transformation
 from backend.models.transformation_assistant import TransformationAssistant
-from tasks.actions import ActionBase, ActionError
+from tasks.actions import ActionBase, ActionError, TaskQueue
 
 
 class TransformationBase(ActionBase, ABC):
@@ -18,6 +18,8 @@ class TransformationBase(ActionBase, ABC):
     The base class of all transformation actions.
     """
 
+    queue = TaskQueue.TRANSFORM
+
     def __init__(self, task_id: str, log: logging.Logger):
         super().__init__(task_id, log)
         self.transformation_assistant: Optional[TransformationAssistant] = None  # The assistant instance.
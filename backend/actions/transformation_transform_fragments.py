@@ -3,19 +3,22 @@
 #  SPDX-License-Identifier: GPL-3.0-or-later
 
 import logging
-from typing import Optional
+from collections import deque
+from typing import Optional, Sequence
 
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import transaction
+from django.db.models import QuerySet
 from django.utils.translation import gettext_lazy as _
 
 from backend.actions.transformation_base import TransformationBase
 from backend.enums import TransformerStatus
 from backend.enums.transformation_step import TransformationStep
 from backend.models import Transformation, Fragment, Document
+from backend.models.state_counters import deferred_state_counter_updates
 from backend.transformer import TransformerBase
 from backend.transformer.context import TransformerDocumentContext, TransformerFragmentContext
-from backend.transformer.error import TransformerError
+from backend.transformer.error import TransformerError, TransformerStopped
 from backend.transformer.fragment_access import FragmentAccess
 from backend.transformer.manager import transformer_manager
 from backend.transformer.processor import Processor
@@ -49,31 +52,60 @@ class _DocumentContext(TransformerDocumentContext):
         return self._document_syntax
 
 
+class _DocumentCache:
+    """
+    The values of the current document, shared by the contexts of all its fragments.
+
+    The fragments of the document are only loaded if a processor accesses the previous fragments,
+    and then all at once. Fragments that are transformed afterward are replaced using `update_fragment()`.
+    """
+
+    def __init__(self, document: Document, context: TransformerDocumentContext):
+        self.document = document
+        self.context = context
+        self.fragment_count = document.fragment_count
+        self._fragments: Optional[dict[int, Fragment]] = None
+
+    def get_fragment(self, position: int) -> Optional[Fragment]:
+        """
+        Get the fragment at the given position in the document.
+        """
+        if self._fragments is None:
+            fragments = self.document.fragments.select_related(
+                "content", "edit__content", "transformation__content"
+            ).order_by("position")
+            self._fragments = {fragment.position: fragment for fragment in fragments}
+        return self._fragments.get(position)
+
+    def update_fragment(self, fragment: Fragment) -> None:
+        """
+        Replace a loaded fragment with its processed version.
+        """
+        if self._fragments is not None:
+            self._fragments[fragment.position] = fragment
+
+
 class _FragmentContext(TransformerFragmentContext):
-    def __init__(self, fragments: list[Fragment], current_index: int, fragment: Fragment):
-        self._fragments = fragments
-        self._current_index = current_index
+    def __init__(self, document_cache: _DocumentCache, processed_fragments: Sequence[Fragment], fragment: Fragment):
+        self._document_cache = document_cache
+        self._processed_fragments = processed_fragments
         self._fragment = fragment
-        self._document_name = fragment.document.name
-        self._document_path = fragment.document.path
-        self._document_folder = fragment.document.folder
-        self._document_syntax = fragment.document.document_syntax
 
     @property
     def document_name(self) -> str:
-        return self._document_name
+        return self._document_cache.context.document_name
 
     @property
     def document_folder(self) -> str:
-        return self._document_folder
+        return self._document_cache.context.document_folder
 
     @property
     def document_path(self) -> str:
-        return self._document_path
+        return self._document_cache.context.document_path
 
     @property
     def document_syntax(self) -> str:
-        return self._document_syntax
+        return self._document_cache.context.document_syntax
 
     @property
     def fragment_index(self) -> int:
@@ -81,21 +113,21 @@ class _FragmentContext(TransformerFragmentContext):
 
     @property
     def fragment_count(self) -> int:
-        return self._fragment.document.fragments.count()
+        return self._document_cache.fragment_count
 
     @property
     def fragment_context(self) -> dict[str, str]:
-        return self._fragment.context
+        return self._fragment.context or {}
 
     @property
     def processed_count(self) -> int:
-        return self._current_index
+        return len(self._processed_fragments)
 
     def get_processed(self, steps_back: int = 0) -> Optional[FragmentAccess]:
-        index = self._current_index - steps_back - 1
-        if index < 0 or index >= self._current_index:
+        index = len(self._processed_fragments) - steps_back - 1
+        if index < 0 or index >= len(self._processed_fragments):
             return None
-        return self._fragments[index]
+        return self._processed_fragments[index]
 
     @property
     def previous_count(self) -> int:
@@ -104,10 +136,7 @@ class _FragmentContext(TransformerFragmentContext):
     def get_previous(self, steps_back: int = 0) -> Optional[FragmentAccess]:
         if steps_back < 0 or steps_back >= self._fragment.position:
             return None
-        try:
-            return self._fragment.document.fragments.get(position=self._fragment.position - steps_back - 1)
-        except ObjectDoesNotExist:
-            return None
+        return self._document_cache.get_fragment(self._fragment.position - steps_back - 1)
 
 
 STATUS_DOCUMENT_COUNT = "document_count"
@@ -115,6 +144,12 @@ STATUS_FRAGMENT_COUNT = "fragment_count"
 STATUS_CHANGED_FRAGMENT_COUNT = "changed_fragment_count"
 STATUS_FAILURE_COUNT = "failure_count"
 
+FRAGMENT_CHUNK_SIZE = 200
+"""The number of fragments that are read from the database at once."""
+
+PROCESSED_FRAGMENT_HISTORY = 100
+"""The number of processed fragments that are accessible from the fragment context."""
+
 
 class TransformationTransformFragments(TransformationBase):
     name = "transform_fragments"
@@ -131,8 +166,10 @@ class TransformationTransformFragments(TransformationBase):
         super().__init__(task_id, log)
         self.transformer: Optional[TransformerBase] = None  # The transformer entry in the project.
         self.processor: Optional[Processor] = None  # The processor instance for the transformer.
-        self.fragments: list[Fragment] = []  # The list of fragments to process.
-        self._last_document: Optional[Document] = None  # The last processed document.
+        self.fragments: Optional[QuerySet[Fragment]] = None  # The selection of fragments to process.
+        self.selected_fragment_count: int = 0  # The number of fragments to process.
+        self.processed_fragments: deque[Fragment] = deque(maxlen=PROCESSED_FRAGMENT_HISTORY)
+        self._document_cache: Optional[_DocumentCache] = None  # The cached values of the current document.
         self.document_count: int = 0
         self.fragment_count: int = 0
         self.changed_fragment_count: int = 0
@@ -143,7 +180,7 @@ class TransformationTransformFragments(TransformationBase):
     def _status_values(self):
         status_values = {
             STATUS_DOCUMENT_COUNT: f"{self.document_count}",
-            STATUS_FRAGMENT_COUNT: f"{self.fragment_count} / {len(self.fragments)}",
+            STATUS_FRAGMENT_COUNT: f"{self.fragment_count} / {self.selected_fragment_count}",
             STATUS_CHANGED_FRAGMENT_COUNT: f"{self.changed_fragment_count}",
             STATUS_FAILURE_COUNT: f"{self.failure_count}",
         }
@@ -154,15 +191,17 @@ class TransformationTransformFragments(TransformationBase):
     def run(self, input_data: dict) -> None:
         self.log_info(_("Preparing the transformation."))
         try:
-            with transaction.atomic():
+            with transaction.atomic(), deferred_state_counter_updates():
                 self.set_progress(0.0, 100.0, _("Initializing the transformation"))
                 self.set_db_object_from_input_data(input_data)
                 if self.transformation_assistant.step != TransformationStep.TRANSFORMATION_RUNNING:
                     raise ActionError(_("The transformation operation is in the wrong state."))
-                self.create_transformation()
-                self.create_processor()
-                self.initialize_processor()
-                self.create_fragment_list()
+                with self.span("prepare"):
+                    self.create_transformation()
+                    self.create_processor()
+                    self.initialize_processor()
+                with self.span("select"):
+                    self.create_fragment_list()
                 try:
                     self.transform_fragments()
                 except TransformerError as error:
@@ -173,6 +212,9 @@ class TransformationTransformFragments(TransformationBase):
                     if self.transformation_assistant.rollback_on_failure:
                         raise
                     self.transformation_assistant.failure_reason = _("The transformation was stopped by the user.")
+                finally:
+                    for name, value in self.processor.get_metric_values().items():
+                        self.add_metric(name, value)
                 self.transformation.statistics = {
                     "documents": self.document_count,
                     "fragments": self.fragment_count,
@@ -240,7 +282,7 @@ class TransformationTransformFragments(TransformationBase):
             # If the transformer requires user settings, but none are defined, use the default settings.
             user_settings = self.transformer.user_settings_handler.get_default()
         processor_class: type[Processor] = self.transformer.get_processor_class()
-        self.processor = processor_class(self.task_id, self, profile_settings, user_settings)
+        self.processor = processor_class(self.task_id, self, profile_settings, user_settings, self.stop_token)
 
     def initialize_processor(self):
         """
@@ -251,27 +293,35 @@ class TransformationTransformFragments(TransformationBase):
 
     def create_fragment_list(self):
         """
-        Create the definitive list of fragments to process.
+        Create the definitive selection of fragments to process.
+
+        The fragments are not loaded here, but streamed in chunks while they are transformed.
         """
-        self.fragments = list(self.transformation_assistant.get_selected_fragments().order_by("document", "position"))
+        self.fragments = (
+            self.transformation_assistant.get_selected_fragments()
+            .select_related("document", "content", "transformation__content")
+            .order_by("document", "position")
+        )
+        self.selected_fragment_count = self.fragments.count()
 
     def transform_fragments(self):
         """
         Transform the individual fragments.
         """
         self.log_info(_("Start transforming the fragments"))
-        for index, fragment in enumerate(self.fragments):
+        for index, fragment in enumerate(self.fragments.iterator(chunk_size=FRAGMENT_CHUNK_SIZE)):
             text = _("Transforming fragment %(index)d from %(count)d") % {
                 "index": index + 1,
-                "count": len(self.fragments),
+                "count": self.selected_fragment_count,
             }
             self.log_info(text)
-            self.set_progress(float(index), float(len(self.fragments)), text, self._status_values())
+            self.set_progress(float(index), float(self.selected_fragment_count), text, self._status_values())
             self.transform_fragment(fragment, index)
+            self.processed_fragments.append(fragment)
+            self._document_cache.update_fragment(fragment)
         # Make sure the last document end is signalled to the processor.
-        if self._last_document:
-            document_context = self.create_document_context(self._last_document)
-            self.processor.document_end(document_context)
+        if self._document_cache:
+            self.processor.document_end(self._document_cache.context)
 
     def transform_fragment(self, fragment: Fragment, index: int):
         """
@@ -283,7 +333,14 @@ class TransformationTransformFragments(TransformationBase):
         self._handle_document_change(fragment)
         try:
             fragment_context = self.create_fragment_context(fragment, index)
-            result = self.processor.transform(fragment.text, fragment_context)
+            with self.span("process"):
+                result = self.processor.transform(fragment.text, fragment_context)
+        except TransformerStopped:
+            self.log_info(
+                _("Stopped while transforming fragment %(index)d. This fragment was not processed.")
+                % {"index": index + 1}
+            )
+            raise ActionStoppedByUser()
         except TransformerError as error:
             result = ProcessorResult(
                 content="",
@@ -293,9 +350,10 @@ class TransformationTransformFragments(TransformationBase):
                 failure_reason=str(error),
             )
         # Update the fragment with the transformation result.
-        has_changed_text = fragment.set_transformation(
-            self.transformation, result, self.transformation_assistant.auto_approve_unchanged
-        )
+        with self.span("persist"):
+            has_changed_text = fragment.set_transformation(
+                self.transformation, result, self.transformation_assistant.auto_approve_unchanged
+            )
         self._update_counters(has_changed_text, result)
 
     def _update_counters(self, has_changed_text: bool, result: ProcessorResult) -> None:
@@ -327,14 +385,12 @@ class TransformationTransformFragments(TransformationBase):
 
         :param fragment: The processed fragment.
         """
-        if fragment.document != self._last_document:
+        if self._document_cache is None or fragment.document_id != self._document_cache.document.pk:
             self.document_count += 1
-            if self._last_document:
-                document_context = self.create_document_context(self._last_document)
-                self.processor.document_end(document_context)
-            self._last_document = fragment.document
-            document_context = self.create_document_context(fragment.document)
-            self.processor.document_begin(document_context)
+            if self._document_cache:
+                self.processor.document_end(self._document_cache.context)
+            self._document_cache = _DocumentCache(fragment.document, self.create_document_context(fragment.document))
+            self.processor.document_begin(self._document_cache.context)
 
     def create_document_context(self, document: Document) -> TransformerDocumentContext:
         """
@@ -353,4 +409,4 @@ class TransformationTransformFragments(TransformationBase):
         :param index: The current index.
         :return: The context for the fragment.
         """
-        return _FragmentContext(self.fragments, index, fragment)
+        return _FragmentContext(self._document_cache, tuple(self.processed_fragments), fragment)
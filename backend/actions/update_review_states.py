@@ -0,0 +1,62 @@
+#  Copyright © 2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
+#  According to the copyright terms specified in the file "COPYRIGHT.md".
+#  SPDX-License-Identifier: GPL-3.0-or-later
+import logging
+from typing import Tuple
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+
+from backend.enums import ReviewState
+from backend.tools.review_state_selection import ReviewStateSelection
+from tasks.actions import ActionBase, ActionError
+
+
+class UpdateReviewStates(ActionBase):
+    """
+    The action to change the review state of a large set of fragments.
+
+    The selection is processed in batches of documents. Each batch is updated with a single query in its
+    own transaction, so the action can be stopped between two batches.
+    """
+
+    name = "update_review_states"
+    progress_title = _("Updating Review States")
+    progress_subject = _("Review Update")
+
+    def __init__(self, task_id: str, log: logging.Logger):
+        super().__init__(task_id, log)
+        self.changed_count: int = 0
+
+    def run(self, input_data: dict) -> None:
+        selection, review_state = self.get_parameters(input_data)
+        self.log_info(
+            _("Setting the review state of the selected fragments to “%(state)s”.") % {"state": review_state.label}
+        )
+        document_ids = list(selection.get_documents().order_by("path").values_list("pk", flat=True))
+        batch_size = settings.BACKEND_REVIEW_UPDATE_DOCUMENT_BATCH_SIZE
+        for index in range(0, len(document_ids), batch_size):
+            self.set_progress(float(index), float(len(document_ids)), _("Updating the review states"))
+            with self.span("update"):
+                batch = selection.for_documents(document_ids[index : index + batch_size])
+                self.changed_count += batch.update_review_state(review_state)
+        self.set_progress(100.0, 100.0, _("Successfully updated the review states"))
+        self.log_info(_("Changed the review state of %(count)d fragments.") % {"count": self.changed_count})
+
+    @staticmethod
+    def get_parameters(input_data: dict) -> Tuple[ReviewStateSelection, ReviewState]:
+        """
+        Read and verify the selection and the new review state from the input data.
+
+        :param input_data: The input data.
+        :return: A tuple with the selection and review state.
+        """
+        try:
+            selection = ReviewStateSelection.from_json(input_data.get("selection"))
+            review_state = ReviewState(input_data.get("review_state"))
+        except ValueError as error:
+            raise ActionError(_("There was a problem with the input data."), str(error))
+        return selection, review_state
+
+    def get_output_data(self) -> dict:
+        return {"changed_count": self.changed_count}
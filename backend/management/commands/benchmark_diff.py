@@ -0,0 +1,84 @@
+#  Copyright © 2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
+#  According to the copyright terms specified in the file "COPYRIGHT.md".
+#  SPDX-License-Identifier: GPL-3.0-or-later
+import argparse
+import difflib
+import random
+import time
+from pathlib import Path
+from typing import Callable
+
+from django.core.management import BaseCommand
+
+from design.views.diff import split_diff, unified_diff
+
+TEST_DATA_FILE = Path(__file__).resolve().parent.parent.parent / "tests" / "data" / "flatland-by-edwin-abbott.txt"
+"""The bundled test data, that is used as large fragment."""
+
+
+class Command(BaseCommand):
+    help = f"""Measures the time to create the diffs for the review page, for a large fragment."""
+
+    def add_arguments(self, parser: argparse.ArgumentParser):
+        parser.add_argument(
+            "--lines",
+            type=int,
+            default=2000,
+            help="The number of lines of the fragment.",
+        )
+        parser.add_argument(
+            "--changes",
+            type=int,
+            default=100,
+            help="The number of changed lines in the fragment.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="The number of repetitions for each measurement.",
+        )
+
+    @staticmethod
+    def _create_texts(line_count: int, change_count: int) -> tuple[str, str]:
+        """
+        Create a source text from the test data, and a destination text with changed lines.
+        """
+        lines = TEST_DATA_FILE.read_text(encoding="utf-8").splitlines(keepends=True)
+        lines = (lines * (line_count // len(lines) + 1))[:line_count]
+        src_text = "".join(lines)
+        generator = random.Random(1)
+        for index in generator.sample(range(len(lines)), min(change_count, len(lines))):
+            lines[index] = lines[index].replace("e", "E", 1).replace(",", ";", 1)
+        return src_text, "".join(lines)
+
+    def _measure(self, title: str, function: Callable[[], object], repeat: int) -> None:
+        durations = []
+        for _ in range(repeat):
+            start_time = time.perf_counter()
+            function()
+            durations.append(time.perf_counter() - start_time)
+        self.stdout.write(f"{title:<40} {min(durations) * 1000:9.1f} ms")
+
+    def handle(self, *args, **options):
+        src_text, dst_text = self._create_texts(options["lines"], options["changes"])
+        src_lines = src_text.splitlines()
+        dst_lines = dst_text.splitlines()
+        repeat = options["repeat"]
+        self.stdout.write(f"Comparing {len(src_lines)} lines with {options['changes']} changes.")
+        self._measure(
+            "difflib.unified_diff (text only)",
+            lambda: list(difflib.unified_diff(src_lines, dst_lines, lineterm="")),
+            repeat,
+        )
+        for autojunk in [True, False]:
+            self._measure(
+                f"unified_diff (autojunk={autojunk})",
+                lambda: unified_diff(src_text, dst_text, autojunk=autojunk),
+                repeat,
+            )
+            self._measure(
+                f"split_diff (autojunk={autojunk})",
+                lambda: split_diff(src_text, dst_text, autojunk=autojunk),
+                repeat,
+            )
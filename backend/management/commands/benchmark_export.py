@@ -0,0 +1,102 @@
+#  Copyright © 2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
+#  According to the copyright terms specified in the file "COPYRIGHT.md".
+#  SPDX-License-Identifier: GPL-3.0-or-later
+import argparse
+import io
+import time
+from pathlib import Path
+from typing import Iterator
+
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from backend.models import Document
+from backend.tools.document_export import COMPRESSION_METHODS, DocumentExport, DocumentTexts
+
+TEST_DATA_DIR = Path(__file__).resolve().parent.parent.parent / "tests" / "data"
+"""The directory with the bundled test data."""
+
+LINES_PER_FRAGMENT = 20
+"""The number of lines of the test data in each simulated fragment."""
+
+
+class _BenchmarkExport(DocumentExport):
+    """
+    An export that reads the texts from memory instead of the database.
+    """
+
+    def __init__(self, document_texts: list[DocumentTexts], **kwargs):
+        super().__init__([document for document, _ in document_texts], **kwargs)
+        self.document_texts = document_texts
+
+    def iter_final_text_batches(self) -> Iterator[list[DocumentTexts]]:
+        texts_by_document = {id(document): texts for document, texts in self.document_texts}
+        for batch in self._iter_document_batches():
+            yield [(document, texts_by_document[id(document)]) for document in batch]
+
+
+class Command(BaseCommand):
+    help = f"""Measures the time to export the bundled test data with different compression settings."""
+
+    def add_arguments(self, parser: argparse.ArgumentParser):
+        parser.add_argument(
+            "--documents",
+            type=int,
+            default=100,
+            help="The number of exported documents. The test data is repeated to create these documents.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.BACKEND_EGRESS_COMPRESSION_WORKERS,
+            help="The number of workers to compare with a single worker.",
+        )
+        parser.add_argument(
+            "--level",
+            type=int,
+            default=settings.BACKEND_EGRESS_COMPRESSION_LEVEL,
+            help="The compression level.",
+        )
+
+    @staticmethod
+    def _load_document_texts(document_count: int) -> list[DocumentTexts]:
+        """
+        Create unsaved documents with the texts of the test data, split into fragments.
+        """
+        sources = []
+        for path in sorted(TEST_DATA_DIR.glob("*")):
+            if path.suffix not in [".txt", ".md"]:
+                continue
+            lines = path.read_text(encoding="utf-8").splitlines(keepends=True)
+            texts = [
+                "".join(lines[index : index + LINES_PER_FRAGMENT]) for index in range(0, len(lines), LINES_PER_FRAGMENT)
+            ]
+            sources.append((path, texts))
+        document_texts = []
+        for index in range(document_count):
+            path, texts = sources[index % len(sources)]
+            document = Document(path=f"{index:04d}/{path.name}", encoding="utf-8")
+            document_texts.append((document, texts))
+        return document_texts
+
+    def handle(self, *args, **options):
+        document_texts = self._load_document_texts(options["documents"])
+        size = sum(len("".join(texts).encode("utf-8")) for _, texts in document_texts)
+        self.stdout.write(f"Exporting {len(document_texts)} documents with {size / 1_000_000:.1f} MB.")
+        worker_counts = sorted({1, max(1, options["workers"])})
+        for compression in COMPRESSION_METHODS:
+            for worker_count in worker_counts:
+                export = _BenchmarkExport(
+                    document_texts,
+                    compression=compression,
+                    compression_level=options["level"],
+                    worker_count=worker_count,
+                )
+                output = io.BytesIO()
+                start_time = time.perf_counter()
+                export.write_zip(output)
+                duration = time.perf_counter() - start_time
+                self.stdout.write(
+                    f"{compression:>8} with {worker_count} worker(s): {duration:7.3f} s, "
+                    f"{output.tell() / 1_000_000:6.1f} MB"
+                )
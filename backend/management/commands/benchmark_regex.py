@@ -0,0 +1,122 @@
+#  Copyright © 2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
+#  According to the copyright terms specified in the file "COPYRIGHT.md".
+#  SPDX-License-Identifier: GPL-3.0-or-later
+import argparse
+import random
+import re
+import time
+from pathlib import Path
+from typing import Callable
+
+from django.core.management import BaseCommand, CommandError
+
+from backend.transformer.data.regex_definition import RegExReplacement
+from regex_transformer.transformer.replacement_plan import ReplacementPlan
+
+TEST_DATA_FILE = Path(__file__).resolve().parent.parent.parent / "tests" / "data" / "flatland-by-edwin-abbott.txt"
+"""The bundled test data, that is split into fragments."""
+
+PATTERN_DEFINITIONS = [
+    (r"\bthe\b", "THE"),
+    (r"(?i)square(s?)", r"Cube\1"),
+    (r"(\w+)ness\b", r"\1-ness"),
+    (r"\s+,", ","),
+    (r"(?i)\bking\b", "Monarch"),
+]
+"""Definitions with regular expressions, that are mixed into the generated literal definitions."""
+
+
+class Command(BaseCommand):
+    help = f"""Measures the time to apply many regular expression replacements to the fragments of a text."""
+
+    def add_arguments(self, parser: argparse.ArgumentParser):
+        parser.add_argument(
+            "--definitions",
+            type=int,
+            default=500,
+            help="The number of replacement definitions.",
+        )
+        parser.add_argument(
+            "--fragment-size",
+            type=int,
+            default=2000,
+            help="The approximate size of each fragment in characters.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help="The number of repetitions for each measurement.",
+        )
+
+    @staticmethod
+    def _create_fragments(fragment_size: int) -> list[str]:
+        """
+        Split the test data into fragments at paragraph boundaries.
+        """
+        fragments = []
+        current = ""
+        for paragraph in TEST_DATA_FILE.read_text(encoding="utf-8").split("\n\n"):
+            current += paragraph + "\n\n"
+            if len(current) >= fragment_size:
+                fragments.append(current)
+                current = ""
+        if current:
+            fragments.append(current)
+        return fragments
+
+    @staticmethod
+    def _create_definitions(count: int) -> list[RegExReplacement]:
+        """
+        Create definitions that replace words of the test data, mixed with a few regular expressions.
+
+        Like in a list of terms, capitalized words are replaced first, followed by lower-case words.
+        """
+        text = TEST_DATA_FILE.read_text(encoding="utf-8")
+        generator = random.Random(1)
+        pattern_count = min(len(PATTERN_DEFINITIONS), count)
+        definitions = [RegExReplacement(pattern, replacement) for pattern, replacement in PATTERN_DEFINITIONS]
+        definitions = definitions[:pattern_count]
+        capitalized_words = sorted(set(re.findall(r"\b[A-Z][a-z]{2,}\b", text)))
+        lower_case_words = sorted(set(re.findall(r"\b[a-z]{3,}\b", text)))
+        capitalized_count = min(len(capitalized_words), (count - pattern_count) * 4 // 5)
+        for word in generator.sample(capitalized_words, capitalized_count):
+            definitions.append(RegExReplacement(word, f"[{word.lower()}]"))
+        for word in generator.sample(lower_case_words, count - pattern_count - capitalized_count):
+            definitions.append(RegExReplacement(word, word.upper()))
+        return definitions
+
+    def _measure(self, title: str, function: Callable[[], object], repeat: int) -> None:
+        durations = []
+        for _ in range(repeat):
+            start_time = time.perf_counter()
+            function()
+            durations.append(time.perf_counter() - start_time)
+        self.stdout.write(f"{title:<40} {min(durations) * 1000:9.1f} ms")
+
+    def handle(self, *args, **options):
+        fragments = self._create_fragments(options["fragment_size"])
+        definitions = self._create_definitions(options["definitions"])
+        repeat = options["repeat"]
+
+        def apply_sequential() -> list[str]:
+            results = []
+            for fragment in fragments:
+                for definition in definitions:
+                    fragment = definition.transform(fragment)
+                results.append(fragment)
+            return results
+
+        plan = ReplacementPlan(definitions)
+
+        def apply_plan() -> list[str]:
+            return [plan.transform(fragment) for fragment in fragments]
+
+        if apply_sequential() != apply_plan():
+            raise CommandError("The results of the replacement plan differ from the sequential replacements.")
+        self.stdout.write(
+            f"Applying {len(definitions)} definitions in up to {plan.pass_count} passes to {len(fragments)} fragments."
+        )
+        self._measure("sequential replacements", apply_sequential, repeat)
+        self._measure("create replacement plan", lambda: ReplacementPlan(definitions), repeat)
+        self._measure("replacement plan", apply_plan, repeat)
@@ -0,0 +1,28 @@
+#  Copyright © 2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
+#  According to the copyright terms specified in the file "COPYRIGHT.md".
+#  SPDX-License-Identifier: GPL-3.0-or-later
+import argparse
+
+from django.core.management import BaseCommand
+
+from backend.models import Revision
+from backend.tools.fragment_search import build_search_index
+
+
+class Command(BaseCommand):
+    help = f"""Builds the search indexes for the latest revisions of all projects."""
+
+    def add_arguments(self, parser: argparse.ArgumentParser):
+        parser.add_argument(
+            "--project",
+            type=int,
+            help="Only build the index for the project with this id.",
+        )
+
+    def handle(self, *args, **options):
+        revisions = Revision.objects.filter(is_latest=True).order_by("project_id")
+        if options["project"] is not None:
+            revisions = revisions.filter(project_id=options["project"])
+        for revision in revisions:
+            index = build_search_index(revision)
+            self.stdout.write(f"Indexed {index.fragment_count} fragments of the project {revision.project_id}.")
@@ -0,0 +1,29 @@
+#  Copyright © 2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
+#  According to the copyright terms specified in the file "COPYRIGHT.md".
+#  SPDX-License-Identifier: GPL-3.0-or-later
+import argparse
+
+from django.core.management import BaseCommand
+
+from backend.models import Revision
+
+
+class Command(BaseCommand):
+    help = f"""Rebuilds the review and transformation state counters of all documents and revisions."""
+
+    def add_arguments(self, parser: argparse.ArgumentParser):
+        parser.add_argument(
+            "--project",
+            type=int,
+            help="Only rebuild the counters for the project with this id.",
+        )
+
+    def handle(self, *args, **options):
+        revisions = Revision.objects.order_by("project_id", "number")
+        if options["project"] is not None:
+            revisions = revisions.filter(project_id=options["project"])
+        revision_count = 0
+        for revision in revisions:
+            revision.rebuild_state_counters()
+            revision_count += 1
+        self.stdout.write(f"Rebuilt the state counters of {revision_count} revisions.")
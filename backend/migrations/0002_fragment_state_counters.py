@@ -0,0 +1,152 @@
+# Generated by Django 5.0.6 on 2026-10-19 03:03
+
+from collections import Counter, defaultdict
+
+from django.db import migrations, models
+
+REVIEW_COUNTER_FIELDS = {
+    0: "review_unprocessed_count",
+    1: "review_pending_count",
+    2: "review_approved_count",
+    3: "review_rejected_count",
+}
+
+TRANSFORMATION_COUNTER_FIELDS = {
+    "source": "transformation_source_count",
+    "success": "transformation_success_count",
+    "failed": "transformation_failed_count",
+    "edited": "transformation_edited_count",
+}
+
+COUNTER_FIELDS = [*REVIEW_COUNTER_FIELDS.values(), *TRANSFORMATION_COUNTER_FIELDS.values()]
+
+
+def populate_state_counters(apps, schema_editor):
+    Fragment = apps.get_model("backend", "Fragment")
+    Document = apps.get_model("backend", "Document")
+    Revision = apps.get_model("backend", "Revision")
+    Fragment.objects.filter(edit__isnull=False).update(transformation_state="edited")
+    Fragment.objects.filter(edit__isnull=True, transformation__status=1).update(transformation_state="success")
+    Fragment.objects.filter(edit__isnull=True, transformation__isnull=False).exclude(transformation__status=1).update(
+        transformation_state="failed"
+    )
+    rows = (
+        Fragment.objects.values("document_id", "review_state", "transformation_state")
+        .annotate(total=models.Count("id"))
+        .order_by()
+    )
+    document_counters = defaultdict(Counter)
+    for row in rows:
+        counters = document_counters[row["document_id"]]
+        counters[REVIEW_COUNTER_FIELDS[row["review_state"]]] += row["total"]
+        counters[TRANSFORMATION_COUNTER_FIELDS[row["transformation_state"]]] += row["total"]
+    revision_counters = defaultdict(Counter)
+    documents = list(Document.objects.only("id", "revision_id"))
+    for document in documents:
+        counters = document_counters[document.pk]
+        for name in COUNTER_FIELDS:
+            setattr(document, name, counters[name])
+        revision_counters[document.revision_id].update(counters)
+    Document.objects.bulk_update(documents, COUNTER_FIELDS, batch_size=500)
+    revisions = list(Revision.objects.only("id"))
+    for revision in revisions:
+        counters = revision_counters[revision.pk]
+        for name in COUNTER_FIELDS:
+            setattr(revision, name, counters[name])
+    Revision.objects.bulk_update(revisions, COUNTER_FIELDS, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("backend", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="document",
+            name="review_approved_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="document",
+            name="review_pending_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="document",
+            name="review_rejected_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="document",
+            name="review_unprocessed_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="document",
+            name="transformation_edited_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="document",
+            name="transformation_failed_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="document",
+            name="transformation_source_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="document",
+            name="transformation_success_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="fragment",
+            name="transformation_state",
+            field=models.CharField(default="source", max_length=16),
+        ),
+        migrations.AddField(
+            model_name="revision",
+            name="review_approved_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="revision",
+            name="review_pending_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="revision",
+            name="review_rejected_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="revision",
+            name="review_unprocessed_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="revision",
+            name="transformation_edited_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="revision",
+            name="transformation_failed_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="revision",
+            name="transformation_source_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="revision",
+            name="transformation_success_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(populate_state_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.6 on 2026-10-19 03:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("backend", "0002_fragment_state_counters"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="fragment",
+            index=models.Index(
+                fields=["document", "review_state", "position"],
+                name="fragment_idx_review",
+            ),
+        ),
+    ]
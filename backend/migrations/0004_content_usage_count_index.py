@@ -0,0 +1,17 @@
+# Generated by Django 5.0.6 on 2026-10-19 03:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("backend", "0003_fragment_review_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="content",
+            index=models.Index(fields=["usage_count"], name="content_idx_usage_count"),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.0.6 on 2026-10-19 03:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("backend", "0004_content_usage_count_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="egressassistant",
+            name="only_changed",
+            field=models.BooleanField(
+                default=False,
+                help_text="Only export the documents that changed since they were exported the last time. The export contains a manifest that lists all changed, unchanged and removed documents.",
+                verbose_name="Only export changed documents",
+            ),
+        ),
+        migrations.CreateModel(
+            name="ExportFingerprint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("path", models.CharField(max_length=250)),
+                ("fingerprint", models.CharField(max_length=64)),
+                ("exported", models.DateTimeField(auto_now=True)),
+                (
+                    "project",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="export_fingerprints",
+                        to="backend.project",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Export Fingerprint",
+                "verbose_name_plural": "Export Fingerprints",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="exportfingerprint",
+            constraint=models.UniqueConstraint(fields=("project", "path"), name="export_fingerprint_unique_path"),
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.0.6 on 2026-10-19 03:43
+
+import backend.tools.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("backend", "0005_export_fingerprint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transformationassistant",
+            name="search_pattern",
+            field=models.CharField(
+                blank=True,
+                max_length=1000,
+                validators=[backend.tools.validators.regular_expression_validator],
+            ),
+        ),
+        migrations.CreateModel(
+            name="SearchIndex",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("indexed_until", models.DateTimeField()),
+                ("fragment_count", models.PositiveIntegerField(default=0)),
+                (
+                    "revision",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="search_index",
+                        to="backend.revision",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Search Index",
+                "verbose_name_plural": "Search Indexes",
+            },
+        ),
+        migrations.CreateModel(
+            name="SearchIndexEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("trigram", models.IntegerField()),
+                ("fragment_ids", models.BinaryField()),
+                (
+                    "index",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="entries",
+                        to="backend.searchindex",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Search Index Entry",
+                "verbose_name_plural": "Search Index Entries",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="searchindexentry",
+            index=models.Index(fields=["index", "trigram"], name="search_index_trigram_idx"),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-19 03:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("backend", "0006_search_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transformationassistant",
+            name="only_matching",
+            field=models.BooleanField(default=False),
+        ),
+    ]
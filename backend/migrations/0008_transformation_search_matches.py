@@ -0,0 +1,55 @@
+# Generated by Django 5.0.6 on 2026-10-19 04:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("backend", "0007_transformation_only_matching"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TransformationAssistantFragment",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "fragment",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="backend.fragment",
+                    ),
+                ),
+                (
+                    "transformation_assistant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="matching_fragments",
+                        to="backend.transformationassistant",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Transformation Assistant Fragment",
+                "verbose_name_plural": "Transformation Assistant Fragments",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="transformationassistantfragment",
+            index=models.Index(
+                fields=["transformation_assistant", "fragment"],
+                name="tr_assist_frag_main_idx",
+            ),
+        ),
+    ]
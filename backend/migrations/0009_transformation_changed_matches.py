@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-19 04:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("backend", "0008_transformation_search_matches"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transformationassistantfragment",
+            name="is_changed",
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-19 04:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("backend", "0009_transformation_changed_matches"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="searchindex",
+            name="rebuild_requested",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterField(
+            model_name="searchindex",
+            name="indexed_until",
+            field=models.DateTimeField(null=True),
+        ),
+    ]
@@ -4,6 +4,7 @@
 
 from .content import Content
 from .document import Document
+from .export_fingerprint import ExportFingerprint
 from .fragment import Fragment
 from .fragment_edit import FragmentEdit
 from .fragment_transformation import FragmentTransformation
@@ -13,9 +14,11 @@ from .learning_set import LearningSet
 from .project import Project
 from .revision import Revision
 from .revision_assistant import RevisionAssistant
+from .search_index import SearchIndex, SearchIndexEntry
 from .transformation import Transformation
 from .transformation_assistant import TransformationAssistant
 from .transformation_assistant_document import TransformationAssistantDocument
+from .transformation_assistant_fragment import TransformationAssistantFragment
 from .transformer_profile import TransformerProfile
 from .transformer_user_settings import TransformerUserSettings
 from .user_settings import UserSettings
@@ -1,8 +1,130 @@
 #  Copyright © 2023-2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
 #  According to the copyright terms specified in the file "COPYRIGHT.md".
 #  SPDX-License-Identifier: GPL-3.0-or-later
+import logging
+from collections import Counter, defaultdict
+from typing import Iterable, Optional
 
 from django.db import models
+from django.db.models import Count, Exists, OuterRef, Q, QuerySet
+
+logger = logging.getLogger(__name__)
+
+USAGE_COUNT_BATCH_SIZE = 1000
+"""The maximum number of content ids in one update of the usage counts."""
+
+
+class ContentManager(models.Manager):
+    """
+    The manager for `Content` instances.
+    """
+
+    def change_usage_counts(self, changes: dict[int, int]) -> None:
+        """
+        Change the usage counts of many content blocks, with one update per batch and difference.
+
+        :param changes: The difference for the usage count of each content id.
+        """
+        ids_by_difference: dict[int, list[int]] = defaultdict(list)
+        for content_id, difference in changes.items():
+            if difference:
+                ids_by_difference[difference].append(content_id)
+        for difference, content_ids in ids_by_difference.items():
+            for index in range(0, len(content_ids), USAGE_COUNT_BATCH_SIZE):
+                self.filter(pk__in=content_ids[index : index + USAGE_COUNT_BATCH_SIZE]).update(
+                    usage_count=models.F("usage_count") + difference
+                )
+
+    def allocate_ids(self, content_ids: Iterable[Optional[int]]) -> None:
+        """
+        Allocate the content blocks with the given ids. Ids that occur multiple times are allocated multiple times.
+
+        :param content_ids: The content ids. `None` values are ignored.
+        """
+        self.change_usage_counts(Counter(content_id for content_id in content_ids if content_id is not None))
+
+    def release_ids(self, content_ids: Iterable[Optional[int]]) -> None:
+        """
+        Release the content blocks with the given ids. Ids that occur multiple times are released multiple times.
+
+        :param content_ids: The content ids. `None` values are ignored.
+        """
+        counts = Counter(content_id for content_id in content_ids if content_id is not None)
+        self.change_usage_counts({content_id: -count for content_id, count in counts.items()})
+
+    def release_for_fragments(self, fragments: QuerySet) -> None:
+        """
+        Release the content blocks of the given fragments, including their edits and transformations.
+
+        Call this method before the fragments are deleted with a document or revision.
+
+        :param fragments: The fragments that will be deleted.
+        """
+        from .fragment_edit import FragmentEdit
+        from .fragment_transformation import FragmentTransformation
+
+        changes = Counter()
+        for content_users in [
+            fragments,
+            FragmentEdit.objects.filter(fragment__in=fragments),
+            FragmentTransformation.objects.filter(fragment__in=fragments),
+        ]:
+            usages = content_users.exclude(content=None).values("content_id").annotate(count=Count("pk")).order_by()
+            for usage in usages:
+                changes[usage["content_id"]] -= usage["count"]
+        self.change_usage_counts(changes)
+
+    @staticmethod
+    def _get_content_users() -> list[QuerySet]:
+        """
+        Get the query sets of all models that reference content blocks.
+        """
+        from .fragment import Fragment
+        from .fragment_edit import FragmentEdit
+        from .fragment_transformation import FragmentTransformation
+
+        return [Fragment.objects.all(), FragmentEdit.objects.all(), FragmentTransformation.objects.all()]
+
+    def _repair_usage_counts(self, content_ids: list[int]) -> None:
+        """
+        Set the usage counts of the given content blocks to the number of their actual references.
+        """
+        for index in range(0, len(content_ids), USAGE_COUNT_BATCH_SIZE):
+            batch_ids = content_ids[index : index + USAGE_COUNT_BATCH_SIZE]
+            changes = Counter()
+            for content_users in self._get_content_users():
+                usages = (
+                    content_users.filter(content_id__in=batch_ids)
+                    .values("content_id")
+                    .annotate(count=Count("pk"))
+                    .order_by()
+                )
+                for usage in usages:
+                    changes[usage["content_id"]] += usage["count"]
+            for content_id, usage_count in self.filter(pk__in=batch_ids).values_list("pk", "usage_count"):
+                changes[content_id] -= usage_count
+            self.change_usage_counts(changes)
+
+    def delete_unused(self) -> int:
+        """
+        Delete all content blocks that are no longer used.
+
+        Blocks that are still referenced are never deleted, even if their usage count dropped to zero, as this
+        would clear the references. Their usage counts are repaired instead. Only the ids of the deleted blocks
+        are loaded, not their texts.
+
+        :return: The number of deleted content blocks.
+        """
+        is_referenced = Q()
+        for content_users in self._get_content_users():
+            is_referenced |= Exists(content_users.filter(content_id=OuterRef("pk")))
+        unused_contents = self.filter(usage_count__lte=0)
+        referenced_ids = list(unused_contents.filter(is_referenced).values_list("pk", flat=True))
+        if referenced_ids:
+            logger.warning(f"Repairing the usage count of {len(referenced_ids)} referenced content block(s).")
+            self._repair_usage_counts(referenced_ids)
+        deleted_count, _ = unused_contents.exclude(is_referenced).only("pk").delete()
+        return deleted_count
 
 
 class Content(models.Model):
@@ -12,6 +134,9 @@ class Content(models.Model):
     By having text blocks referenced by ID, fragments can share unchanged text blocks. This not only
     reduces the storage amount required for projects with many revisions, but also makes creating
     revisions extremely fast as only ids are copied, not texts.
+
+    The usage count is only changed in the database, using `F()` expressions. Content blocks that are no
+    longer used are not deleted immediately, but periodically using `Content.objects.delete_unused()`.
     """
 
     text = models.TextField()
@@ -20,6 +145,8 @@ class Content(models.Model):
     usage_count = models.IntegerField(default=1)
     """The number of usages for this content block."""
 
+    objects = ContentManager()
+
     @property
     def is_shared(self):
         return self.usage_count > 1
@@ -31,15 +158,34 @@ class Content(models.Model):
     def allocate(self):
         """
         Allocate this content.
+
+        The usage count is incremented in the database, so concurrent changes are not overwritten.
         """
+        Content.objects.filter(pk=self.pk).update(usage_count=models.F("usage_count") + 1)
         self.usage_count += 1
-        self.save()
 
     def release(self):
         """
-        Release this content.
+        Release this content. If it is no longer used, it is deleted by the next periodic clean-up.
         """
+        Content.objects.filter(pk=self.pk).update(usage_count=models.F("usage_count") - 1)
         self.usage_count -= 1
-        self.save()
-        if not self.is_used:
-            self.delete()
+
+    def replace_text(self, text: str) -> bool:
+        """
+        Replace the text of this content, if it is not shared.
+
+        The usage count is verified in the database with the same query that changes the text.
+
+        :param text: The new text.
+        :return: `True` if the text was replaced, `False` if the content is shared.
+        """
+        if not Content.objects.filter(pk=self.pk, usage_count__lte=1).update(text=text):
+            return False
+        self.text = text
+        return True
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["usage_count"], name="content_idx_usage_count"),
+        ]
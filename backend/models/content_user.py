@@ -24,12 +24,13 @@ class ContentUser(models.Model):
             return ""
         return self.content.text
 
-    def _set_content(self, new_content: Optional[Content], *, allocate_new_content: bool = True):
+    def _set_content(self, new_content: Optional[Content], *, allocate_new_content: bool = True, save: bool = True):
         """
         Replace the content with another one or None.
 
         :param new_content: The new content or None
         :param allocate_new_content: If the new content should be allocated.
+        :param save: If this object shall be saved after the change.
         """
         if self.content is None and new_content is None:
             return  # Ignore this call if there will be no change.
@@ -40,21 +41,24 @@ class ContentUser(models.Model):
         self.content = new_content
         if allocate_new_content and self.content is not None:
             self.content.allocate()
-        self.save()
+        if save:
+            self.save()
 
-    def set_text(self, text: str, existing_content: list[Content] = None):
+    def set_text(self, text: str, existing_content: list[Content] = None, *, save: bool = True):
         """
         Set the text content for this object, reusing existing content if possible.
 
         :param text: The text to set or update.
         :param existing_content: Existing content blocks to consider.
+        :param save: If this object shall be saved, if it references a different content afterward. Disable this
+            to save the `content` field together with other changes.
         """
         # If there is no difference, keep everything as it is.
         if self.text == text:
             return
         # If new text is empty, remove the existing content.
         if text == "":
-            self._set_content(None)
+            self._set_content(None, save=save)
             return
         # Find matching blocks for the new text.
         matching_content = None
@@ -64,15 +68,13 @@ class ContentUser(models.Model):
                     matching_content = content
         # In case we have existing content that matches the text.
         if matching_content is not None:
-            self._set_content(matching_content)
+            self._set_content(matching_content, save=save)
             return
         # If we have exclusive content, we can change its text.
-        if self.content is not None and not self.content.is_shared:
-            self.content.text = text
-            self.content.save()
+        if self.content is not None and not self.content.is_shared and self.content.replace_text(text):
             return
         # In any other case, assign a new content block.
-        self._set_content(Content.objects.create(text=text), allocate_new_content=False)
+        self._set_content(Content.objects.create(text=text), allocate_new_content=False, save=save)
 
     class Meta:
         abstract = True
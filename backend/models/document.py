@@ -1,6 +1,7 @@
 #  Copyright © 2023-2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
 #  According to the copyright terms specified in the file "COPYRIGHT.md".
 #  SPDX-License-Identifier: GPL-3.0-or-later
+from collections import Counter, defaultdict
 from functools import cached_property
 from pathlib import Path
 from typing import Self
@@ -9,8 +10,8 @@ from django.db import models
 from django.db.models import QuerySet
 from django.utils.translation import gettext_lazy as _
 
-from backend.enums import ReviewStateCounts, ReviewState, TransformerStatus
 from backend.enums.line_endings import LineEndings
+from backend.enums.review_state import ReviewState
 from backend.enums.transformation_state import TransformationStateCounts, TransformationState
 from backend.size_calculator.manager import size_calculator_manager
 from backend.splitter.block import SplitterBlock
@@ -20,9 +21,10 @@ from backend.splitter.stats import SplitterStats
 from backend.syntax_handler import syntax_manager
 from backend.tools.definitions import IDENTIFIER_LENGTH, PATH_LENGTH
 from backend.tools.validators import identifier_validator, path_validator
+from .state_counters import COUNTER_FIELDS, FragmentStateCounters, REVIEW_COUNTER_FIELDS, TRANSFORMATION_COUNTER_FIELDS
 
 
-class Document(models.Model):
+class Document(FragmentStateCounters):
     """
     A folder or document in a project.
     """
@@ -100,10 +102,6 @@ class Document(models.Model):
         """
         return syntax_manager.verbose_name(self.document_syntax)
 
-    @property
-    def fragment_count(self) -> int:
-        return self.fragments.count()
-
     @staticmethod
     def _elide_text(text: str, max_length: int, elide_str: str = "…") -> str:
         if len(text) <= max_length:
@@ -124,16 +122,6 @@ class Document(models.Model):
             return result
         return self._elide_text(self.path, self.MAX_SHORTENED_LENGTH)
 
-    def review_states(self) -> ReviewStateCounts:
-        """
-        Get the number of review states for the document fragments.
-        """
-        states = self.fragments.values("review_state").annotate(total=models.Count("id"))
-        result: dict[ReviewState, int] = {}
-        for state in states:
-            result[ReviewState(state["review_state"])] = state["total"]
-        return ReviewStateCounts.from_dict(result)
-
     @classmethod
     def transformation_states_from_documents(cls, documents: QuerySet[Self]) -> TransformationStateCounts:
         """
@@ -142,54 +130,41 @@ class Document(models.Model):
         :param documents: The documents to analyze.
         :return: The transformation state counts.
         """
-        count_source = models.Count(
-            "fragments", filter=models.Q(fragments__transformation__isnull=True, fragments__edit__isnull=True)
-        )
-        count_success = models.Count(
-            "fragments",
-            filter=models.Q(
-                fragments__transformation__isnull=False,
-                fragments__edit__isnull=True,
-                fragments__transformation__status=TransformerStatus.SUCCESS.value,
-            ),
-        )
-        count_failed = models.Count(
-            "fragments",
-            filter=models.Q(
-                fragments__transformation__isnull=False,
-                fragments__edit__isnull=True,
-                fragments__transformation__status=TransformerStatus.FAILURE.value,
-            ),
-        )
-        count_edited = models.Count("fragments", filter=models.Q(fragments__edit__isnull=False))
-        counts = (
-            documents.annotate(
-                source=count_source,
-                success=count_success,
-                failed=count_failed,
-                edited=count_edited,
-            )
-            .values("source", "success", "failed", "edited")
-            .aggregate(
-                source_sum=models.Sum("source"),
-                success_sum=models.Sum("success"),
-                failed_sum=models.Sum("failed"),
-                edited_sum=models.Sum("edited"),
-            )
+        sums = documents.aggregate(
+            **{state.value: models.Sum(field_name) for state, field_name in TRANSFORMATION_COUNTER_FIELDS.items()}
         )
         result: dict[TransformationState, int] = {
-            TransformationState.SOURCE: counts["source_sum"],
-            TransformationState.SUCCESS: counts["success_sum"],
-            TransformationState.FAILED: counts["failed_sum"],
-            TransformationState.EDITED: counts["edited_sum"],
+            state: sums[state.value] or 0 for state in TRANSFORMATION_COUNTER_FIELDS.keys()
         }
         return TransformationStateCounts.from_dict(result)
 
-    def transformation_states(self) -> TransformationStateCounts:
+    @classmethod
+    def rebuild_state_counters(cls, documents: QuerySet[Self]) -> None:
         """
-        Get the transformation states for all document fragments.
+        Rebuild the state counters of the given documents from their fragments, using one grouped query.
+
+        This method expects the `transformation_state` of the fragments to be correct. It does not update
+        the counters of the revision.
+
+        :param documents: The documents to update.
         """
-        return self.transformation_states_from_documents(Document.objects.filter(id=self.id))
+        from backend.models.fragment import Fragment
+
+        documents = list(documents)
+        rows = (
+            Fragment.objects.filter(document__in=[document.pk for document in documents])
+            .values("document_id", "review_state", "transformation_state")
+            .annotate(total=models.Count("id"))
+            .order_by()
+        )
+        document_counters: dict[int, Counter] = defaultdict(Counter)
+        for row in rows:
+            counters = document_counters[row["document_id"]]
+            counters[REVIEW_COUNTER_FIELDS[ReviewState(row["review_state"])]] += row["total"]
+            counters[TRANSFORMATION_COUNTER_FIELDS[TransformationState(row["transformation_state"])]] += row["total"]
+        for document in documents:
+            document.set_state_counters(document_counters[document.pk])
+        cls.objects.bulk_update(documents, COUNTER_FIELDS, batch_size=500)
 
     @property
     def has_text_changes(self) -> bool:
@@ -1,15 +1,18 @@
 #  Copyright © 2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
 #  According to the copyright terms specified in the file "COPYRIGHT.md".
 #  SPDX-License-Identifier: GPL-3.0-or-later
+from django.conf import settings
 from django.db import models, transaction
-from django.db.models import QuerySet
+from django.db.models import QuerySet, Sum
 from django.db.models.functions import Lower
 from django.utils.translation import gettext_lazy as _
 
 from backend.enums.egress_step import EgressStep
-from backend.models import Document
+from backend.models import Document, Fragment
 from backend.models.project_assistant import ProjectAssistant
 from backend.tools.definitions import PATH_LENGTH
+from backend.tools.document_export import DocumentExport
+from backend.tools.export_fingerprints import ExportFingerprints
 from backend.tools.validators import egress_destination_validator
 from tasks.models import Task
 from tasks.models.task import TaskParameter
@@ -32,6 +35,16 @@ class EgressAssistant(ProjectAssistant):
     This directory is also used to find the resulting file for a download.
     """
 
+    only_changed = models.BooleanField(
+        default=False,
+        verbose_name=_("Only export changed documents"),
+        help_text=_(
+            "Only export the documents that changed since they were exported the last time. "
+            "The export contains a manifest that lists all changed, unchanged and removed documents."
+        ),
+    )
+    """If only documents are exported, that changed since the last export."""
+
     class Meta:
         verbose_name = _("Egress")
 
@@ -39,8 +52,56 @@ class EgressAssistant(ProjectAssistant):
         """
         Get all selected documents associated with this assistant.
         """
-        selected_ids = [row["document__id"] for row in self.documents.order_by("order_index").values("document__id")]
-        return Document.objects.filter(id__in=selected_ids).order_by(Lower("path"))
+        return Document.objects.filter(id__in=self.documents.values("document_id")).order_by(Lower("path"), "pk")
+
+    def get_selected_size(self) -> int:
+        """
+        Get the total size of the selected documents in bytes.
+
+        The size is calculated from the sizes of the source texts, so it is an estimate for the size of the export.
+        """
+        fragments = Fragment.objects.filter(document__in=self.get_selected_documents().order_by())
+        return fragments.aggregate(size=Sum("size_bytes"))["size"] or 0
+
+    def is_streamed_export(self) -> bool:
+        """
+        Test if the selection is small enough, to generate the export on the fly while it is downloaded.
+
+        Exports of changed documents are always prepared by a task, as the fingerprints are stored with the
+        first download, and a repeated download would not contain the same documents.
+        """
+        if self.only_changed:
+            return False
+        return self.get_selected_size() <= settings.BACKEND_EGRESS_STREAMING_SIZE_LIMIT
+
+    def start_streamed_export(self):
+        """
+        Start a new export that is generated while it is downloaded.
+
+        No task is started, the assistant directly switches to the done step.
+        """
+        self.step = EgressStep.DONE
+        self.save()
+
+    def create_export(self, *, worker_count: int = 1) -> DocumentExport:
+        """
+        Create the export for the selected documents.
+
+        The fingerprints of the exported documents are stored, after the export was completely written.
+
+        :param worker_count: The number of threads that compress documents in parallel.
+        :return: The export.
+        """
+        fingerprints = ExportFingerprints(self.revision, self.get_selected_documents())
+        if not self.only_changed:
+            return DocumentExport(fingerprints.documents, worker_count=worker_count, on_finished=fingerprints.save)
+        documents = fingerprints.get_changed_documents()
+        return DocumentExport(
+            documents,
+            worker_count=worker_count,
+            manifest=fingerprints.create_manifest(documents),
+            on_finished=fingerprints.save,
+        )
 
     def start_export(self, *, success_url: str, failure_url: str):
         """
@@ -0,0 +1,33 @@
+#  Copyright © 2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
+#  According to the copyright terms specified in the file "COPYRIGHT.md".
+#  SPDX-License-Identifier: GPL-3.0-or-later
+
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from backend.tools.definitions import PATH_LENGTH
+
+
+class ExportFingerprint(models.Model):
+    """
+    The fingerprint of a document, as it was exported the last time.
+
+    Fingerprints are stored by path for the whole project, so they stay valid if a new revision is created.
+    """
+
+    project = models.ForeignKey("Project", on_delete=models.CASCADE, related_name="export_fingerprints")
+    """The project of the exported document."""
+
+    path = models.CharField(max_length=PATH_LENGTH)
+    """The path of the exported document."""
+
+    fingerprint = models.CharField(max_length=64)
+    """A hash over the encoding and the final texts of all fragments of the document."""
+
+    exported = models.DateTimeField(auto_now=True)
+    """The date when the document was exported the last time."""
+
+    class Meta:
+        verbose_name = _("Export Fingerprint")
+        verbose_name_plural = _("Export Fingerprints")
+        constraints = [models.UniqueConstraint(fields=["project", "path"], name="export_fingerprint_unique_path")]
@@ -1,18 +1,137 @@
 #  Copyright © 2023-2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
 #  According to the copyright terms specified in the file "COPYRIGHT.md".
 #  SPDX-License-Identifier: GPL-3.0-or-later
-from typing import Self
+from typing import Iterable, Optional, Self
 
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, QuerySet, Value, When
+from django.db.models.functions import Coalesce, Length, MD5, Substr
 
 from backend.enums.review_state import ReviewState
+from backend.enums.transformation_state import TransformationState
 from backend.enums.transformer_status import TransformerStatus
 from backend.transformer.result import ProcessorResult
 from backend.size_calculator.base import SizeCalculatorBase
 from backend.size_calculator.manager import size_calculator_manager
+from .content import Content
 from .content_user import ContentUser
 from .document import Document
+from .revision import Revision
+from .state_counters import FragmentStates, defer_counter_changes, get_counter_changes, get_counter_updates
+
+
+def _final_text_expression() -> Case:
+    """
+    Create an expression that resolves the final text of a fragment in the database.
+
+    The expression follows the rules of `Fragment.final_text`: The text of the edit, if one exists, the text of
+    the transformation, if one exists, or the source text. A missing content block is an empty text. A simple
+    `COALESCE` of the three texts is not sufficient, as an edit or transformation with an empty text has no
+    content block.
+    """
+    text_field = models.TextField()
+    return Case(
+        When(edit__isnull=False, then=Coalesce("edit__content__text", Value(""), output_field=text_field)),
+        When(
+            transformation__isnull=False,
+            then=Coalesce("transformation__content__text", Value(""), output_field=text_field),
+        ),
+        default=Coalesce("content__text", Value(""), output_field=text_field),
+        output_field=text_field,
+    )
+
+
+def _source_text_expression() -> Coalesce:
+    """
+    Create an expression that resolves the source text of a fragment in the database.
+
+    The source text is the text that a transformation processes. A missing content block is an empty text.
+    """
+    return Coalesce("content__text", Value(""), output_field=models.TextField())
+
+
+class FragmentQuerySet(QuerySet):
+    """
+    The queryset for `Fragment` instances.
+    """
+
+    def with_text_summary(self, length: Optional[int] = None) -> Self:
+        """
+        Prepare the fragments for a list, without loading their full texts.
+
+        Each fragment gets the attributes `final_text_summary`, with the first characters of the final text,
+        and `final_text_length`, with the length of the final text. The edit and transformation are loaded with
+        the fragment, but without their notes, output and failure details.
+
+        :param length: The maximum length of the summary, or `None` to use the configured length.
+        :return: The new queryset.
+        """
+        if length is None:
+            length = settings.BACKEND_FRAGMENT_SUMMARY_LENGTH
+        final_text = _final_text_expression()
+        return (
+            self.select_related("edit", "transformation")
+            .defer(
+                "edit__notes",
+                "transformation__output",
+                "transformation__failure_input",
+                "transformation__failure_reason",
+            )
+            .annotate(final_text_summary=Substr(final_text, 1, length), final_text_length=Length(final_text))
+        )
+
+    def final_texts(self) -> QuerySet:
+        """
+        Get the final texts of the fragments, without creating fragment instances.
+
+        The final texts are resolved in the database, with a single query for all fragments.
+
+        :return: A queryset with `(document_id, final_text)` tuples, ordered by document and position.
+        """
+        return self.order_by("document_id", "position").values_list("document_id", _final_text_expression())
+
+    def final_text_hashes(self) -> QuerySet:
+        """
+        Get the MD5 hashes of the final texts, without transferring the texts from the database.
+
+        :return: A queryset with `(document_id, hash)` tuples, ordered by document and position.
+        """
+        return self.order_by("document_id", "position").values_list("document_id", MD5(_final_text_expression()))
+
+    def fragment_final_texts(self) -> QuerySet:
+        """
+        Get the final texts of the fragments together with the fragment ids, without creating fragment instances.
+
+        :return: A queryset with `(fragment_id, document_id, final_text)` tuples, ordered by fragment id.
+        """
+        return self.order_by("pk").values_list("pk", "document_id", _final_text_expression())
+
+    def fragment_source_texts(self) -> QuerySet:
+        """
+        Get the source texts of the fragments together with the fragment ids, without creating fragment instances.
+
+        :return: A queryset with `(fragment_id, document_id, source_text)` tuples, ordered by fragment id.
+        """
+        return self.order_by("pk").values_list("pk", "document_id", _source_text_expression())
+
+    def fragment_indexed_texts(self) -> QuerySet:
+        """
+        Get the final and source texts of the fragments, as they are added to the search index.
+
+        The source text is only resolved for fragments with an edit or transformation, as it is the final text
+        of all other fragments.
+
+        :return: A queryset with `(fragment_id, final_text, source_text)` tuples, ordered by fragment id. The
+            source text is `None` if it is the final text.
+        """
+        source_text = Case(
+            When(edit__isnull=True, transformation__isnull=True, then=Value(None)),
+            default=_source_text_expression(),
+            output_field=models.TextField(),
+        )
+        return self.order_by("pk").values_list("pk", _final_text_expression(), source_text)
 
 
 class Fragment(ContentUser):
@@ -50,6 +169,9 @@ class Fragment(ContentUser):
     has_text_changes = models.BooleanField(default=False)
     """If this fragment has text changes in its current state."""
 
+    transformation_state = models.CharField(max_length=16, default=TransformationState.SOURCE.value)
+    """The transformation state of this fragment, derived from its edit and transformation."""
+
     context = models.JSONField(null=True)
     """Context information for this fragment."""
 
@@ -59,6 +181,8 @@ class Fragment(ContentUser):
     modified = models.DateTimeField(auto_now=True)
     """The date when the fragment was last modified."""
 
+    objects = FragmentQuerySet.as_manager()
+
     @property
     def review_state_identifier(self) -> str:
         """Get the review state as lower-case identifier."""
@@ -148,6 +272,15 @@ class Fragment(ContentUser):
             pass
         return self.text
 
+    @property
+    def is_final_text_truncated(self) -> bool:
+        """
+        Test if the final text summary is shorter than the final text.
+
+        This property requires a fragment that was loaded with `with_text_summary()`.
+        """
+        return self.final_text_length > len(self.final_text_summary)
+
     @property
     def is_unprocessed(self) -> bool:
         """
@@ -178,17 +311,23 @@ class Fragment(ContentUser):
 
     def _update_text_changes(self) -> None:
         """
-        Update the `has_text_changes` field.
+        Update the `has_text_changes` and `transformation_state` fields.
         """
         has_edit = self.has_edit
         has_transformation = self.has_transformation
         if has_edit:
             self.has_text_changes = self.edit.text != self.text
+            self.transformation_state = TransformationState.EDITED.value
             return
         if has_transformation:
             self.has_text_changes = self.transformation.text != self.text
+            if self.transformation.status == TransformerStatus.SUCCESS:
+                self.transformation_state = TransformationState.SUCCESS.value
+            else:
+                self.transformation_state = TransformationState.FAILED.value
             return
         self.has_text_changes = False
+        self.transformation_state = TransformationState.SOURCE.value
 
     def delete_edit(self) -> None:
         """
@@ -197,6 +336,8 @@ class Fragment(ContentUser):
         """
         try:
             self.edit.delete()
+            # Forget the deleted edit, so `has_edit` reflects the new state.
+            Fragment.edit.related.delete_cached_value(self)
             self._update_text_changes()
             if self.has_text_changes:
                 self.review_state = ReviewState.PENDING
@@ -212,6 +353,7 @@ class Fragment(ContentUser):
         """
         try:
             self.transformation.delete()
+            Fragment.transformation.related.delete_cached_value(self)
             self._update_text_changes()
             if self.has_text_changes:
                 self.review_state = ReviewState.PENDING
@@ -248,7 +390,7 @@ class Fragment(ContentUser):
         Set or overwrite the transformation of this fragment.
 
         - Existing edits are removed from this fragment.
-        - Existing transformations are removed from this fragment.
+        - An existing transformation is updated in place, including its content if it is not shared.
         - The status is reset to 'pending'.
 
         :param transformation: The transformation that modifies this fragment.
@@ -258,70 +400,176 @@ class Fragment(ContentUser):
         """
         from .fragment_transformation import FragmentTransformation
 
-        self.delete_edit()
-        self.delete_transformation()
-
-        self.review_state = ReviewState.PENDING
-        self.transformation = FragmentTransformation.objects.create(
-            fragment=self,
-            status=transformation_result.status,
-            output=transformation_result.output,
-            failure_input=transformation_result.failure_input,
-            failure_reason=transformation_result.failure_reason,
-            transformation=transformation,
-        )
-        self.transformation.set_text(transformation_result.content, [self.content])
-        self._update_text_changes()
-        if auto_approve_unchanged and not self.has_text_changes:
-            self.review_state = ReviewState.APPROVED
-        self.save()
+        with transaction.atomic(savepoint=False):
+            self.delete_edit()
+            if self.has_transformation:
+                fragment_transformation = self.transformation
+            else:
+                fragment_transformation = FragmentTransformation(fragment=self)
+            fragment_transformation.status = transformation_result.status
+            fragment_transformation.output = transformation_result.output
+            fragment_transformation.failure_input = transformation_result.failure_input
+            fragment_transformation.failure_reason = transformation_result.failure_reason
+            fragment_transformation.transformation = transformation
+            fragment_transformation.set_text(transformation_result.content, [self.content], save=False)
+            if fragment_transformation._state.adding:
+                fragment_transformation.save()
+                self.transformation = fragment_transformation
+            else:
+                fragment_transformation.save(
+                    update_fields=["status", "output", "failure_input", "failure_reason", "transformation", "content"]
+                )
+            self._update_text_changes()
+            if auto_approve_unchanged and not self.has_text_changes:
+                self.review_state = ReviewState.APPROVED
+            else:
+                self.review_state = ReviewState.PENDING
+            self.save(update_fields=["review_state", "has_text_changes", "transformation_state", "modified"])
         return self.has_text_changes
 
-    def create_copy_for_revision(
-        self, *, document: Document, size_calculator: SizeCalculatorBase, first_line_number: int, copy_review: bool
-    ) -> Self:
+    @classmethod
+    def create_copies_for_revision(
+        cls, fragments: Iterable[Self], *, document: Document, size_calculator: SizeCalculatorBase, copy_review: bool
+    ) -> None:
         """
-        Create a copy of this fragment for new revisions.
+        Create copies of fragments for a new revision.
 
-        Copies the `final_text` of this fragment into a new one. Also calculates the sizes for the
-        new fragment.
+        Each copy uses the content block of the `final_text` of the original fragment, and its sizes are calculated
+        for this text. The copies are inserted and their content blocks are allocated in batches. Afterward, the
+        state counters of the new document are rebuilt.
 
-        :param document: The document to add this fragment to.
+        :param fragments: The fragments to copy, ordered by position, with their edits and transformations.
+        :param document: The new document for the copies.
         :param size_calculator: The size calculator to use for the `size` attribute.
-        :param first_line_number: The first line number of this fragment.
-        :param copy_review: Whether the review state from this fragment shall be copied.
-        """
-        review_state = ReviewState.UNPROCESSED
-        if copy_review:
-            review_state = self.review_state
-        text = self.final_text
-        size = size_calculator.size_for_text(text)
-        default_sizes = size_calculator_manager.default_sizes_for_text(text)
-        size_bytes = default_sizes.bytes_utf8
-        size_characters = default_sizes.characters
-        size_words = default_sizes.words
-        size_lines = default_sizes.lines
-        new_fragment = Fragment.objects.create(
-            document=document,
-            position=self.position,
-            first_line_number=first_line_number,
-            size=size,
-            size_bytes=size_bytes,
-            size_characters=size_characters,
-            size_words=size_words,
-            size_lines=size_lines,
-            review_state=review_state,
-            context=self.context,
+        :param copy_review: Whether the review state of the fragments shall be copied.
+        """
+        new_fragments = []
+        first_line_number = 1
+        for fragment in fragments:
+            text = fragment.final_text
+            if fragment.has_edit:
+                content_id = fragment.edit.content_id
+            elif fragment.has_transformation:
+                content_id = fragment.transformation.content_id
+            else:
+                content_id = fragment.content_id
+            default_sizes = size_calculator_manager.default_sizes_for_text(text)
+            new_fragments.append(
+                Fragment(
+                    document=document,
+                    position=fragment.position,
+                    content_id=content_id if text else None,
+                    first_line_number=first_line_number,
+                    size=size_calculator.size_for_text(text),
+                    size_bytes=default_sizes.bytes_utf8,
+                    size_characters=default_sizes.characters,
+                    size_words=default_sizes.words,
+                    size_lines=default_sizes.lines,
+                    review_state=fragment.review_state if copy_review else ReviewState.UNPROCESSED,
+                    context=fragment.context,
+                )
+            )
+            first_line_number += default_sizes.lines
+        cls.objects.bulk_create(new_fragments, batch_size=500)
+        Content.objects.allocate_ids(new_fragment.content_id for new_fragment in new_fragments)
+        Document.rebuild_state_counters(Document.objects.filter(pk=document.pk))
+
+    @classmethod
+    def get_next_id_in_review_state(
+        cls, revision: Revision, review_state: ReviewState, after: Optional[Self] = None
+    ) -> Optional[int]:
+        """
+        Get the id of the next fragment with the given review state, in the order of the document paths.
+
+        Uses a single keyset query that is supported by the index on the document, review state and position.
+
+        :param revision: The revision to search.
+        :param review_state: The review state to search for.
+        :param after: The fragment to start after, or `None` to start with the first fragment.
+        :return: The id of the next fragment, or `None` if there is no such fragment.
+        """
+        fragments = cls.objects.filter(document__revision=revision, review_state=review_state.value)
+        if after is not None:
+            fragments = fragments.filter(
+                models.Q(document__path=after.document.path, position__gt=after.position)
+                | models.Q(document__path__gt=after.document.path)
+            )
+        return fragments.order_by("document__path", "position").values_list("pk", flat=True).first()
+
+    @classmethod
+    def update_transformation_states(cls, fragments: QuerySet[Self]) -> None:
+        """
+        Recalculate the `transformation_state` field for the given fragments, using set-based updates.
+
+        :param fragments: The fragments to update.
+        """
+        fragments.filter(edit__isnull=False).update(transformation_state=TransformationState.EDITED.value)
+        fragments.filter(edit__isnull=True, transformation__isnull=True).update(
+            transformation_state=TransformationState.SOURCE.value
+        )
+        fragments.filter(edit__isnull=True, transformation__status=TransformerStatus.SUCCESS.value).update(
+            transformation_state=TransformationState.SUCCESS.value
         )
-        if self.has_edit:
-            existing_content = [self.edit.content]
-        elif self.has_transformation:
-            existing_content = [self.transformation.content]
+        fragments.filter(edit__isnull=True, transformation__isnull=False).exclude(
+            transformation__status=TransformerStatus.SUCCESS.value
+        ).update(transformation_state=TransformationState.FAILED.value)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_counted_states()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using, fields, from_queryset)
+        self._remember_counted_states()
+
+    def _remember_counted_states(self) -> None:
+        """
+        Remember the states that are counted in the document and revision.
+
+        Deferred fields are not loaded; in this case, the states are read from the database on save.
+        """
+        review_state = self.__dict__.get("review_state")
+        transformation_state = self.__dict__.get("transformation_state")
+        if review_state is None or transformation_state is None:
+            self._counted_states = None
         else:
-            existing_content = None
-        new_fragment.set_text(self.final_text, existing_content)
-        new_fragment.save()
-        return new_fragment
+            self._counted_states = (review_state, transformation_state)
+
+    def _update_state_counters(self, old_states: Optional[FragmentStates], new_states: Optional[FragmentStates]):
+        """
+        Update the state counters of the document and revision of this fragment.
+
+        In a `deferred_state_counter_updates()` block, the changes are collected and applied at its end.
+
+        :param old_states: The counted states, or `None` if this fragment was not counted yet.
+        :param new_states: The new states, or `None` if this fragment was deleted.
+        """
+        changes = get_counter_changes(old_states, new_states)
+        if not changes or defer_counter_changes(self.document_id, changes):
+            return
+        updates = get_counter_updates(changes)
+        Document.objects.filter(pk=self.document_id).update(**updates)
+        Revision.objects.filter(pk=self.document.revision_id).update(**updates)
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic(savepoint=False):
+            old_states: Optional[FragmentStates] = getattr(self, "_counted_states", None)
+            if old_states is None and not self._state.adding:
+                old_states = (
+                    Fragment.objects.filter(pk=self.pk).values_list("review_state", "transformation_state").first()
+                )
+            super().save(*args, **kwargs)
+            new_states = (self.review_state, self.transformation_state)
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None and old_states is not None:
+                new_states = (
+                    new_states[0] if "review_state" in update_fields else old_states[0],
+                    new_states[1] if "transformation_state" in update_fields else old_states[1],
+                )
+            self._update_state_counters(old_states, new_states)
+            self._counted_states = new_states
 
     def __str__(self):
         return (
@@ -332,5 +580,8 @@ class Fragment(ContentUser):
     class Meta:
         verbose_name = "Document Fragment"
         verbose_name_plural = "Document Fragments"
-        indexes = [models.Index(fields=["document", "position"], name="fragment_idx_main")]
+        indexes = [
+            models.Index(fields=["document", "position"], name="fragment_idx_main"),
+            models.Index(fields=["document", "review_state", "position"], name="fragment_idx_review"),
+        ]
         constraints = [models.UniqueConstraint(fields=["document", "position"], name="fragment_unique_main")]
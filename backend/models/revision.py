@@ -4,13 +4,12 @@
 from django.db import models, transaction
 from django.utils.translation import gettext_lazy as _
 
-from backend.enums import ReviewState, ReviewStateCounts
-from backend.enums.transformation_state import TransformationStateCounts
 from backend.tools.definitions import NAME_LENGTH
 from backend.tools.validators import name_validator
+from .state_counters import COUNTER_FIELDS, FragmentStateCounters
 
 
-class Revision(models.Model):
+class Revision(FragmentStateCounters):
     """
     A revision of a project.
     """
@@ -50,32 +49,35 @@ class Revision(models.Model):
             return False  # Do not allow to delete the first revision of a project.
         return not self.successors.exists()
 
-    def review_states(self) -> ReviewStateCounts:
+    def update_state_counters_from_documents(self) -> None:
         """
-        Get the number of review states for this revision.
+        Recalculate the state counters of this revision from the counters of its documents.
         """
-        from backend.models.fragment import Fragment
+        sums = self.documents.aggregate(**{name: models.Sum(name) for name in COUNTER_FIELDS})
+        counters = {name: value or 0 for name, value in sums.items()}
+        Revision.objects.filter(pk=self.pk).update(**counters)
+        self.set_state_counters(counters)
 
-        node_ids = set([row["id"] for row in self.documents.values("id")])
-        states = (
-            Fragment.objects.filter(document_id__in=node_ids).values("review_state").annotate(total=models.Count("id"))
-        )
-        result: dict[ReviewState, int] = {}
-        for state in states:
-            result[ReviewState(state["review_state"])] = state["total"]
-        return ReviewStateCounts.from_dict(result)
+    @transaction.atomic
+    def rebuild_state_counters(self) -> None:
+        """
+        Rebuild the state counters of this revision and its documents from the fragments.
 
-    def transformation_states(self) -> TransformationStateCounts:
+        Use this method after updating fragments in bulk, or if the counters got out of sync.
+        """
         from backend.models.document import Document
+        from backend.models.fragment import Fragment
 
-        return Document.transformation_states_from_documents(self.documents)
+        Fragment.update_transformation_states(Fragment.objects.filter(document__revision=self))
+        Document.rebuild_state_counters(self.documents.all())
+        self.update_state_counters_from_documents()
 
     @transaction.atomic
     def save(self, *args, **kwargs):
         if self.is_latest:
             # Set all other revisions for the same project to is_latest=False
             Revision.objects.filter(project=self.project, is_latest=True).update(is_latest=False)
-        super().save()
+        super().save(*args, **kwargs)
 
     class Meta:
         verbose_name = _("Revision")
@@ -0,0 +1,53 @@
+#  Copyright © 2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
+#  According to the copyright terms specified in the file "COPYRIGHT.md".
+#  SPDX-License-Identifier: GPL-3.0-or-later
+
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class SearchIndex(models.Model):
+    """
+    A trigram index over the final texts of all fragments of a revision.
+
+    The index is not updated when fragments change. Instead, all fragments that were modified after the index
+    was built are searched without the index, until the index is rebuilt. Indexes are built and rebuilt by a
+    periodic background task, if a search requested it.
+    """
+
+    revision = models.OneToOneField("Revision", on_delete=models.CASCADE, related_name="search_index")
+    """The indexed revision."""
+
+    indexed_until = models.DateTimeField(null=True)
+    """The date when the index was built, or `None` if it was not built yet. Fragments modified after this date
+    are not covered by the index."""
+
+    rebuild_requested = models.BooleanField(default=False)
+    """If the index shall be built by the next run of the periodic background task."""
+
+    fragment_count = models.PositiveIntegerField(default=0)
+    """The number of indexed fragments."""
+
+    class Meta:
+        verbose_name = _("Search Index")
+        verbose_name_plural = _("Search Indexes")
+
+
+class SearchIndexEntry(models.Model):
+    """
+    The fragments that contain a trigram, for one batch of indexed fragments.
+    """
+
+    index = models.ForeignKey(SearchIndex, on_delete=models.CASCADE, related_name="entries")
+    """The index of this entry."""
+
+    trigram = models.IntegerField()
+    """Three lower-case ASCII characters, encoded as integer."""
+
+    fragment_ids = models.BinaryField()
+    """The compressed, sorted ids of the fragments that contain the trigram."""
+
+    class Meta:
+        verbose_name = _("Search Index Entry")
+        verbose_name_plural = _("Search Index Entries")
+        indexes = [models.Index(fields=["index", "trigram"], name="search_index_trigram_idx")]
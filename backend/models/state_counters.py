@@ -0,0 +1,202 @@
+#  Copyright © 2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
+#  According to the copyright terms specified in the file "COPYRIGHT.md".
+#  SPDX-License-Identifier: GPL-3.0-or-later
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Iterator, Optional, Tuple
+
+from django.db import models
+
+from backend.enums.review_state import ReviewState, ReviewStateCounts
+from backend.enums.transformation_state import TransformationState, TransformationStateCounts
+
+FragmentStates = Tuple[int, str]
+"""The review state and transformation state of a fragment, as stored in the database."""
+
+REVIEW_COUNTER_FIELDS: dict[ReviewState, str] = {
+    ReviewState.UNPROCESSED: "review_unprocessed_count",
+    ReviewState.PENDING: "review_pending_count",
+    ReviewState.APPROVED: "review_approved_count",
+    ReviewState.REJECTED: "review_rejected_count",
+}
+"""The counter field for each review state."""
+
+TRANSFORMATION_COUNTER_FIELDS: dict[TransformationState, str] = {
+    TransformationState.SOURCE: "transformation_source_count",
+    TransformationState.SUCCESS: "transformation_success_count",
+    TransformationState.FAILED: "transformation_failed_count",
+    TransformationState.EDITED: "transformation_edited_count",
+}
+"""The counter field for each transformation state."""
+
+COUNTER_FIELDS: list[str] = [*REVIEW_COUNTER_FIELDS.values(), *TRANSFORMATION_COUNTER_FIELDS.values()]
+"""The names of all counter fields."""
+
+
+def get_counter_changes(old_states: Optional[FragmentStates], new_states: Optional[FragmentStates]) -> dict[str, int]:
+    """
+    Get the changes of the counters if a fragment changes its states.
+
+    :param old_states: The previous states of the fragment, or `None` if the fragment is new.
+    :param new_states: The new states of the fragment, or `None` if the fragment is deleted.
+    :return: The changes for each counter field, without the unchanged ones.
+    """
+    changes = Counter()
+    if old_states is not None:
+        changes[REVIEW_COUNTER_FIELDS[ReviewState(old_states[0])]] -= 1
+        changes[TRANSFORMATION_COUNTER_FIELDS[TransformationState(old_states[1])]] -= 1
+    if new_states is not None:
+        changes[REVIEW_COUNTER_FIELDS[ReviewState(new_states[0])]] += 1
+        changes[TRANSFORMATION_COUNTER_FIELDS[TransformationState(new_states[1])]] += 1
+    return {name: value for name, value in changes.items() if value}
+
+
+def get_counter_updates(changes: dict[str, int]) -> dict[str, models.Expression]:
+    """
+    Convert counter changes into expressions for an atomic `update()` call.
+
+    :param changes: The changes for each counter field.
+    :return: The keyword arguments for `update()`.
+    """
+    return {name: models.F(name) + value for name, value in changes.items()}
+
+
+_deferred_updates = threading.local()
+"""The counter changes of each document, collected in a `deferred_state_counter_updates()` block."""
+
+
+@contextmanager
+def deferred_state_counter_updates() -> Iterator[None]:
+    """
+    Collect the counter changes of all fragments that are changed in this block, and apply them at its end.
+
+    Updating the counters for each fragment locks the rows of its document and revision until the transaction
+    is committed. Use this block inside long transactions that change many fragments, so the counters are
+    updated with one query per document and revision, just before the transaction is committed. If the block
+    raises an exception, the collected changes are discarded, as the transaction is rolled back.
+    """
+    if getattr(_deferred_updates, "changes", None) is not None:
+        yield  # The changes are applied by the outer block.
+        return
+    _deferred_updates.changes = defaultdict(Counter)
+    try:
+        yield
+        document_changes = _deferred_updates.changes
+    finally:
+        _deferred_updates.changes = None
+    _apply_document_changes(document_changes)
+
+
+def defer_counter_changes(document_id: int, changes: dict[str, int]) -> bool:
+    """
+    Add the counter changes of a fragment to the changes collected by `deferred_state_counter_updates()`.
+
+    :param document_id: The document of the changed fragment.
+    :param changes: The changes for each counter field.
+    :return: `True` if the changes were collected, `False` if they have to be applied immediately.
+    """
+    document_changes = getattr(_deferred_updates, "changes", None)
+    if document_changes is None:
+        return False
+    document_changes[document_id].update(changes)
+    return True
+
+
+def _apply_document_changes(document_changes: dict[int, Counter]) -> None:
+    """
+    Apply the collected counter changes, with one update for each document and revision.
+    """
+    from backend.models.document import Document
+    from backend.models.revision import Revision
+
+    revision_changes: dict[int, Counter] = defaultdict(Counter)
+    revision_ids = dict(Document.objects.filter(pk__in=document_changes.keys()).values_list("pk", "revision_id"))
+    for document_id, changes in document_changes.items():
+        changes = {name: value for name, value in changes.items() if value}
+        if not changes or document_id not in revision_ids:
+            continue
+        Document.objects.filter(pk=document_id).update(**get_counter_updates(changes))
+        revision_changes[revision_ids[document_id]].update(changes)
+    for revision_id, changes in revision_changes.items():
+        changes = {name: value for name, value in changes.items() if value}
+        if changes:
+            Revision.objects.filter(pk=revision_id).update(**get_counter_updates(changes))
+
+
+class FragmentStateCounters(models.Model):
+    """
+    Abstract base class for objects that count the review and transformation states of their fragments.
+
+    The counters are updated in the same transaction as the fragments, so the states of large documents and
+    revisions can be displayed without counting the fragments. If the counters are out of sync, use the
+    management command `rebuild_state_counters` to recalculate them.
+    """
+
+    review_unprocessed_count = models.IntegerField(default=0)
+    """The number of fragments in the review state 'unprocessed'."""
+
+    review_pending_count = models.IntegerField(default=0)
+    """The number of fragments in the review state 'pending'."""
+
+    review_approved_count = models.IntegerField(default=0)
+    """The number of fragments in the review state 'approved'."""
+
+    review_rejected_count = models.IntegerField(default=0)
+    """The number of fragments in the review state 'rejected'."""
+
+    transformation_source_count = models.IntegerField(default=0)
+    """The number of fragments without transformation or edit."""
+
+    transformation_success_count = models.IntegerField(default=0)
+    """The number of fragments with a successful transformation and without edit."""
+
+    transformation_failed_count = models.IntegerField(default=0)
+    """The number of fragments with a failed transformation and without edit."""
+
+    transformation_edited_count = models.IntegerField(default=0)
+    """The number of fragments with a manual edit."""
+
+    @property
+    def fragment_count(self) -> int:
+        """The number of fragments."""
+        return sum(getattr(self, name) for name in REVIEW_COUNTER_FIELDS.values())
+
+    def review_states(self) -> ReviewStateCounts:
+        """
+        Get the number of review states for the fragments.
+        """
+        return ReviewStateCounts.from_dict(
+            {state: getattr(self, name) for state, name in REVIEW_COUNTER_FIELDS.items()}
+        )
+
+    def transformation_states(self) -> TransformationStateCounts:
+        """
+        Get the transformation states for the fragments.
+        """
+        return TransformationStateCounts.from_dict(
+            {state: getattr(self, name) for state, name in TRANSFORMATION_COUNTER_FIELDS.items()}
+        )
+
+    def save(self, *args, **kwargs):
+        # The counters are only updated atomically in the database. Never overwrite them with the values
+        # of an instance that was loaded before its fragments changed.
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    def set_state_counters(self, counters: dict[str, int]) -> None:
+        """
+        Set all counters from the given values. Missing counters are set to zero.
+
+        :param counters: The values for the counter fields.
+        """
+        for name in COUNTER_FIELDS:
+            setattr(self, name, counters.get(name, 0))
+
+    class Meta:
+        abstract = True
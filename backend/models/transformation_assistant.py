@@ -1,6 +1,8 @@
 #  Copyright © 2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
 #  According to the copyright terms specified in the file "COPYRIGHT.md".
 #  SPDX-License-Identifier: GPL-3.0-or-later
+from typing import Optional
+
 from django.db import models, transaction
 from django.db.models import QuerySet, Count, F
 from django.db.models.functions import Lower
@@ -13,9 +15,16 @@ from backend.enums.transformation_step import TransformationStep
 from backend.enums.transformed_states import TransformedStates
 from backend.models.fragment import Fragment
 from backend.models.document import Document
+from backend.tools.fragment_search import FragmentSearch
+from backend.tools.transformation_dry_run import TransformationDryRun
+from backend.tools.validators import regular_expression_validator
+from backend.transformer.data.regex_definition import RegExReplacement
 from tasks.models import Task
 from tasks.models.task import TaskParameter
 
+MATCHING_FRAGMENT_BATCH_SIZE = 500
+"""The number of matching fragments that are stored or updated with one query."""
+
 
 class TransformationAssistant(ProjectAssistant):
     """
@@ -42,6 +51,12 @@ class TransformationAssistant(ProjectAssistant):
     review_rejected = models.BooleanField(default=True)
     """If rejected fragments shall be processed."""
 
+    search_pattern = models.CharField(max_length=1000, blank=True, validators=[regular_expression_validator])
+    """If set, only fragments whose final text matches this regular expression are processed."""
+
+    only_matching = models.BooleanField(default=False)
+    """If only fragments whose text is changed by the replacements of the transformer shall be processed."""
+
     auto_approve_unchanged = models.BooleanField(default=True)
     """If unchanged fragments shall be automatically accepted."""
 
@@ -84,18 +99,20 @@ class TransformationAssistant(ProjectAssistant):
         """
         Get all selected documents associated with this assistant.
         """
-        selected_ids = [row["document__id"] for row in self.documents.order_by("order_index").values("document__id")]
-        return Document.objects.filter(id__in=selected_ids).order_by(Lower("path"))
+        return Document.objects.filter(id__in=self.documents.values("document_id")).order_by(Lower("path"))
 
-    def get_selected_fragments(self) -> QuerySet[Fragment]:
+    def _get_filtered_fragments(self) -> QuerySet[Fragment]:
         """
-        Get all selected fragments for this assistant, that match the criteria.
-        :return:
+        Get all fragments of the selected documents, that match the review and transformation criteria.
+
+        The documents are selected with a subquery, so the selection works for any number of documents
+        without loading their ids.
         """
-        document_ids = [row["id"] for row in self.get_selected_documents().values("id").order_by("id")]
-        fragments = Fragment.objects.filter(document_id__in=document_ids).select_related("transformation", "edit")
+        fragments = Fragment.objects.filter(document_id__in=self.documents.values("document_id")).select_related(
+            "transformation", "edit"
+        )
         review_states = self.get_review_states()
-        if len(review_states) < 3:
+        if len(review_states) < len(ReviewState):
             fragments = fragments.filter(review_state__in=review_states)
         match self.transformed_states:
             case TransformedStates.EMPTY:
@@ -108,29 +125,123 @@ class TransformationAssistant(ProjectAssistant):
                 pass
         return fragments
 
+    def _get_searched_fragments(self) -> QuerySet[Fragment]:
+        """
+        Get all filtered fragments, that matched the search pattern when the matches were stored.
+        """
+        fragments = self._get_filtered_fragments()
+        if self.search_pattern:
+            fragments = fragments.filter(pk__in=self.matching_fragments.values("fragment_id"))
+        return fragments
+
+    def get_replacements(self) -> Optional[list[RegExReplacement]]:
+        """
+        Get the regular expression replacements of the transformer, if it applies replacements.
+        """
+        return self.get_transformer().get_replacements(self.profile.get_settings())
+
+    def _run_dry_run(self) -> Optional[TransformationDryRun]:
+        """
+        Run the transformation without storing the results, for the fragments that match the criteria of the setup.
+
+        The dry run is only available for transformers that apply regular expression replacements.
+        """
+        replacements = self.get_replacements()
+        if replacements is None:
+            return None
+        dry_run = TransformationDryRun(self.revision, replacements)
+        dry_run.run(self._get_searched_fragments())
+        return dry_run
+
+    def get_dry_run_statistics(self) -> Optional[dict]:
+        """
+        Get the statistics of the dry run, that were stored when the setup of the transformation was saved.
+
+        :return: The statistics, as created by `TransformationDryRun.get_statistics()`, or `None` if the
+            transformer applies no regular expression replacements.
+        """
+        return self.statistics.get("dry_run")
+
+    def update_matching_fragments(self) -> None:
+        """
+        Store the fragments that match the search pattern, the statistics of the dry run, and mark the fragments
+        changed by the dry run.
+
+        This method is called when the setup of the transformation is saved. The preview and the transformation
+        task select the stored fragments with a subquery, so neither the search nor the dry run is repeated,
+        and the selection works for any number of matching fragments.
+        """
+        from backend.models.transformation_assistant_fragment import TransformationAssistantFragment
+
+        with transaction.atomic():
+            self.matching_fragments.all().delete()
+            if self.search_pattern:
+                search = FragmentSearch(self.revision, self.search_pattern)
+                self._store_matching_fragments(search.get_matching_ids(self._get_filtered_fragments()), False)
+            dry_run = self._run_dry_run()  # The dry run depends on the stored search matches.
+            self.statistics = {"dry_run": dry_run.get_statistics()} if dry_run is not None else {}
+            self.save(update_fields=["statistics"])
+            if not self.only_matching or dry_run is None:
+                return
+            changed_ids = dry_run.changed_fragment_ids
+            if not self.search_pattern:
+                self._store_matching_fragments(changed_ids, True)
+                return
+            for index in range(0, len(changed_ids), MATCHING_FRAGMENT_BATCH_SIZE):
+                batch = changed_ids[index : index + MATCHING_FRAGMENT_BATCH_SIZE]
+                TransformationAssistantFragment.objects.filter(
+                    transformation_assistant=self, fragment_id__in=batch
+                ).update(is_changed=True)
+
+    def _store_matching_fragments(self, fragment_ids: list[int], is_changed: bool) -> None:
+        """
+        Store matching fragments in batches.
+        """
+        from backend.models.transformation_assistant_fragment import TransformationAssistantFragment
+
+        TransformationAssistantFragment.objects.bulk_create(
+            (
+                TransformationAssistantFragment(
+                    transformation_assistant=self, fragment_id=fragment_id, is_changed=is_changed
+                )
+                for fragment_id in fragment_ids
+            ),
+            batch_size=MATCHING_FRAGMENT_BATCH_SIZE,
+        )
+
+    def get_selected_fragments(self) -> QuerySet[Fragment]:
+        """
+        Get all selected fragments for this assistant, that match the criteria.
+
+        The fragments that match the search pattern, or are changed by the dry run, are read from the matches
+        stored with `update_matching_fragments()`.
+        """
+        fragments = self._get_searched_fragments()
+        if self.only_matching and self.get_replacements() is not None:
+            changed_fragments = self.matching_fragments.filter(is_changed=True)
+            fragments = fragments.filter(pk__in=changed_fragments.values("fragment_id"))
+        return fragments
+
     def get_documents_from_fragments(self, fragments: QuerySet[Fragment]) -> list[dict]:
         """
         Given a queryset of fragments, get all the documents.
 
         :param fragments: A queryset of fragments.
-        :return: A query set of document counts and document objects.
+        :return: A list with the number of fragments and the document object for each document.
         """
         fragment_counts = (
             fragments.values("document")
             .annotate(fragment_count=Count("document"), path=F("document__path"))
             .order_by("path")
         )
-        document_ids = [fragment_count["document"] for fragment_count in fragment_counts]
+        documents_dict = {
+            document.id: document for document in Document.objects.filter(id__in=fragments.values("document"))
+        }
         documents_with_counts = []
-        if document_ids:
-            documents = Document.objects.filter(id__in=document_ids)
-            documents_dict = {document.id: document for document in documents}
-            for fragment_count in fragment_counts:
-                document_id = fragment_count["document"]
-                count = fragment_count["fragment_count"]
-                document = documents_dict.get(document_id)
-                if document:
-                    documents_with_counts.append({"count": count, "document": document})
+        for fragment_count in fragment_counts:
+            document = documents_dict.get(fragment_count["document"])
+            if document:
+                documents_with_counts.append({"count": fragment_count["fragment_count"], "document": document})
         return documents_with_counts
 
     def get_transformer(self) -> "TransformerBase":
@@ -0,0 +1,34 @@
+#  Copyright © 2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
+#  According to the copyright terms specified in the file "COPYRIGHT.md".
+#  SPDX-License-Identifier: GPL-3.0-or-later
+
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from backend.models.transformation_assistant import TransformationAssistant
+
+
+class TransformationAssistantFragment(models.Model):
+    """
+    A fragment that matched the search pattern, or was changed by the dry run, when the transformation was set up.
+
+    Storing the matches allows selecting them with a subquery, instead of sending their ids with every query.
+    """
+
+    transformation_assistant = models.ForeignKey(
+        TransformationAssistant, on_delete=models.CASCADE, related_name="matching_fragments"
+    )
+    """The transformation assistant."""
+
+    fragment = models.ForeignKey("Fragment", on_delete=models.CASCADE, related_name="+")
+    """The matching fragment."""
+
+    is_changed = models.BooleanField(default=False)
+    """If the text of the fragment is changed by the dry run of the transformation."""
+
+    class Meta:
+        verbose_name = _("Transformation Assistant Fragment")
+        verbose_name_plural = _("Transformation Assistant Fragments")
+        indexes = [
+            models.Index(fields=["transformation_assistant", "fragment"], name="tr_assist_frag_main_idx"),
+        ]
@@ -3,7 +3,7 @@
 #  SPDX-License-Identifier: GPL-3.0-or-later
 
 from pathlib import Path
-from typing import Tuple
+from typing import Optional, Tuple
 
 _base_dir = Path(__file__).resolve().parent.parent
 
@@ -65,6 +65,37 @@ BACKEND_SIZE_CALCULATION_MAX_BLOCK_SIZE = 200_000
 """The maximum size of a block of data held in memory to do a size calculation. Individual size calculation
 modules can lower this value further but can not increase the limit."""
 
+BACKEND_REVIEW_UPDATE_TASK_THRESHOLD = 5_000
+"""The number of fragments up to which a bulk review state change is done in the request. Larger selections
+are updated by a background task."""
+
+BACKEND_REVIEW_UPDATE_DOCUMENT_BATCH_SIZE = 50
+"""The number of documents that are updated in one transaction by the background review state task."""
+
+BACKEND_FRAGMENT_SUMMARY_LENGTH = 4_000
+"""The number of characters of the final text that are loaded for each fragment in lists. Longer texts are
+truncated and only displayed completely on the fragment page."""
+
+BACKEND_EGRESS_STREAMING_SIZE_LIMIT = 20_000_000
+"""The total size of the selected documents in bytes, up to which an export is generated on the fly while it is
+downloaded. Larger exports are prepared as ZIP file by a background task. Set to zero to always use the task."""
+
+BACKEND_EGRESS_COMPRESSION = "deflated"
+"""The compression method for exported ZIP files. One of "stored", "deflated", "bzip2" or "lzma"."""
+
+BACKEND_EGRESS_COMPRESSION_LEVEL: Optional[int] = None
+"""The compression level for exported ZIP files, or `None` for the default level of the compression method."""
+
+BACKEND_EGRESS_COMPRESSION_WORKERS = 4
+"""The number of threads that compress documents in parallel, when an export is prepared by a background task."""
+
+BACKEND_DIFF_CACHE_TIMEOUT = 7 * 24 * 60 * 60
+"""The time in seconds until a cached diff of the review page expires."""
+
+BACKEND_SEARCH_INDEX_STALE_LIMIT = 0.1
+"""The fraction of the fragments of a revision, that can be modified after the search index was built. If more
+fragments were modified, the next search requests a rebuild by the periodic background task."""
+
 # --- Options for development ----------------------------------------------------------------------------------------
 
 BACKEND_TEST_ADMIN_NAME: str = "admin"
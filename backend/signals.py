@@ -7,8 +7,10 @@ import shutil
 from pathlib import Path
 
 from django.contrib.auth.models import User
-from django.db.models.signals import post_delete, post_save
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete
 
+from backend.models.content import Content
 from backend.models.content_user import ContentUser
 from backend.models.egress_assistant import EgressAssistant
 from backend.models.fragment import Fragment
@@ -48,12 +50,68 @@ def _create_profile_for_new_users(sender, instance: User, **kwargs):
     UserSettings.objects.create(user=instance)
 
 
-def _release_content_after_fragment_delete(sender, instance: ContentUser, **kwargs):
+def _is_deleted_from(origin, model) -> bool:
     """
-    Make sure that content objects are properly released and deleted after a fragment gets deleted.
+    Test if a delete operation was started for an instance or a queryset of the given model.
     """
-    if instance.content is not None:
-        instance.content.release()
+    if isinstance(origin, QuerySet):
+        return origin.model is model
+    return isinstance(origin, model)
+
+
+def _release_content_after_fragment_delete(sender, instance: ContentUser, origin=None, **kwargs):
+    """
+    Release the content after a fragment, edit or transformation was deleted.
+
+    If the object is deleted with its document or revision, the content was already released in one batch
+    before the delete.
+    """
+    if not any(_is_deleted_from(origin, model) for model in [Fragment, FragmentEdit, FragmentTransformation]):
+        return
+    Content.objects.release_ids([instance.content_id])
+
+
+def _release_content_before_document_delete(sender, instance: Document, origin=None, **kwargs):
+    """
+    Release the content of all fragments of a document, before it is deleted.
+    """
+    if not _is_deleted_from(origin, Document):
+        return
+    Content.objects.release_for_fragments(Fragment.objects.filter(document=instance))
+
+
+def _release_content_before_revision_delete(sender, instance: Revision, **kwargs):
+    """
+    Release the content of all fragments of a revision, before it is deleted with its project or directly.
+    """
+    Content.objects.release_for_fragments(Fragment.objects.filter(document__revision=instance))
+
+
+def _update_counters_after_fragment_delete(sender, instance: Fragment, origin=None, **kwargs):
+    """
+    Update the state counters of the document and revision after a fragment was deleted.
+
+    Fragments that are deleted with their document, revision or project are ignored. In this case the
+    counters of the revision are recalculated after the document delete, or are deleted with the revision.
+    """
+    if not _is_deleted_from(origin, Fragment):
+        return
+    counted_states = getattr(instance, "_counted_states", None)
+    if counted_states is None:
+        counted_states = (instance.review_state, instance.transformation_state)
+    instance._update_state_counters(counted_states, None)
+
+
+def _update_counters_after_document_delete(sender, instance: Document, origin=None, **kwargs):
+    """
+    Update the state counters of the revision after a document was deleted.
+    """
+    if not _is_deleted_from(origin, Document):
+        return
+    try:
+        instance.revision.update_state_counters_from_documents()
+    except Revision.DoesNotExist:
+        pass
 
 
 def _delete_working_dir_on_egress_delete(sender, instance: EgressAssistant, **kwargs):
@@ -61,10 +119,11 @@ def _delete_working_dir_on_egress_delete(sender, instance: EgressAssistant, **kw
     When the egress assistant is deleted (user clicks on done), make sure the working directory
     is deleted with the database object.
 
+    Streamed exports, and exports that were never started, have no working directory to delete.
+
     :note: Make sure the specified path is a valid working directory.
     """
     if not instance.working_directory:
-        logger.warning(f"The egress assistant ({instance.pk}) had an empty working directory when deleted. Ignored.")
         return
     path = Path(instance.working_directory)
     if not path.name.startswith("egress_"):
@@ -108,5 +167,9 @@ def register_signals():
     post_delete.connect(_release_content_after_fragment_delete, sender=Fragment)
     post_delete.connect(_release_content_after_fragment_delete, sender=FragmentEdit)
     post_delete.connect(_release_content_after_fragment_delete, sender=FragmentTransformation)
+    pre_delete.connect(_release_content_before_document_delete, sender=Document)
+    pre_delete.connect(_release_content_before_revision_delete, sender=Revision)
+    post_delete.connect(_update_counters_after_fragment_delete, sender=Fragment)
+    post_delete.connect(_update_counters_after_document_delete, sender=Document)
     post_delete.connect(_delete_working_dir_on_egress_delete, sender=EgressAssistant)
     post_save.connect(_create_profile_for_new_users, sender=User)
@@ -0,0 +1,33 @@
+#  Copyright © 2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
+#  According to the copyright terms specified in the file "COPYRIGHT.md".
+#  SPDX-License-Identifier: GPL-3.0-or-later
+
+from celery.utils.log import get_task_logger
+
+from tasks.celery_app import app
+
+logger = get_task_logger(__name__)
+
+
+@app.task(ignore_result=True)
+def delete_unused_content():
+    """
+    Periodic task, started by `celery beat`, that deletes content blocks that are no longer used.
+    """
+    from backend.models import Content
+
+    deleted_count = Content.objects.delete_unused()
+    if deleted_count:
+        logger.info(f"Deleted {deleted_count} unused content block(s).")
+
+
+@app.task(ignore_result=True)
+def build_search_indexes():
+    """
+    Periodic task, started by `celery beat`, that builds the search indexes requested by searches.
+    """
+    from backend.tools.fragment_search import build_requested_search_indexes
+
+    built_count = build_requested_search_indexes()
+    if built_count:
+        logger.info(f"Built {built_count} search index(es).")
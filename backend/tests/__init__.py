@@ -5,3 +5,13 @@
 from backend.tests.size_calculator import SizeCalculatorTestCase
 from backend.tests.splitter import SplitterTestCase
 from backend.tests.syntax_handler import SyntaxHandlerTestCase
+from backend.tests.document_tree import DocumentTreeTestCase
+from backend.tests.state_counters import StateCountersTestCase
+from backend.tests.fragment_transformation import FragmentTransformationTestCase
+from backend.tests.document_export import DocumentExportTestCase
+from backend.tests.diff import DiffTestCase
+from backend.tests.fragment_search import FragmentSearchTestCase
+from backend.tests.replacement_plan import ReplacementPlanTestCase
+from backend.tests.openai_bridge import OpenAIBridgeTestCase
+from backend.tests.transformation_selection import TransformationSelectionTestCase
+from backend.tests.keyset_paginator import KeysetPaginatorTestCase
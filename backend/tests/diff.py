@@ -0,0 +1,135 @@
+#  Copyright © 2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
+#  According to the copyright terms specified in the file "COPYRIGHT.md".
+#  SPDX-License-Identifier: GPL-3.0-or-later
+
+import difflib
+import random
+import re
+from pathlib import Path
+from unittest import mock
+
+from django.template import Context, Template
+from django.test import SimpleTestCase, override_settings
+
+from design.views import diff
+from design.views.diff import DiffResult, SplitDiff, UnifiedDiff, split_diff, unified_diff
+
+RE_HUNK = re.compile(r"^@@\s+-(\d+)(?:,\d+)?\s+\+\d+(?:,\d+)?\s+@@.*$")
+
+
+def _reference_diff(result: DiffResult, src_text: str, dst_text: str, src_line: int, dst_line: int) -> None:
+    """
+    The original implementation, that parses the output of `difflib.unified_diff`.
+    """
+    src_lines = src_text.splitlines()
+    dst_lines = dst_text.splitlines()
+    src_index = 0
+    dst_index = 0
+    if src_text != dst_text:
+        for diff_line in list(difflib.unified_diff(src_lines, dst_lines, lineterm=""))[2:]:
+            if match := RE_HUNK.match(diff_line):
+                hunk_src_start = int(match.group(1)) - 1
+                if hunk_src_start > src_index:
+                    result.start_hunk(hidden=True)
+                    while hunk_src_start > src_index:
+                        result.add_match(src_lines[src_index], src_index + src_line, dst_index + dst_line)
+                        src_index += 1
+                        dst_index += 1
+                result.start_hunk()
+            elif len(diff_line) == 0 or diff_line[0] == " ":
+                result.add_match(src_lines[src_index], src_index + src_line, dst_index + dst_line)
+                src_index += 1
+                dst_index += 1
+            elif diff_line[0] == "-":
+                result.add_delete(src_lines[src_index], src_index + src_line)
+                src_index += 1
+            else:
+                result.add_add(dst_lines[dst_index], dst_index + dst_line)
+                dst_index += 1
+    if src_index < len(src_lines):
+        result.start_hunk(hidden=True)
+        while src_index < len(src_lines):
+            result.add_match(src_lines[src_index], src_index + src_line, dst_index + dst_line)
+            src_index += 1
+            dst_index += 1
+
+
+class DiffTestCase(SimpleTestCase):
+    def _modified_text(self, text: str, seed: int) -> str:
+        generator = random.Random(seed)
+        lines = text.splitlines(keepends=True)
+        for _ in range(len(lines) // 20):
+            index = generator.randrange(len(lines))
+            operation = generator.choice(["change", "delete", "insert"])
+            if operation == "change":
+                lines[index] = lines[index].replace("e", "E", 1)
+            elif operation == "delete":
+                del lines[index]
+            else:
+                lines.insert(index, "An inserted line.\n")
+        return "".join(lines)
+
+    def _assert_same_diff(self, src_text: str, dst_text: str, src_line: int, dst_line: int):
+        for result_class, diff_function in [(UnifiedDiff, unified_diff), (SplitDiff, split_diff)]:
+            expected = result_class()
+            _reference_diff(expected, src_text, dst_text, src_line, dst_line)
+            actual = diff_function(src_text, dst_text, src_line=src_line, dst_line=dst_line)
+            self.assertEqual(actual.hunks, expected.hunks)
+            self.assertEqual(
+                (actual.match_count, actual.delete_count, actual.add_count, actual.total_changes),
+                (expected.match_count, expected.delete_count, expected.add_count, expected.total_changes),
+            )
+
+    def test_same_result_as_unified_diff(self):
+        text = (Path(__file__).parent / "data" / "flatland-by-edwin-abbott.txt").read_text(encoding="utf-8")
+        text = "\n".join(text.splitlines()[:1500])
+        for seed in range(3):
+            self._assert_same_diff(text, self._modified_text(text, seed), 1, 1)
+        self._assert_same_diff(text, self._modified_text(text, 10), 120, 130)
+        for src_text, dst_text in [
+            ("", "One\nTwo\n"),
+            ("One\nTwo\n", ""),
+            ("One\nTwo\n", "One\nTwo"),
+            ("One\nTwo\n", "Three\nFour\n"),
+            ("A\nB\nC\nD\nE\nF\nG\nH\nI\n", "A\nB\nC\nD\nE\nF\nG\nH\nX\n"),
+            ("A\nB\nC\nD\nE\nF\nG\nH\nI\n", "X\nB\nC\nD\nE\nF\nG\nH\nI\n"),
+        ]:
+            self._assert_same_diff(src_text, dst_text, 1, 1)
+
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+    def test_cached_diff(self):
+        src_text = "A\nB\nC\nD\nE\nF\nG\nH\nI\n"
+        dst_text = "A\nB\nC\nD\nX\nF\nG\nH\nI\n"
+        expected = unified_diff(src_text, dst_text, src_line=10)
+        with mock.patch("design.views.diff.diff_opcode_groups", wraps=diff.diff_opcode_groups) as compare:
+            for _ in range(2):
+                self.assertEqual(unified_diff(src_text, dst_text, src_line=10, cache_key="1:2").hunks, expected.hunks)
+            self.assertEqual(
+                split_diff(src_text, dst_text, cache_key="1:2").hunks, split_diff(src_text, dst_text).hunks
+            )
+            self.assertEqual(compare.call_count, 2)
+            # A changed text with the same key is compared again.
+            changed_text = dst_text.replace("X", "Y")
+            self.assertEqual(
+                unified_diff(src_text, changed_text, cache_key="1:2").hunks, unified_diff(src_text, changed_text).hunks
+            )
+            self.assertEqual(compare.call_count, 4)
+
+    def test_intra_line_changes(self):
+        src_text = "First line.\n    The colour of the house, is red.\nLast line.\n"
+        dst_text = "First line.\n    The color of the house is red.\nLast line.\n"
+        diff = unified_diff(src_text, dst_text)
+        deleted_line, added_line = [line for line in diff.hunks[0].lines if line.segments]
+        self.assertEqual(
+            [(segment.text, segment.is_changed) for segment in deleted_line.segments],
+            [("    The colo", False), ("u", True), ("r of the house", False), (",", True), (" is red.", False)],
+        )
+        self.assertEqual("".join(segment.text for segment in added_line.segments), added_line.text)
+        html = Template("{% load code %}{% code_diff_split diff %}").render(
+            Context({"diff": split_diff(src_text, dst_text)})
+        )
+        self.assertIn('<span class="intra-line-change">u</span>', html)
+        self.assertIn("    The colo", html)
+        # Changes in very different lines are not highlighted.
+        diff = unified_diff("One two three four\n", "Completely different text\n")
+        self.assertTrue(all(line.segments is None for line in diff.hunks[0].lines))
@@ -0,0 +1,152 @@
+#  Copyright © 2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
+#  According to the copyright terms specified in the file "COPYRIGHT.md".
+#  SPDX-License-Identifier: GPL-3.0-or-later
+
+import io
+import json
+import sys
+import zipfile
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from backend.models import Document, Fragment
+from backend.tests.helpers import create_document, create_project, create_transformation
+from backend.tools import document_export
+from backend.tools.document_export import DocumentExport, MANIFEST_PATH
+from backend.tools.export_fingerprints import ExportFingerprints
+from backend.transformer.result import ProcessorResult
+
+
+class DocumentExportTestCase(TestCase):
+    DOCUMENT_COUNT = 10
+    FRAGMENT_COUNT = 10
+
+    def setUp(self):
+        self.project = create_project("Export Test")
+        self.revision = self.project.get_latest_revision()
+        transformation = create_transformation(self.revision)
+        self.expected: dict[str, bytes] = {}
+        for document_index in range(self.DOCUMENT_COUNT):
+            path = f"folder/document{document_index:02d}.txt"
+            document = create_document(
+                self.revision,
+                path,
+                [f"Fragment {document_index}/{position}\n" for position in range(self.FRAGMENT_COUNT)],
+            )
+            texts = []
+            for fragment in document.fragments.order_by("position"):
+                text = fragment.text
+                position = fragment.position
+                if position % 3 == 1:
+                    text = f"Edited {position}\n"
+                    fragment.set_edit_text(text)
+                elif position % 3 == 2:
+                    text = "" if position == 2 else f"Transformed {position}\n"
+                    fragment.set_transformation(transformation, ProcessorResult(content=text), False)
+                texts.append(text)
+            self.expected[path] = "".join(texts).encode("utf-8")
+        # A document without fragments is exported as an empty file.
+        create_document(self.revision, "empty.txt", [])
+        self.expected["empty.txt"] = b""
+
+    def test_export_final_texts(self):
+        documents = list(Document.objects.filter(revision=self.revision).order_by("path"))
+        buffer = io.BytesIO()
+        with CaptureQueriesContext(connection) as context:
+            DocumentExport(documents).write_zip(buffer)
+        # All final texts are fetched with a single query.
+        self.assertEqual(len(context.captured_queries), 1)
+        with zipfile.ZipFile(buffer) as zip_handle:
+            self.assertEqual(zip_handle.namelist(), [document.path for document in documents])
+            for path, data in self.expected.items():
+                self.assertEqual(zip_handle.read(path), data, path)
+        for document in documents:
+            expected_text = "".join(fragment.final_text for fragment in document.fragments.order_by("position"))
+            self.assertEqual(self.expected[document.path], expected_text.encode("utf-8"))
+
+    def test_streamed_export(self):
+        documents = list(Document.objects.filter(revision=self.revision).order_by("path"))
+        data = b"".join(DocumentExport(documents).iter_zip())
+        with zipfile.ZipFile(io.BytesIO(data)) as zip_handle:
+            self.assertEqual(zip_handle.namelist(), [document.path for document in documents])
+            for path, expected_data in self.expected.items():
+                self.assertEqual(zip_handle.read(path), expected_data, path)
+
+    def test_parallel_compression(self):
+        documents = list(Document.objects.filter(revision=self.revision).order_by("path"))
+        for compression in ["deflated", "bzip2", "lzma"]:
+            export = DocumentExport(documents, compression=compression, worker_count=3)
+            for data in [self._write_to_bytes(export), b"".join(export.iter_zip())]:
+                with zipfile.ZipFile(io.BytesIO(data)) as zip_handle:
+                    self.assertIsNone(zip_handle.testzip())
+                    self.assertEqual(zip_handle.namelist(), [document.path for document in documents])
+                    for path, expected_data in self.expected.items():
+                        self.assertEqual(zip_handle.read(path), expected_data, path)
+                        self.assertEqual(zip_handle.getinfo(path).compress_type, export.compress_type)
+
+    def test_precompressed_member_support(self):
+        with zipfile.ZipFile(io.BytesIO(), mode="w") as zip_handle:
+            is_supported = document_export._can_write_precompressed_members(zip_handle)
+        first_version, last_version = document_export.PRECOMPRESSED_MEMBER_PYTHON_VERSIONS
+        # Fails if a patch release of a verified version changes the used `zipfile` internals.
+        self.assertEqual(is_supported, first_version <= sys.version_info[:2] <= last_version)
+
+    def test_compression_without_precompressed_members(self):
+        documents = list(Document.objects.filter(revision=self.revision).order_by("path"))
+        export = DocumentExport(documents, compression="deflated", worker_count=3)
+        # Simulate a Python version, whose `zipfile` internals were not verified.
+        with mock.patch.object(document_export, "PRECOMPRESSED_MEMBER_PYTHON_VERSIONS", ((3, 0), (3, 0))):
+            with mock.patch.object(DocumentExport, "_compress_document") as compress_document:
+                data = self._write_to_bytes(export)
+        compress_document.assert_not_called()
+        with zipfile.ZipFile(io.BytesIO(data)) as zip_handle:
+            self.assertIsNone(zip_handle.testzip())
+            for path, expected_data in self.expected.items():
+                self.assertEqual(zip_handle.read(path), expected_data, path)
+                self.assertEqual(zip_handle.getinfo(path).compress_type, zipfile.ZIP_DEFLATED)
+
+    def test_changed_documents(self):
+        documents = list(Document.objects.filter(revision=self.revision).order_by("path"))
+        fingerprints = ExportFingerprints(self.revision, documents)
+        self.assertEqual(fingerprints.get_changed_documents(), documents)
+        fingerprints.save()
+        self.assertEqual(ExportFingerprints(self.revision, documents).get_changed_documents(), [])
+        # A transformation that is done again changes the text of its content block in place.
+        fragment = Fragment.objects.get(document=documents[3], position=5)
+        content_id = fragment.transformation.content_id
+        fragment.set_transformation(fragment.transformation.transformation, ProcessorResult(content="New\n"), False)
+        self.assertEqual(Fragment.objects.get(pk=fragment.pk).transformation.content_id, content_id)
+        fingerprints = ExportFingerprints(self.revision, documents)
+        changed_documents = fingerprints.get_changed_documents()
+        self.assertEqual(changed_documents, [documents[3]])
+        buffer = io.BytesIO()
+        DocumentExport(changed_documents, manifest=fingerprints.create_manifest(changed_documents)).write_zip(buffer)
+        with zipfile.ZipFile(buffer) as zip_handle:
+            self.assertEqual(zip_handle.namelist(), [documents[3].path, MANIFEST_PATH])
+            manifest = json.loads(zip_handle.read(MANIFEST_PATH))
+        self.assertEqual(manifest["changed"], [documents[3].path])
+        self.assertEqual(len(manifest["unchanged"]), len(documents) - 1)
+        self.assertEqual(manifest["removed"], [])
+
+    def test_removed_documents(self):
+        documents = list(Document.objects.filter(revision=self.revision).order_by("path"))
+        ExportFingerprints(self.revision, documents).save()
+        removed_document = documents.pop(2)
+        removed_document.delete()
+        for expected_removed in [[removed_document.path], []]:
+            fingerprints = ExportFingerprints(self.revision, documents)
+            changed_documents = fingerprints.get_changed_documents()
+            self.assertEqual(changed_documents, [])
+            manifest = fingerprints.create_manifest(changed_documents)
+            # A removed document is only reported by the first export after it was removed.
+            self.assertEqual(manifest["removed"], expected_removed)
+            fingerprints.save()
+
+    @staticmethod
+    def _write_to_bytes(export: DocumentExport) -> bytes:
+        buffer = io.BytesIO()
+        export.write_zip(buffer)
+        return buffer.getvalue()
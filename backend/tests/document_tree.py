@@ -0,0 +1,71 @@
+#  Copyright © 2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
+#  According to the copyright terms specified in the file "COPYRIGHT.md".
+#  SPDX-License-Identifier: GPL-3.0-or-later
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from backend.enums import ReviewState, TransformerStatus
+from backend.models import Document
+from backend.tests.helpers import create_document, create_project, create_transformation
+from backend.tools.document_tree import DocumentTree, DocumentTreeNodeType
+from backend.tools.fraction_bar import FractionBarCounts
+from backend.transformer.result import ProcessorResult
+
+
+class DocumentTreeTestCase(TestCase):
+    def setUp(self):
+        self.project = create_project("Tree Test")
+        self.revision = self.project.get_latest_revision()
+        self.transformation = create_transformation(self.revision)
+
+    def _create_document(self, path: str, fragment_count: int) -> Document:
+        document = create_document(
+            self.revision, path, [f"Fragment {position} of {path}\n" for position in range(fragment_count)]
+        )
+        for fragment in document.fragments.order_by("position"):
+            text = fragment.text
+            match fragment.position % 4:
+                case 1:
+                    result = ProcessorResult(content=text.upper())
+                    fragment.set_transformation(self.transformation, result, False)
+                case 2:
+                    result = ProcessorResult(content="", status=TransformerStatus.FAILURE)
+                    fragment.set_transformation(self.transformation, result, False)
+                    fragment.review_state = ReviewState.REJECTED
+                    fragment.save()
+                case 3:
+                    fragment.set_edit_text(text + "Edited\n")
+        return document
+
+    @staticmethod
+    def _counts(counts: FractionBarCounts) -> dict[str, int]:
+        return {entry.name: entry.count for entry in counts.as_list}
+
+    def test_document_details(self):
+        self._create_document("a.txt", 5)
+        self._create_document("folder/b.txt", 7)
+        self._create_document("folder/sub/c.txt", 3)
+        tree = DocumentTree(self.revision, with_document_details=True)
+        for node in tree.node_list:
+            if node.type != DocumentTreeNodeType.DOCUMENT:
+                continue
+            document = Document.objects.get(pk=node.document_id)
+            self.assertEqual(node.fragment_count, document.fragment_count)
+            self.assertEqual(self._counts(node.review_states), self._counts(document.review_states()))
+            self.assertEqual(self._counts(node.transformation_states), self._counts(document.transformation_states()))
+        self.assertEqual(tree.root_node.fragment_count, 15)
+        self.revision.refresh_from_db()
+        self.assertEqual(self._counts(tree.review_states), self._counts(self.revision.review_states()))
+        self.assertEqual(self._counts(tree.transformation_states), self._counts(self.revision.transformation_states()))
+
+    def test_constant_query_count(self):
+        self._create_document("a.txt", 2)
+        with CaptureQueriesContext(connection) as small_tree_queries:
+            DocumentTree(self.revision, with_document_details=True)
+        for index in range(10):
+            self._create_document(f"folder_{index % 3}/document_{index}.txt", 3)
+        with CaptureQueriesContext(connection) as large_tree_queries:
+            DocumentTree(self.revision, with_document_details=True)
+        self.assertEqual(len(small_tree_queries.captured_queries), len(large_tree_queries.captured_queries))
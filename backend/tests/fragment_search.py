@@ -0,0 +1,144 @@
+#  Copyright © 2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
+#  According to the copyright terms specified in the file "COPYRIGHT.md".
+#  SPDX-License-Identifier: GPL-3.0-or-later
+
+import re
+from pathlib import Path
+
+from django.test import TestCase
+from django.utils import timezone
+
+from backend.models import Fragment, SearchIndex
+from backend.tests.helpers import create_document, create_project, create_transformation
+from backend.tools.fragment_search import (
+    FragmentSearch,
+    build_requested_search_indexes,
+    build_search_index,
+    pattern_trigrams,
+    text_trigrams,
+)
+from backend.tools.transformation_dry_run import TransformationDryRun
+from backend.transformer.data.regex_definition import RegExReplacement
+from backend.transformer.result import ProcessorResult
+
+
+class FragmentSearchTestCase(TestCase):
+    PARAGRAPH_COUNT = 200
+
+    def setUp(self):
+        self.project = create_project("Search Test")
+        self.revision = self.project.get_latest_revision()
+        text = (Path(__file__).parent / "data" / "flatland-by-edwin-abbott.txt").read_text(encoding="utf-8")
+        paragraphs = [paragraph + "\n\n" for paragraph in text.split("\n\n") if paragraph.strip()]
+        document = create_document(self.revision, "flatland.txt", paragraphs[: self.PARAGRAPH_COUNT])
+        self.texts: dict[int, str] = {fragment.pk: fragment.text for fragment in document.fragments.all()}
+
+    def _expected_ids(self, pattern: str) -> list[int]:
+        return [fragment_id for fragment_id, text in sorted(self.texts.items()) if re.search(pattern, text)]
+
+    def test_pattern_trigrams(self):
+        self.assertEqual(pattern_trigrams(re.compile("abcd")), text_trigrams("abcd"))
+        self.assertEqual(pattern_trigrams(re.compile("Abc(d+)e?(fgh)")), text_trigrams("abc") | text_trigrams("fgh"))
+        self.assertEqual(pattern_trigrams(re.compile("one|two")), set())
+        self.assertEqual(pattern_trigrams(re.compile("[ab]cd.")), set())
+        # Letters that match non-ASCII characters if the case is ignored split the literal text.
+        self.assertEqual(pattern_trigrams(re.compile("(?i)abc_kelvin")), text_trigrams("abc_") | text_trigrams("elv"))
+        self.assertEqual(pattern_trigrams(re.compile("(?ai)kelvin")), text_trigrams("kelvin"))
+
+    def test_search_with_index(self):
+        patterns = [r"Square", r"(?i)SQUARE", r"\bLine\w*", r"Sphere|Circle", r"the [Kk]ing", r"Lord\s+High"]
+        # The first search requests the index, and searches without it.
+        self.assertEqual(FragmentSearch(self.revision, patterns[0]).get_matching_ids(), self._expected_ids(patterns[0]))
+        index = SearchIndex.objects.get(revision=self.revision)
+        self.assertTrue(index.rebuild_requested)
+        self.assertIsNone(index.indexed_until)
+        self.assertIsNone(FragmentSearch(self.revision, "Pentagon").get_candidate_ids())
+        self.assertEqual(build_requested_search_indexes(), 1)
+        self.assertEqual(build_requested_search_indexes(), 0)
+        for pattern in patterns:
+            search = FragmentSearch(self.revision, pattern)
+            self.assertEqual(search.get_matching_ids(), self._expected_ids(pattern), pattern)
+            self.assertEqual([match.fragment_id for match in search.iter_matches()], self._expected_ids(pattern))
+        # Only a small part of the fragments has to be matched for a rare word.
+        candidate_ids = FragmentSearch(self.revision, "Pentagon").get_candidate_ids()
+        self.assertLess(len(candidate_ids), self.PARAGRAPH_COUNT // 10)
+        matches = list(FragmentSearch(self.revision, "Square").iter_matches())
+        for start, end in matches[0].highlights:
+            self.assertEqual(self.texts[matches[0].fragment_id][start:end], "Square")
+
+    def test_modified_fragments(self):
+        index_pk = build_search_index(self.revision).pk
+        self.assertEqual(FragmentSearch(self.revision, "Xylophone").get_matching_ids(), [])
+        fragment = Fragment.objects.filter(document__revision=self.revision).order_by("pk")[10]
+        fragment.set_edit_text("A Xylophone in Flatland.\n")
+        # The modified fragment is found, without rebuilding the index.
+        self.assertEqual(FragmentSearch(self.revision, "Xylophone").get_matching_ids(), [fragment.pk])
+        self.assertEqual(SearchIndex.objects.get(revision=self.revision).pk, index_pk)
+
+    def test_stale_index(self):
+        index_pk = build_search_index(self.revision).pk
+        fragments = Fragment.objects.filter(document__revision=self.revision).order_by("pk")
+        fragment = fragments[10]
+        fragment.set_edit_text("A Xylophone in Flatland.\n")
+        Fragment.objects.filter(pk__in=fragments.values_list("pk", flat=True)[20:60]).update(modified=timezone.now())
+        # The search does not rebuild the index, but requests a rebuild, and uses the outdated index until then.
+        self.assertEqual(FragmentSearch(self.revision, "Xylophone").get_matching_ids(), [fragment.pk])
+        index = SearchIndex.objects.get(revision=self.revision)
+        self.assertEqual(index.pk, index_pk)
+        self.assertTrue(index.rebuild_requested)
+        self.assertEqual(FragmentSearch(self.revision, r"Square").get_matching_ids(), self._expected_ids(r"Square"))
+        self.assertEqual(build_requested_search_indexes(), 1)
+        index = SearchIndex.objects.get(revision=self.revision)
+        self.assertFalse(index.rebuild_requested)
+        self.assertEqual(FragmentSearch(self.revision, "Xylophone").get_candidate_ids(), {fragment.pk})
+
+    def test_dry_run(self):
+        replacements = [
+            RegExReplacement(r"\bSquare\b", "Cube"),
+            RegExReplacement(r"Cube", "Box"),
+            RegExReplacement(r"(?i)pentagon", "Pentagon"),
+            RegExReplacement(r"Zebra", "Horse"),
+        ]
+        build_search_index(self.revision)
+        dry_run = TransformationDryRun(self.revision, replacements)
+        dry_run.run(Fragment.objects.filter(document__revision=self.revision))
+        expected_counts = [0] * len(replacements)
+        expected_changed_ids = []
+        for fragment_id, text in sorted(self.texts.items()):
+            new_text = text
+            for index, replacement in enumerate(replacements):
+                new_text, count = re.subn(replacement.pattern, replacement.replacement, new_text)
+                expected_counts[index] += count
+            if new_text != text:
+                expected_changed_ids.append(fragment_id)
+        self.assertEqual([statistic.replacement_count for statistic in dry_run.replacement_statistics], expected_counts)
+        self.assertEqual(dry_run.changed_fragment_ids, expected_changed_ids)
+        self.assertLess(dry_run.scanned_fragment_count, self.PARAGRAPH_COUNT)
+        self.assertEqual(dry_run.document_statistics[0].replacement_count, sum(expected_counts))
+        self.assertEqual(dry_run.document_statistics[0].changed_fragment_count, len(expected_changed_ids))
+
+    def test_dry_run_source_texts(self):
+        fragments = Fragment.objects.filter(document__revision=self.revision)
+        replacements = [RegExReplacement(r"Xylophone", "Marimba")]
+        build_search_index(self.revision)
+        edited_fragment, transformed_fragment = fragments.order_by("pk")[10:12]
+        edited_fragment.set_text("The Xylophone is red.\n")
+        edited_fragment.save()
+        edited_fragment.set_edit_text("The Marimba is red.\n")
+        transformed_fragment.set_text("The Marimba is blue.\n")
+        transformed_fragment.save()
+        transformation = create_transformation(self.revision)
+        transformed_fragment.set_transformation(
+            transformation, ProcessorResult(content="The Xylophone is blue.\n"), False
+        )
+        # The transformation processes the source texts, so the dry run ignores the edits and transformations,
+        # with the modified fragments searched in addition to the index, and after the index was rebuilt.
+        for _ in range(2):
+            dry_run = TransformationDryRun(self.revision, replacements)
+            dry_run.run(fragments)
+            self.assertEqual(dry_run.changed_fragment_ids, [edited_fragment.pk])
+            self.assertEqual(dry_run.replacement_count, 1)
+            self.assertEqual(dry_run.document_statistics[0].changed_fragment_count, 1)
+            build_search_index(self.revision)
+        # The search of the final texts finds the texts of the edits and transformations.
+        self.assertEqual(FragmentSearch(self.revision, "Xylophone").get_matching_ids(), [transformed_fragment.pk])
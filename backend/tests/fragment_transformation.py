@@ -0,0 +1,113 @@
+#  Copyright © 2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
+#  According to the copyright terms specified in the file "COPYRIGHT.md".
+#  SPDX-License-Identifier: GPL-3.0-or-later
+
+from collections import Counter
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from backend.enums import ReviewState, TransformerStatus
+from backend.models import Content, Document, Fragment, Revision
+from backend.models.fragment_edit import FragmentEdit
+from backend.models.fragment_transformation import FragmentTransformation
+from backend.size_calculator.manager import size_calculator_manager
+from backend.tests.helpers import create_document, create_project, create_transformation
+from backend.transformer.result import ProcessorResult
+
+
+class FragmentTransformationTestCase(TestCase):
+    FRAGMENT_COUNT = 20
+
+    def setUp(self):
+        self.project = create_project("Transformation Test")
+        self.revision = self.project.get_latest_revision()
+        self.transformation = create_transformation(self.revision)
+        self.document = create_document(
+            self.revision, "document.txt", [f"Fragment {position}\n" for position in range(self.FRAGMENT_COUNT)]
+        )
+
+    def _fragments(self) -> list[Fragment]:
+        return list(
+            Fragment.objects.filter(document=self.document)
+            .select_related("document", "content", "edit", "transformation__content")
+            .order_by("position")
+        )
+
+    def _transform_all(self, text_format: str) -> float:
+        """
+        Transform all fragments and return the number of queries per fragment.
+        """
+        fragments = self._fragments()
+        with CaptureQueriesContext(connection) as context:
+            for fragment in fragments:
+                result = ProcessorResult(content=text_format.format(fragment.text), status=TransformerStatus.SUCCESS)
+                fragment.set_transformation(self.transformation, result, True)
+        return len(context.captured_queries) / len(fragments)
+
+    def _assert_usage_counts(self):
+        Content.objects.delete_unused()
+        references = Counter()
+        for model in [Fragment, FragmentEdit, FragmentTransformation]:
+            references.update(model.objects.exclude(content=None).values_list("content_id", flat=True))
+        usage_counts = dict(Content.objects.values_list("pk", "usage_count"))
+        self.assertEqual(usage_counts, dict(references))
+
+    def test_delete_unused_with_drifted_usage_counts(self):
+        fragments = self._fragments()
+        unused_content = Content.objects.create(text="Unused\n", usage_count=0)
+        # Simulate usage counts that dropped to zero, although the content blocks are still referenced.
+        Content.objects.filter(pk__in=[fragments[0].content_id, fragments[1].content_id]).update(usage_count=0)
+        with self.assertLogs("backend.models.content", level="WARNING"):
+            self.assertEqual(Content.objects.delete_unused(), 1)
+        self.assertFalse(Content.objects.filter(pk=unused_content.pk).exists())
+        self.assertEqual([fragment.text for fragment in self._fragments()], [fragment.text for fragment in fragments])
+        self._assert_usage_counts()
+
+    def test_queries_per_transformed_fragment(self):
+        # A new transformation inserts the content and the transformation, and updates the fragment and counters.
+        self.assertLessEqual(self._transform_all("Changed {}"), 5)
+        self._assert_usage_counts()
+        # Transforming again updates the existing rows in place.
+        self.assertLessEqual(self._transform_all("Changed again {}"), 3)
+        self._assert_usage_counts()
+        # An unchanged text shares the content with the source text.
+        self.assertLessEqual(self._transform_all("{}"), 6)
+        self._assert_usage_counts()
+        for fragment in self._fragments():
+            self.assertEqual(fragment.transformation.content_id, fragment.content_id)
+            self.assertEqual(fragment.review_state, ReviewState.APPROVED)
+        self.assertEqual(FragmentTransformation.objects.filter(fragment__document=self.document).count(), 20)
+
+    def test_transformation_replaces_edit(self):
+        fragment = self._fragments()[0]
+        fragment.set_edit_text("Edited\n")
+        fragment = self._fragments()[0]
+        fragment.set_transformation(self.transformation, ProcessorResult(content="Changed\n"), False)
+        fragment = self._fragments()[0]
+        self.assertFalse(fragment.has_edit)
+        self.assertEqual(fragment.final_text, "Changed\n")
+        self.assertEqual(fragment.review_state, ReviewState.PENDING)
+        self._assert_usage_counts()
+
+    def test_usage_counts_after_copy_and_delete(self):
+        fragments = self._fragments()
+        fragments[0].set_edit_text("Edited\n")
+        fragments[1].set_transformation(self.transformation, ProcessorResult(content="Changed\n"), False)
+        new_revision = Revision.objects.create(project=self.project, number=2)
+        new_document = Document.objects.create(revision=new_revision, path="document.txt", document_syntax="plainText")
+        Fragment.create_copies_for_revision(
+            self._fragments(),
+            document=new_document,
+            size_calculator=size_calculator_manager.get_extension("char"),
+            copy_review=False,
+        )
+        self._assert_usage_counts()
+        self.assertEqual(Fragment.objects.get(document=new_document, position=0).text, "Edited\n")
+        self.assertEqual(Document.objects.get(pk=new_document.pk).fragment_count, self.FRAGMENT_COUNT)
+        self.revision.delete()
+        self._assert_usage_counts()
+        new_document.delete()
+        self._assert_usage_counts()
+        self.assertFalse(Content.objects.exists())
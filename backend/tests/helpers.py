@@ -0,0 +1,57 @@
+#  Copyright © 2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
+#  According to the copyright terms specified in the file "COPYRIGHT.md".
+#  SPDX-License-Identifier: GPL-3.0-or-later
+
+from typing import Iterable
+
+from django.contrib.auth.models import User
+
+from backend.models import Document, Fragment, Project, Revision, Transformation
+
+
+def create_project(name: str) -> Project:
+    """
+    Create a project, owned by a new user.
+
+    :param name: The name of the project, also used for the name of the user.
+    :return: The new project, with its first revision.
+    """
+    user = User.objects.create(username=name.lower().replace(" ", "_"))
+    return Project.objects.create_project(name, "", user)
+
+
+def create_transformation(revision: Revision) -> Transformation:
+    """
+    Create a transformation for the fragments of a revision.
+
+    :param revision: The revision of the transformation.
+    :return: The new transformation.
+    """
+    return Transformation.objects.create(
+        revision=revision, transformer_name="regex", profile_name="Test", version=1, configuration={}
+    )
+
+
+def create_document(revision: Revision, path: str, texts: Iterable[str]) -> Document:
+    """
+    Create a plain text document with one fragment for each text.
+
+    :param revision: The revision of the document.
+    :param path: The path of the document.
+    :param texts: The texts of the fragments, in the order of the document.
+    :return: The new document.
+    """
+    document = Document.objects.create(revision=revision, path=path, document_syntax="plainText")
+    for position, text in enumerate(texts):
+        fragment = Fragment.objects.create(
+            document=document,
+            position=position,
+            size=len(text),
+            size_bytes=len(text.encode("utf-8")),
+            size_characters=len(text),
+            size_words=len(text.split()),
+            size_lines=text.count("\n"),
+        )
+        fragment.set_text(text)
+        fragment.save()
+    return document
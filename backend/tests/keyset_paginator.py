@@ -0,0 +1,57 @@
+#  Copyright © 2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
+#  According to the copyright terms specified in the file "COPYRIGHT.md".
+#  SPDX-License-Identifier: GPL-3.0-or-later
+
+from django.core.paginator import EmptyPage
+from django.test import TestCase
+
+from backend.models import Content
+from design.views.keyset_paginator import KeysetPaginator
+
+
+class KeysetPaginatorTestCase(TestCase):
+    OBJECT_COUNT = 25
+    PER_PAGE = 10
+
+    def setUp(self):
+        Content.objects.bulk_create(Content(text=f"Text {index}") for index in range(self.OBJECT_COUNT))
+        self.queryset = Content.objects.order_by("pk")
+        self.texts = list(self.queryset.values_list("text", flat=True))
+
+    def _texts(self, page) -> list[str]:
+        return [content.text for content in page.object_list]
+
+    def test_pages(self):
+        paginator = KeysetPaginator(self.queryset, self.PER_PAGE, key_field="pk", count=self.OBJECT_COUNT)
+        for number in [3, 1, 2]:
+            page = paginator.page(number)
+            start = (number - 1) * self.PER_PAGE
+            self.assertEqual(self._texts(page), self.texts[start : start + self.PER_PAGE])
+        # The anchors of all pages are known after they were visited.
+        self.assertEqual(sorted(paginator.page_anchors), [1, 2, 3])
+
+    def test_known_count_too_high(self):
+        # The objects are counted, if the known count includes objects that no longer exist.
+        paginator = KeysetPaginator(self.queryset, self.PER_PAGE, key_field="pk", count=45)
+        page = paginator.get_page(4)
+        self.assertEqual(page.number, 3)
+        self.assertEqual(self._texts(page), self.texts[20:])
+        self.assertEqual(paginator.count, self.OBJECT_COUNT)
+        paginator = KeysetPaginator(self.queryset, self.PER_PAGE, key_field="pk", count=45)
+        with self.assertRaises(EmptyPage):
+            paginator.page(5)
+        # A page that still exists is shown with its own objects.
+        paginator = KeysetPaginator(self.queryset, self.PER_PAGE, key_field="pk", count=45)
+        Content.objects.filter(pk__in=list(self.queryset.values_list("pk", flat=True)[20:])).delete()
+        page = paginator.get_page(3)
+        self.assertEqual(page.number, 2)
+        self.assertEqual(self._texts(page), self.texts[10:20])
+
+    def test_deleted_page_objects(self):
+        paginator = KeysetPaginator(self.queryset, self.PER_PAGE, key_field="pk")
+        self.assertEqual(paginator.num_pages, 3)
+        Content.objects.filter(pk__in=list(self.queryset.values_list("pk", flat=True)[20:])).delete()
+        # The count is cached, so the page is empty instead of showing the objects of the first page.
+        page = paginator.page(3)
+        self.assertEqual(page.number, 3)
+        self.assertEqual(self._texts(page), [])
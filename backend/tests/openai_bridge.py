@@ -0,0 +1,111 @@
+#  Copyright © 2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
+#  According to the copyright terms specified in the file "COPYRIGHT.md".
+#  SPDX-License-Identifier: GPL-3.0-or-later
+
+import threading
+from types import SimpleNamespace
+from unittest import mock
+
+import httpx
+from django.test import SimpleTestCase
+
+import ai_transformer.transformer  # Load the transformer first, as the bridge and the transformer import each other.
+from ai_transformer.tools.openai_bridge import OpenAIBridge
+from ai_transformer.tools.chat_messages import AiChatMessages
+from ai_transformer.tools.model_info import ModelInfo
+from backend.transformer.error import TransformerError, TransformerStopped
+from tasks.tools.stop_token import StopToken
+
+
+def _chunk(content: str, finish_reason: str = None) -> SimpleNamespace:
+    delta = SimpleNamespace(content=content)
+    return SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=delta, finish_reason=finish_reason)])
+
+
+class _BlockingStream:
+    """
+    A streamed response, that blocks after the first chunk until it is closed, like a slow network connection.
+    """
+
+    def __init__(self):
+        self.first_chunk_sent = threading.Event()
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        yield _chunk("The first part")
+        self.first_chunk_sent.set()
+        if self.closed.wait(10):
+            raise RuntimeError("Read from a closed stream.")
+        yield _chunk(" and the rest.", "stop")
+
+    def close(self):
+        self.closed.set()
+
+
+class OpenAIBridgeTestCase(SimpleTestCase):
+    def setUp(self):
+        self.bridge = OpenAIBridge()
+        self.bridge.set_log_receiver(mock.Mock())
+        self.stop_token = StopToken()
+        self.bridge.set_stop_token(self.stop_token)
+        self.bridge._client = mock.Mock()
+
+    def _request(self):
+        return self.bridge._run_interruptible(lambda: self.bridge._request_streamed_completion({}))
+
+    def test_stop_closes_stream(self):
+        stream = _BlockingStream()
+        self.bridge._client.chat.completions.create.return_value = stream
+
+        def stop_after_first_chunk():
+            stream.first_chunk_sent.wait(10)
+            self.stop_token.set()
+
+        threading.Thread(target=stop_after_first_chunk, daemon=True).start()
+        with self.assertRaises(TransformerStopped):
+            self._request()
+        # The stream is closed by the stop, not after the blocked read returned.
+        self.assertTrue(stream.closed.is_set())
+
+    def test_stop_between_chunks(self):
+        stop_token = self.stop_token
+
+        def chunks():
+            yield _chunk("The first part")
+            stop_token.set()
+            yield _chunk(" and the rest.", "stop")
+
+        stream = mock.MagicMock()
+        stream.__iter__.side_effect = chunks
+        self.bridge._client.chat.completions.create.return_value = stream
+        # The partial completion is not returned.
+        with self.assertRaises(TransformerStopped):
+            self._request()
+        stream.close.assert_called()
+
+    def test_complete_response(self):
+        stream = mock.MagicMock()
+        stream.__iter__.return_value = iter([_chunk("Complete"), _chunk(" text.", "stop")])
+        self.bridge._client.chat.completions.create.return_value = stream
+        completion = self._request()
+        self.assertEqual(completion.content, "Complete text.")
+        self.assertEqual(completion.finish_reason, "stop")
+
+    def test_connection_lost(self):
+        def chunks():
+            yield _chunk("The first part")
+            raise httpx.ReadError("Connection reset by peer")
+
+        stream = mock.MagicMock()
+        stream.__iter__.side_effect = chunks
+        self.bridge._client.chat.completions.create.return_value = stream
+        self.bridge.set_model_info(mock.Mock(spec=ModelInfo, identifier="gpt-test", context_window=1000))
+        messages = mock.Mock(spec=AiChatMessages, user_prompt="Transform this.", token_count=10)
+        messages.to_json.return_value = []
+        # A lost connection fails the fragment, and keeps the partial output.
+        with self.assertRaises(TransformerError) as context:
+            self.bridge.request_completion(messages)
+        self.assertIn("Connection reset by peer", str(context.exception))
+        self.assertEqual(context.exception.failure_output, "The first part")
+        self.assertIn("Transform this.", context.exception.failure_input)
+        stream.close.assert_called()
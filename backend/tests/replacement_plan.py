@@ -0,0 +1,77 @@
+#  Copyright © 2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
+#  According to the copyright terms specified in the file "COPYRIGHT.md".
+#  SPDX-License-Identifier: GPL-3.0-or-later
+
+import random
+import re
+from pathlib import Path
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from backend.transformer.data.regex_definition import RegExReplacement
+from regex_transformer.transformer import replacement_plan
+from regex_transformer.transformer.replacement_plan import ReplacementPlan
+
+
+class ReplacementPlanTestCase(SimpleTestCase):
+    def setUp(self):
+        self.text = (Path(__file__).parent / "data" / "flatland-by-edwin-abbott.txt").read_text(encoding="utf-8")
+
+    def assertSameResult(self, definitions: list[RegExReplacement], text: str):
+        expected = text
+        for definition in definitions:
+            expected = definition.transform(expected)
+        self.assertEqual(ReplacementPlan(definitions).transform(text), expected)
+
+    def test_interacting_definitions(self):
+        cases = [
+            [("ab", "X"), ("bc", "Y")],  # Overlapping patterns.
+            [("a", "b"), ("b", "c")],  # The replacement of one definition is matched by the next one.
+            [("abc", "x"), ("b", "y")],  # A pattern is part of another one.
+            [("ab", ""), ("ca", "Z"), ("x", "y")],  # Removing text creates new matches.
+            [("ab", r"\g<0>\g<0>"), ("ba", r"\\"), ("cd", r"\n")],  # Templates in the replacements.
+            [("Ab", "x"), ("(?i)ab", "y"), ("aB", "z")],  # Ignore the case.
+        ]
+        for case in cases:
+            definitions = [RegExReplacement(pattern, replacement) for pattern, replacement in case]
+            for text in ["abcabc", "aabbccdd", "xcabx", "ABAB abba", "dcba"]:
+                self.assertSameResult(definitions, text)
+        # An invalid replacement is reported, before any text is transformed.
+        for pattern in ["a", "abc", r"\w+"]:
+            with self.assertRaises(re.error):
+                ReplacementPlan([RegExReplacement("b", "c"), RegExReplacement(pattern, r"\1")])
+
+    def test_combined_literals(self):
+        # Compare random literal definitions, combined into one expression for each step.
+        generator = random.Random(1)
+
+        def random_text(characters: str, maximum_length: int) -> str:
+            return "".join(generator.choice(characters) for _ in range(generator.randint(0, maximum_length)))
+
+        with mock.patch.object(replacement_plan, "LITERAL_ALTERNATION_MIN_COUNT", 2):
+            for _ in range(2000):
+                definitions = [
+                    RegExReplacement(random_text("abc", 2) + generator.choice("abc"), random_text("abcd", 3))
+                    for _ in range(generator.randint(2, 5))
+                ]
+                for _ in range(5):
+                    self.assertSameResult(definitions, random_text("abcd", 12))
+
+    def test_flatland_definitions(self):
+        generator = random.Random(1)
+        capitalized_words = sorted(set(re.findall(r"\b[A-Z][a-z]{2,}\b", self.text)))
+        lower_case_words = sorted(set(re.findall(r"\b[a-z]{3,}\b", self.text)))
+        capitalized_definitions = [
+            RegExReplacement(word, f"[{word.lower()}]") for word in generator.sample(capitalized_words, 200)
+        ]
+        definitions = capitalized_definitions.copy()
+        definitions.extend(RegExReplacement(word, word.upper()) for word in generator.sample(lower_case_words, 100))
+        definitions.append(RegExReplacement(r"\bthe\b", "THE"))
+        definitions.append(RegExReplacement(r"(?i)square(s?)", r"Cube\1"))
+        definitions.append(RegExReplacement(r"(\w+)ness", r"\1-ness"))
+        self.assertSameResult(definitions, self.text)
+        generator.shuffle(definitions)
+        self.assertSameResult(definitions, self.text)
+        # The capitalized words are replaced in a few combined passes.
+        self.assertLess(ReplacementPlan(capitalized_definitions).pass_count, 20)
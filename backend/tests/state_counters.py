@@ -0,0 +1,145 @@
+#  Copyright © 2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
+#  According to the copyright terms specified in the file "COPYRIGHT.md".
+#  SPDX-License-Identifier: GPL-3.0-or-later
+
+from django.db import connection, models, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from backend.enums import ReviewState, TransformerStatus
+from backend.enums.transformation_state import TransformationState
+from backend.models import Document, Fragment, Revision
+from backend.models.state_counters import (
+    COUNTER_FIELDS,
+    REVIEW_COUNTER_FIELDS,
+    TRANSFORMATION_COUNTER_FIELDS,
+    deferred_state_counter_updates,
+)
+from backend.tests.helpers import create_document, create_project, create_transformation
+from backend.tools.review_state_selection import ReviewStateSelection
+from backend.transformer.result import ProcessorResult
+
+
+class StateCountersTestCase(TestCase):
+    def setUp(self):
+        self.project = create_project("Counter Test")
+        self.revision = self.project.get_latest_revision()
+        self.transformation = create_transformation(self.revision)
+        self.documents = [
+            create_document(self.revision, f"document_{index}.txt", [f"Fragment {position}\n" for position in range(6)])
+            for index in range(2)
+        ]
+
+    @staticmethod
+    def _expected_counters(fragments) -> dict[str, int]:
+        result = {name: 0 for name in COUNTER_FIELDS}
+        for fragment in fragments:
+            result[REVIEW_COUNTER_FIELDS[ReviewState(fragment.review_state)]] += 1
+            if fragment.has_edit:
+                state = TransformationState.EDITED
+            elif not fragment.has_transformation:
+                state = TransformationState.SOURCE
+            elif fragment.transformation.status == TransformerStatus.SUCCESS:
+                state = TransformationState.SUCCESS
+            else:
+                state = TransformationState.FAILED
+            result[TRANSFORMATION_COUNTER_FIELDS[state]] += 1
+        return result
+
+    def _assert_counters(self):
+        for document in Document.objects.filter(revision=self.revision):
+            expected = self._expected_counters(Fragment.objects.filter(document=document))
+            self.assertEqual({name: getattr(document, name) for name in COUNTER_FIELDS}, expected, document.path)
+        revision = type(self.revision).objects.get(pk=self.revision.pk)
+        expected = self._expected_counters(Fragment.objects.filter(document__revision=self.revision))
+        self.assertEqual({name: getattr(revision, name) for name in COUNTER_FIELDS}, expected)
+
+    def _fragment(self, document_index: int, position: int) -> Fragment:
+        return Fragment.objects.get(document=self.documents[document_index], position=position)
+
+    def test_counters_follow_fragment_changes(self):
+        self._assert_counters()
+        fragment = self._fragment(0, 0)
+        fragment.set_transformation(self.transformation, ProcessorResult(content="Changed\n"), False)
+        self._assert_counters()
+        fragment = self._fragment(0, 1)
+        result = ProcessorResult(content="", status=TransformerStatus.FAILURE)
+        fragment.set_transformation(self.transformation, result, False)
+        self._assert_counters()
+        fragment.set_edit_text("Edited\n")
+        self._assert_counters()
+        fragment = self._fragment(0, 1)
+        fragment.delete_edit()
+        fragment.save()
+        self._assert_counters()
+        fragment.delete_transformation()
+        fragment.save()
+        self._assert_counters()
+        fragment = self._fragment(1, 2)
+        fragment.review_state = ReviewState.REJECTED
+        fragment.save()
+        fragment.review_state = ReviewState.APPROVED
+        fragment.save(update_fields=["review_state"])
+        self._assert_counters()
+        self._fragment(1, 3).delete()
+        self._assert_counters()
+        self.documents[1].delete()
+        self._assert_counters()
+
+    def test_deferred_counter_updates(self):
+        revision_table = connection.ops.quote_name(Revision._meta.db_table)
+
+        def revision_updates(context: CaptureQueriesContext) -> int:
+            return sum(1 for query in context.captured_queries if query["sql"].startswith(f"UPDATE {revision_table}"))
+
+        with transaction.atomic(), CaptureQueriesContext(connection) as context:
+            with deferred_state_counter_updates():
+                for document_index, position in [(0, 0), (0, 1), (1, 0)]:
+                    result = ProcessorResult(content=f"Changed {position}\n")
+                    self._fragment(document_index, position).set_transformation(self.transformation, result, False)
+                self._fragment(1, 1).set_edit_text("Edited\n")
+                self._fragment(1, 2).delete()
+                # The revision row is not updated, so it is not locked while the fragments are changed.
+                self.assertEqual(revision_updates(context), 0)
+            self.assertEqual(revision_updates(context), 1)
+        self._assert_counters()
+        # Nothing is applied, if the block fails.
+        with self.assertRaises(ValueError), transaction.atomic(), deferred_state_counter_updates():
+            self._fragment(0, 3).set_edit_text("Edited\n")
+            raise ValueError()
+        self._assert_counters()
+
+    def test_stale_document_does_not_overwrite_counters(self):
+        document = Document.objects.get(pk=self.documents[0].pk)
+        fragment = self._fragment(0, 4)
+        fragment.set_edit_text("Edited\n")
+        document.path = "renamed.txt"
+        document.save()
+        self._assert_counters()
+
+    def test_rebuild_state_counters(self):
+        fragment = self._fragment(0, 0)
+        fragment.set_edit_text("Edited\n")
+        Fragment.objects.filter(document__revision=self.revision).update(review_state=ReviewState.APPROVED)
+        Document.objects.update(**{name: models.Value(0) for name in COUNTER_FIELDS})
+        self.revision.rebuild_state_counters()
+        self._assert_counters()
+        self.assertEqual(self.revision.review_approved_count, 12)
+        self.assertEqual(self.revision.fragment_count, 12)
+
+    def test_bulk_review_state_update(self):
+        self._fragment(0, 0).set_transformation(self.transformation, ProcessorResult(content="Changed\n"), False)
+        self._fragment(1, 0).set_transformation(self.transformation, ProcessorResult(content="Changed\n"), False)
+        self._fragment(1, 1).set_edit_text("Edited\n")
+        selection = ReviewStateSelection(
+            revision_id=self.revision.pk, transformation_states=[TransformationState.SUCCESS]
+        )
+        self.assertEqual(selection.update_review_state(ReviewState.APPROVED), 2)
+        self._assert_counters()
+        selection = ReviewStateSelection(
+            revision_id=self.revision.pk, document_ids=[self.documents[1].pk], has_text_changes=False
+        )
+        selection = ReviewStateSelection.from_json(selection.to_json())
+        self.assertEqual(selection.update_review_state(ReviewState.REJECTED), 4)
+        self.assertEqual(selection.update_review_state(ReviewState.REJECTED), 0)
+        self._assert_counters()
@@ -0,0 +1,113 @@
+#  Copyright © 2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
+#  According to the copyright terms specified in the file "COPYRIGHT.md".
+#  SPDX-License-Identifier: GPL-3.0-or-later
+
+import sqlite3
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+
+from backend.enums.transformation_step import TransformationStep
+from backend.enums.transformed_states import TransformedStates
+from backend.models import Content, Document, Fragment, Project, TransformationAssistant, TransformerProfile
+from backend.models.transformation_assistant_document import TransformationAssistantDocument
+from backend.tools.transformation_dry_run import TransformationDryRun
+from backend.transformer.data.regex_definition import RegExReplacement
+from backend.transformer.manager import transformer_manager
+
+
+class TransformationSelectionTestCase(TestCase):
+    FRAGMENT_COUNT = 3300
+    QUERY_PARAMETER_LIMIT = 999
+
+    def setUp(self):
+        user = User.objects.create(username="selection_test")
+        self.project = Project.objects.create_project("Selection Test", "", user)
+        self.revision = self.project.get_latest_revision()
+        document = Document.objects.create(revision=self.revision, path="shapes.txt", document_syntax="plainText")
+        texts = [
+            f"A Square with number {index}.\n" if index % 3 == 0 else f"A Line with number {index}.\n"
+            for index in range(self.FRAGMENT_COUNT)
+        ]
+        contents = Content.objects.bulk_create(Content(text=text) for text in texts)
+        Fragment.objects.bulk_create(
+            Fragment(
+                document=document,
+                position=position,
+                content=content,
+                size=len(content.text),
+                size_bytes=len(content.text),
+                size_characters=len(content.text),
+                size_words=4,
+                size_lines=1,
+            )
+            for position, content in enumerate(contents)
+        )
+        transformer = transformer_manager.get_transformer("regex_edit")
+        settings = transformer.profile_settings_handler.get_default()
+        settings.definitions = [RegExReplacement(r"number (\d*[0-4])\b", r"low number \1")]
+        profile = TransformerProfile.objects.create(
+            profile_name="Numbers",
+            transformer_name="regex_edit",
+            owner=user,
+            version=transformer.version,
+            configuration=settings.to_json(),
+        )
+        self.assistant = TransformationAssistant.objects.create(
+            project=self.project,
+            revision=self.revision,
+            user=user,
+            assistant_name="transformation",
+            step=TransformationStep.SETUP,
+            profile=profile,
+            transformed_states=TransformedStates.ALL,
+            review_pending=True,
+            review_approved=True,
+        )
+        TransformationAssistantDocument.objects.create(
+            transformation_assistant=self.assistant, order_index=0, document=document
+        )
+        if connection.vendor == "sqlite":
+            # Use the limit of older SQLite versions, so a long list of ids in a query fails.
+            connection.ensure_connection()
+            previous_limit = connection.connection.setlimit(
+                sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, self.QUERY_PARAMETER_LIMIT
+            )
+            self.addCleanup(connection.connection.setlimit, sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, previous_limit)
+
+    def _expected_count(self, predicate) -> int:
+        return sum(1 for index in range(self.FRAGMENT_COUNT) if predicate(index))
+
+    def test_large_search_selection(self):
+        self.assistant.search_pattern = r"Square"
+        self.assistant.update_matching_fragments()
+        expected_count = self._expected_count(lambda index: index % 3 == 0)
+        self.assertGreater(expected_count, self.QUERY_PARAMETER_LIMIT)
+        self.assertEqual(self.assistant.get_selected_fragments().count(), expected_count)
+        self.assertEqual(
+            len(list(self.assistant.get_selected_fragments().values_list("pk", flat=True))), expected_count
+        )
+
+    def test_large_changed_selection(self):
+        self.assistant.only_matching = True
+        self.assistant.save()
+        self.assistant.update_matching_fragments()
+        expected_count = self._expected_count(lambda index: index % 10 < 5)
+        self.assertGreater(expected_count, self.QUERY_PARAMETER_LIMIT)
+        self.assertEqual(self.assistant.get_selected_fragments().count(), expected_count)
+        # Combined with a search pattern, only the changed fragments that match the pattern are selected.
+        self.assistant.search_pattern = r"Square"
+        self.assistant.save()
+        self.assistant.update_matching_fragments()
+        expected_count = self._expected_count(lambda index: index % 10 < 5 and index % 3 == 0)
+        self.assertEqual(self.assistant.get_selected_fragments().count(), expected_count)
+        # The selection and the statistics are read from the stored results, without repeating the dry run.
+        assistant = TransformationAssistant.objects.get(pk=self.assistant.pk)
+        with mock.patch.object(TransformationDryRun, "run") as run:
+            self.assertEqual(assistant.get_selected_fragments().count(), expected_count)
+            statistics = assistant.get_dry_run_statistics()
+        run.assert_not_called()
+        self.assertEqual(statistics["changed_fragment_count"], expected_count)
+        self.assertEqual(statistics["replacements"][0]["fragment_count"], expected_count)
@@ -0,0 +1,325 @@
+#  Copyright © 2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
+#  According to the copyright terms specified in the file "COPYRIGHT.md".
+#  SPDX-License-Identifier: GPL-3.0-or-later
+import io
+import json
+import sys
+import time
+import zipfile
+import zlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Iterable, Iterator, Optional
+
+from django.conf import settings
+
+from backend.models.document import Document
+from backend.models.fragment import Fragment
+
+EXPORT_FRAGMENT_BATCH_SIZE = 2000
+"""The number of fragments, whose final texts are fetched with one query."""
+
+EXPORT_DOCUMENT_BATCH_SIZE = 200
+"""The maximum number of documents, whose final texts are fetched with one query."""
+
+EXPORT_WRITE_BUFFER_SIZE = 1024 * 1024
+"""The number of bytes that are collected, before they are written into the ZIP file."""
+
+COMPRESSION_METHODS = {
+    "stored": zipfile.ZIP_STORED,
+    "deflated": zipfile.ZIP_DEFLATED,
+    "bzip2": zipfile.ZIP_BZIP2,
+    "lzma": zipfile.ZIP_LZMA,
+}
+"""The names of the supported compression methods, as used in the settings."""
+
+MANIFEST_PATH = "export-manifest.json"
+"""The path of the manifest in the ZIP file."""
+
+PRECOMPRESSED_MEMBER_PYTHON_VERSIONS = ((3, 11), (3, 13))
+"""The first and last Python version, whose `zipfile` internals are known to support precompressed members.
+
+The `zipfile` module has no public API to write data that was compressed in advance. Writing such a member
+re-implements `ZipFile._open_to_write`, using private names of the module. For other versions, the documents
+are compressed while they are written, using the public API.
+"""
+
+_PRIVATE_ZIPFILE_NAMES = ("_MASK_COMPRESS_OPTION_1", "_get_compressor")
+_PRIVATE_ZIP_HANDLE_NAMES = ("_lock", "_seekable", "_writecheck", "_didModify", "start_dir")
+
+
+ExportProgress = Callable[[int, Document], None]
+"""A callback that is called with the index of each document, before it is written."""
+
+DocumentTexts = tuple[Document, list[str]]
+"""A document with the final texts of its fragments."""
+
+
+@dataclass
+class _CompressedMember:
+    """
+    A member of the ZIP file, whose data was already compressed.
+    """
+
+    zip_info: zipfile.ZipInfo
+    """The information for the local header and the central directory."""
+
+    data: bytes
+    """The compressed data."""
+
+
+class DocumentExport:
+    """
+    Export the final texts of documents into a ZIP file.
+
+    The final texts are resolved in the database and fetched in batches of documents, so the number of queries
+    depends on the number of fragments, and not on the number of documents. Only the texts of one batch are
+    kept in memory.
+
+    With more than one worker, the documents of each batch are compressed in parallel by a thread pool, and the
+    compressed members are written into the ZIP file in their original order.
+    """
+
+    def __init__(
+        self,
+        documents: Iterable[Document],
+        *,
+        compression: Optional[str] = None,
+        compression_level: Optional[int] = None,
+        worker_count: int = 1,
+        manifest: Optional[dict] = None,
+        on_finished: Optional[Callable[[], None]] = None,
+    ):
+        """
+        Create a new export.
+
+        :param documents: The documents to export, in the order they are written into the ZIP file.
+        :param compression: The name of the compression method, or `None` to use the configured method.
+        :param compression_level: The compression level, or `None` to use the configured level.
+        :param worker_count: The number of threads that compress documents in parallel.
+        :param manifest: Optional JSON data, that is written as manifest after the documents.
+        :param on_finished: An optional callback, that is called after the ZIP file was completely written.
+        :raises ValueError: If the compression method is not supported.
+        """
+        if compression is None:
+            compression = settings.BACKEND_EGRESS_COMPRESSION
+        if compression not in COMPRESSION_METHODS:
+            raise ValueError(f"Unsupported compression method: {compression}")
+        if compression_level is None:
+            compression_level = settings.BACKEND_EGRESS_COMPRESSION_LEVEL
+        self.documents = documents
+        self.compress_type = COMPRESSION_METHODS[compression]
+        self.compress_level = compression_level
+        self.worker_count = max(1, worker_count)
+        self.manifest = manifest
+        self.on_finished = on_finished
+
+    def _iter_document_batches(self) -> Iterator[list[Document]]:
+        """
+        Split the documents into batches, using the fragment counts from the state counters.
+        """
+        batch: list[Document] = []
+        fragment_count = 0
+        for document in self.documents:
+            batch.append(document)
+            fragment_count += document.fragment_count
+            if fragment_count >= EXPORT_FRAGMENT_BATCH_SIZE or len(batch) >= EXPORT_DOCUMENT_BATCH_SIZE:
+                yield batch
+                batch = []
+                fragment_count = 0
+        if batch:
+            yield batch
+
+    def iter_final_text_batches(self) -> Iterator[list[DocumentTexts]]:
+        """
+        Iterate over batches of documents and the final texts of their fragments, ordered by position.
+        """
+        for batch in self._iter_document_batches():
+            texts: dict[int, list[str]] = defaultdict(list)
+            fragments = Fragment.objects.filter(document_id__in=[document.pk for document in batch])
+            for document_id, text in fragments.final_texts():
+                texts[document_id].append(text)
+            yield [(document, texts.pop(document.pk, [])) for document in batch]
+
+    def iter_final_texts(self) -> Iterator[DocumentTexts]:
+        """
+        Iterate over all documents and the final texts of their fragments, ordered by position.
+        """
+        for batch in self.iter_final_text_batches():
+            yield from batch
+
+    @staticmethod
+    def _write_texts(fp: BinaryIO, texts: list[str], encoding: str) -> None:
+        """
+        Encode the texts and write them in large blocks.
+        """
+        buffer: list[bytes] = []
+        buffer_size = 0
+        for text in texts:
+            data = text.encode(encoding)
+            buffer.append(data)
+            buffer_size += len(data)
+            if buffer_size >= EXPORT_WRITE_BUFFER_SIZE:
+                fp.write(b"".join(buffer))
+                buffer.clear()
+                buffer_size = 0
+        if buffer:
+            fp.write(b"".join(buffer))
+
+    def _compress_document(self, document_texts: DocumentTexts) -> _CompressedMember:
+        """
+        Encode and compress a single document. This method is called from the worker threads.
+        """
+        document, texts = document_texts
+        data = "".join(texts).encode(document.encoding)
+        zip_info = zipfile.ZipInfo(document.path, date_time=time.localtime(time.time())[:6])
+        zip_info.compress_type = self.compress_type
+        zip_info.external_attr = 0o600 << 16  # permissions: ?rw-------
+        return _compress_member(zip_info, data, self.compress_level)
+
+    def _write_documents(self, zip_handle: zipfile.ZipFile, progress: Optional[ExportProgress]) -> Iterator[None]:
+        """
+        Write the documents into an open ZIP file, yielding after each document.
+        """
+        index = 0
+        if (
+            self.worker_count > 1
+            and self.compress_type != zipfile.ZIP_STORED
+            and _can_write_precompressed_members(zip_handle)
+        ):
+            with ThreadPoolExecutor(max_workers=self.worker_count) as executor:
+                for batch in self.iter_final_text_batches():
+                    for (document, _), member in zip(batch, executor.map(self._compress_document, batch)):
+                        if progress is not None:
+                            progress(index, document)
+                        _write_compressed_member(zip_handle, member)
+                        index += 1
+                        yield
+            return
+        for document, texts in self.iter_final_texts():
+            if progress is not None:
+                progress(index, document)
+            with zip_handle.open(document.path, mode="w", force_zip64=True) as fp:
+                self._write_texts(fp, texts, document.encoding)
+            index += 1
+            yield
+
+    def _write_manifest(self, zip_handle: zipfile.ZipFile) -> None:
+        """
+        Write the manifest, if there is one.
+        """
+        if self.manifest is not None:
+            zip_handle.writestr(MANIFEST_PATH, json.dumps(self.manifest, indent=2, ensure_ascii=False))
+
+    def _create_zip_file(self, file: BinaryIO) -> zipfile.ZipFile:
+        """
+        Create the ZIP file with the compression of this export.
+        """
+        return zipfile.ZipFile(file, mode="w", compression=self.compress_type, compresslevel=self.compress_level)
+
+    def write_zip(self, file: BinaryIO, progress: Optional[ExportProgress] = None) -> None:
+        """
+        Write all documents into a ZIP file.
+
+        :param file: The file to write the ZIP data into. The file does not need to be seekable.
+        :param progress: An optional callback for the progress.
+        """
+        with self._create_zip_file(file) as zip_handle:
+            for _ in self._write_documents(zip_handle, progress):
+                pass
+            self._write_manifest(zip_handle)
+        if self.on_finished is not None:
+            self.on_finished()
+
+    def iter_zip(self) -> Iterator[bytes]:
+        """
+        Generate the ZIP file on the fly, e.g. for a streaming response.
+
+        The ZIP data is yielded after each document, so only the data of one document is kept in memory.
+        """
+        stream = _ZipStream()
+        with self._create_zip_file(stream) as zip_handle:
+            for _ in self._write_documents(zip_handle, None):
+                yield stream.take_data()
+            self._write_manifest(zip_handle)
+        yield stream.take_data()
+        if self.on_finished is not None:
+            self.on_finished()
+
+
+def _can_write_precompressed_members(zip_handle: zipfile.ZipFile) -> bool:
+    """
+    Test if precompressed members can be written into a ZIP file with this version of Python.
+    """
+    first_version, last_version = PRECOMPRESSED_MEMBER_PYTHON_VERSIONS
+    if not first_version <= sys.version_info[:2] <= last_version:
+        return False
+    return all(hasattr(zipfile, name) for name in _PRIVATE_ZIPFILE_NAMES) and all(
+        hasattr(zip_handle, name) for name in _PRIVATE_ZIP_HANDLE_NAMES
+    )
+
+
+def _compress_member(zip_info: zipfile.ZipInfo, data: bytes, compress_level: Optional[int]) -> _CompressedMember:
+    """
+    Compress the data of a member, the same way as `ZipFile` does it.
+
+    Only call this function if `_can_write_precompressed_members` returned `True`.
+    """
+    if zip_info.compress_type == zipfile.ZIP_LZMA:
+        zip_info.flag_bits |= zipfile._MASK_COMPRESS_OPTION_1  # The data includes an end-of-stream marker.
+    zip_info.file_size = len(data)
+    zip_info.CRC = zlib.crc32(data)
+    compressor = zipfile._get_compressor(zip_info.compress_type, compress_level)
+    if compressor is not None:
+        data = compressor.compress(data) + compressor.flush()
+    zip_info.compress_size = len(data)
+    return _CompressedMember(zip_info, data)
+
+
+def _write_compressed_member(zip_handle: zipfile.ZipFile, member: _CompressedMember) -> None:
+    """
+    Write a compressed member into the ZIP file, like `ZipFile._open_to_write` and `_ZipWriteFile.close` do.
+
+    As the sizes and the checksum are known in advance, the local header is written with the final values.
+    The central directory is written by the ZIP file, when it is closed. Only call this function if
+    `_can_write_precompressed_members` returned `True`.
+    """
+    zip_info = member.zip_info
+    zip64 = zip_info.file_size > zipfile.ZIP64_LIMIT or zip_info.compress_size > zipfile.ZIP64_LIMIT
+    with zip_handle._lock:
+        if zip_handle._seekable:
+            zip_handle.fp.seek(zip_handle.start_dir)
+        zip_info.header_offset = zip_handle.fp.tell()
+        zip_handle._writecheck(zip_info)
+        zip_handle._didModify = True
+        zip_handle.fp.write(zip_info.FileHeader(zip64))
+        zip_handle.fp.write(member.data)
+        zip_handle.start_dir = zip_handle.fp.tell()
+        zip_handle.filelist.append(zip_info)
+        zip_handle.NameToInfo[zip_info.filename] = zip_info
+
+
+class _ZipStream(io.RawIOBase):
+    """
+    A non-seekable stream that collects the written ZIP data until it is taken.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._data: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._data.append(bytes(data))
+        return len(data)
+
+    def take_data(self) -> bytes:
+        """
+        Take all data that was written since the last call.
+        """
+        data = b"".join(self._data)
+        self._data.clear()
+        return data
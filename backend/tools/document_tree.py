@@ -28,12 +28,14 @@ class DocumentTreeNode:
 
         :param document: The document node from the db, is specified a document node is created.
         :param with_document_details: If document details, like review states and the fragment count
-            shall be included. This requires to accessing the document object for every node.
+            shall be included. The counts are read from the state counters of the document.
         """
         self.parent: Optional["DocumentTreeNode"] = None
         self.children: list["DocumentTreeNode"] = []
         self.index: int = -1  # Index of flattened tree to alternate row colours properly.
+        self.fragment_count: int = 0
         self.review_states: Optional[ReviewStateCounts] = None
+        self.transformation_states: Optional[TransformationStateCounts] = None
         if document is None:
             if folder_path is None:
                 raise ValueError("The folder_path must be specified for folder nodes.")
@@ -45,7 +47,7 @@ class DocumentTreeNode:
         self.document_id: int = document.pk
         self.path: str = document.path
         if with_document_details:
-            self.fragment_count: int = document.fragment_count
+            self.fragment_count = document.fragment_count
             self.review_states = document.review_states()
             self.transformation_states = document.transformation_states()
             self.document_syntax = syntax_manager.verbose_name(document.document_syntax)
@@ -97,6 +99,7 @@ class DocumentTreeNode:
             transformation_states = TransformationStateCounts(initialize_with_zero=True)
             for child in self.children:
                 child.summarize_meta_data()
+                self.fragment_count += child.fragment_count
                 if child.review_states:
                     review_states.add_other(child.review_states)
                 if child.transformation_states:
@@ -112,8 +115,8 @@ class DocumentTree:
 
         :param revision: The revision to create the document tree from.
         :param with_document_details: If document details, like review states and the fragment count
-            shall be included. This will access every document in the tree and summarizes the states for
-            the parents and the whole tree.
+            shall be included. The counts are read from the state counters of the documents and are
+            summarized for the parents and the whole tree.
         """
         self._root_node: DocumentTreeNode  # The root node.
         self._node_list: list[DocumentTreeNode]  # A flat list with all nodes in alphabetical order.
@@ -181,6 +184,16 @@ class DocumentTree:
                 return node.document_id
         return None
 
+    @property
+    def review_states(self) -> Optional[ReviewStateCounts]:
+        """The review states of all documents in this tree, if the tree was created with document details."""
+        return self._root_node.review_states
+
+    @property
+    def transformation_states(self) -> Optional[TransformationStateCounts]:
+        """The transformation states of all documents in this tree, if the tree was created with document details."""
+        return self._root_node.transformation_states
+
     def _create_node_tree_for_revision(self, revision: Revision) -> None:
         self._root_node = DocumentTreeNode(folder_path="")
         node_map: dict[str, DocumentTreeNode] = {"": self._root_node}
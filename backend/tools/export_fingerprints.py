@@ -0,0 +1,100 @@
+#  Copyright © 2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
+#  According to the copyright terms specified in the file "COPYRIGHT.md".
+#  SPDX-License-Identifier: GPL-3.0-or-later
+import hashlib
+from typing import Iterable
+
+from django.db import transaction
+from django.utils import timezone
+
+from backend.models.document import Document
+from backend.models.export_fingerprint import ExportFingerprint
+from backend.models.fragment import Fragment
+from backend.models.revision import Revision
+
+FINGERPRINT_DOCUMENT_BATCH_SIZE = 500
+"""The maximum number of documents, whose fingerprints are calculated with one query."""
+
+
+class ExportFingerprints:
+    """
+    The fingerprints of documents, to detect which documents changed since the last export.
+
+    A fingerprint is a hash over the encoding and the hashes of the final texts of all fragments of a document.
+    The hashes of the final texts are calculated by the database, so the texts are not transferred. Content ids
+    can not be used for this, as the text of a content block that is not shared is changed in place.
+    """
+
+    def __init__(self, revision: Revision, documents: Iterable[Document]):
+        """
+        Calculate the fingerprints of the given documents.
+
+        :param revision: The revision of the documents.
+        :param documents: The documents.
+        """
+        self.revision = revision
+        self.project = revision.project
+        self.documents = list(documents)
+        self.fingerprints: dict[int, str] = {}
+        for index in range(0, len(self.documents), FINGERPRINT_DOCUMENT_BATCH_SIZE):
+            self._calculate(self.documents[index : index + FINGERPRINT_DOCUMENT_BATCH_SIZE])
+
+    def _calculate(self, documents: list[Document]) -> None:
+        hashes = {document.pk: hashlib.sha256(document.encoding.encode("utf-8")) for document in documents}
+        fragments = Fragment.objects.filter(document_id__in=list(hashes.keys()))
+        for document_id, text_hash in fragments.final_text_hashes():
+            hashes[document_id].update(text_hash.encode("ascii"))
+        for document_id, fingerprint in hashes.items():
+            self.fingerprints[document_id] = fingerprint.hexdigest()
+
+    def get_changed_documents(self) -> list[Document]:
+        """
+        Get all documents that were changed or added since the last export.
+        """
+        paths = [document.path for document in self.documents]
+        exported = dict(
+            ExportFingerprint.objects.filter(project=self.project, path__in=paths).values_list("path", "fingerprint")
+        )
+        return [
+            document for document in self.documents if exported.get(document.path) != self.fingerprints[document.pk]
+        ]
+
+    def create_manifest(self, changed_documents: list[Document]) -> dict:
+        """
+        Create the manifest for an export, that only contains the changed documents.
+
+        :param changed_documents: The documents that are part of the export.
+        :return: The manifest as JSON data.
+        """
+        changed_ids = {document.pk for document in changed_documents}
+        removed_paths = (
+            ExportFingerprint.objects.filter(project=self.project)
+            .exclude(path__in=self.revision.documents.values("path"))
+            .values_list("path", flat=True)
+        )
+        return {
+            "project": self.project.name,
+            "revision": self.revision.number,
+            "created": timezone.now().isoformat(),
+            "changed": [document.path for document in self.documents if document.pk in changed_ids],
+            "unchanged": [document.path for document in self.documents if document.pk not in changed_ids],
+            "removed": sorted(removed_paths),
+        }
+
+    def save(self) -> None:
+        """
+        Store the fingerprints as the state of the last export.
+
+        The fingerprints of paths that no longer exist in the revision are removed, as these documents were
+        reported as removed with this export.
+        """
+        paths = [document.path for document in self.documents]
+        with transaction.atomic():
+            ExportFingerprint.objects.filter(project=self.project).exclude(
+                path__in=self.revision.documents.values("path")
+            ).delete()
+            ExportFingerprint.objects.filter(project=self.project, path__in=paths).delete()
+            ExportFingerprint.objects.bulk_create(
+                ExportFingerprint(project=self.project, path=document.path, fingerprint=self.fingerprints[document.pk])
+                for document in self.documents
+            )
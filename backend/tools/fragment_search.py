@@ -0,0 +1,363 @@
+#  Copyright © 2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
+#  According to the copyright terms specified in the file "COPYRIGHT.md".
+#  SPDX-License-Identifier: GPL-3.0-or-later
+import re
+import zlib
+from array import array
+from collections import defaultdict
+from dataclasses import dataclass, field
+from re import _parser as sre_parse  # The parser of the standard library is used to analyze the patterns.
+from typing import Iterable, Iterator, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from backend.models.fragment import Fragment
+from backend.models.revision import Revision
+from backend.models.search_index import SearchIndex, SearchIndexEntry
+
+SEARCH_INDEX_FRAGMENT_BATCH_SIZE = 10_000
+"""The number of fragments, whose trigrams are collected in memory before they are written into the index."""
+
+SEARCH_INDEX_ENTRY_BATCH_SIZE = 1_000
+"""The number of index entries that are inserted with one query."""
+
+SEARCH_TEXT_BATCH_SIZE = 500
+"""The number of fragments, whose final texts are fetched with one query while searching."""
+
+SEARCH_MAX_HIGHLIGHTS = 20
+"""The maximum number of highlighted matches for each fragment."""
+
+_REPEAT_OPCODES = (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT, sre_parse.POSSESSIVE_REPEAT)
+"""The opcodes of repeated expressions."""
+
+_CASE_FOLDED_ASCII = "iks"
+"""ASCII letters that match non-ASCII characters if the case is ignored, e.g. the Kelvin sign."""
+
+
+def text_trigrams(text: str) -> set[int]:
+    """
+    Get the trigrams of a text, as they are stored in the index.
+
+    A trigram consists of three consecutive ASCII characters of the lower-case text. Trigrams that contain other
+    characters are not indexed, as their case conversion is not reliable.
+
+    :param text: The text.
+    :return: The trigrams, encoded as integers.
+    """
+    data = text.lower().encode("utf-8")
+    trigrams = {data[index : index + 3] for index in range(len(data) - 2)}
+    return {int.from_bytes(trigram, "big") for trigram in trigrams if trigram.isascii()}
+
+
+def _literal_runs(parsed: sre_parse.SubPattern, ignore_case: bool, ascii_only: bool) -> list[str]:
+    """
+    Get the runs of literal characters, that are required for a match of the parsed expression.
+    """
+    runs: list[str] = []
+    current: list[str] = []
+    for opcode, argument in parsed:
+        if opcode is sre_parse.LITERAL:
+            character = chr(argument)
+            if character.isascii() and not (ignore_case and not ascii_only and character.lower() in _CASE_FOLDED_ASCII):
+                current.append(character)
+                continue
+        runs.append("".join(current))
+        current = []
+        if opcode is sre_parse.SUBPATTERN:
+            _, add_flags, del_flags, sub_pattern = argument
+            group_ignore_case = (ignore_case or bool(add_flags & re.IGNORECASE)) and not del_flags & re.IGNORECASE
+            group_ascii_only = (ascii_only or bool(add_flags & re.ASCII)) and not del_flags & re.ASCII
+            runs.extend(_literal_runs(sub_pattern, group_ignore_case, group_ascii_only))
+        elif opcode in _REPEAT_OPCODES and argument[0] >= 1:
+            runs.extend(_literal_runs(argument[2], ignore_case, ascii_only))
+        elif opcode is sre_parse.ATOMIC_GROUP:
+            runs.extend(_literal_runs(argument, ignore_case, ascii_only))
+    runs.append("".join(current))
+    return [run for run in runs if len(run) >= 3]
+
+
+def required_literals(pattern: re.Pattern) -> list[str]:
+    """
+    Get the sequences of ASCII characters, that every text matched by a regular expression contains.
+
+    Only sequences of literal characters outside of alternatives and optional parts are considered. The
+    sequences have to be compared ignoring the case, as the expression may ignore the case.
+
+    :param pattern: The compiled regular expression.
+    :return: The sequences with at least three characters. An empty list, if any text may match.
+    """
+    if not isinstance(pattern.pattern, str):
+        return []
+    parsed = sre_parse.parse(pattern.pattern, pattern.flags)
+    flags = parsed.state.flags
+    return _literal_runs(parsed, bool(flags & re.IGNORECASE), bool(flags & re.ASCII))
+
+
+def pattern_trigrams(pattern: re.Pattern) -> set[int]:
+    """
+    Get the trigrams that every text must contain, to be matched by a regular expression.
+
+    :param pattern: The compiled regular expression.
+    :return: The required trigrams. An empty set, if any text may match.
+    """
+    trigrams = set()
+    for literal in required_literals(pattern):
+        trigrams.update(text_trigrams(literal))
+    return trigrams
+
+
+def _encode_fragment_ids(fragment_ids: list[int]) -> bytes:
+    """
+    Compress a sorted list of fragment ids, by storing the differences between the ids.
+    """
+    deltas = array("Q", (fragment_id - previous for previous, fragment_id in zip([0] + fragment_ids, fragment_ids)))
+    return zlib.compress(deltas.tobytes())
+
+
+def _decode_fragment_ids(data: bytes) -> list[int]:
+    """
+    Decompress a list of fragment ids, that was compressed with `_encode_fragment_ids()`.
+    """
+    deltas = array("Q")
+    deltas.frombytes(zlib.decompress(bytes(data)))
+    fragment_ids = []
+    fragment_id = 0
+    for delta in deltas:
+        fragment_id += delta
+        fragment_ids.append(fragment_id)
+    return fragment_ids
+
+
+def build_search_index(revision: Revision) -> SearchIndex:
+    """
+    Build the search index for a revision.
+
+    The index contains the trigrams of the final texts, and of the source texts of fragments with an edit or
+    transformation, so it can be used to search both texts. Existing indexes of the project are removed, so only
+    the index of one revision is kept for each project.
+
+    :param revision: The revision to index.
+    :return: The new index.
+    """
+    with transaction.atomic():
+        SearchIndex.objects.filter(revision__project_id=revision.project_id).delete()
+        index = SearchIndex.objects.create(revision=revision, indexed_until=timezone.now())
+        postings: dict[int, list[int]] = defaultdict(list)
+        batch_fragment_count = 0
+        fragments = Fragment.objects.filter(document__revision=revision).fragment_indexed_texts()
+        for fragment_id, final_text, source_text in fragments.iterator(chunk_size=SEARCH_TEXT_BATCH_SIZE):
+            trigrams = text_trigrams(final_text)
+            if source_text is not None and source_text != final_text:
+                trigrams.update(text_trigrams(source_text))
+            for trigram in trigrams:
+                postings[trigram].append(fragment_id)
+            index.fragment_count += 1
+            batch_fragment_count += 1
+            if batch_fragment_count >= SEARCH_INDEX_FRAGMENT_BATCH_SIZE:
+                _write_entries(index, postings)
+                postings.clear()
+                batch_fragment_count = 0
+        _write_entries(index, postings)
+        index.save(update_fields=["fragment_count"])
+    return index
+
+
+def request_search_index(revision: Revision) -> None:
+    """
+    Request to build or rebuild the search index of a revision, by the periodic background task.
+
+    If the revision has no index yet, an empty index is created, that is not used before it was built.
+
+    :param revision: The revision to index.
+    """
+    index, created = SearchIndex.objects.get_or_create(
+        revision=revision, defaults={"indexed_until": None, "rebuild_requested": True}
+    )
+    if not created and not index.rebuild_requested:
+        SearchIndex.objects.filter(pk=index.pk).update(rebuild_requested=True)
+
+
+def build_requested_search_indexes() -> int:
+    """
+    Build all search indexes, that were requested for the latest revision of a project.
+
+    :return: The number of built indexes.
+    """
+    built_count = 0
+    for index in SearchIndex.objects.filter(rebuild_requested=True, revision__is_latest=True).select_related(
+        "revision"
+    ):
+        build_search_index(index.revision)
+        built_count += 1
+    return built_count
+
+
+def _write_entries(index: SearchIndex, postings: dict[int, list[int]]) -> None:
+    """
+    Write the collected fragment ids of one batch into the index.
+    """
+    SearchIndexEntry.objects.bulk_create(
+        (
+            SearchIndexEntry(index=index, trigram=trigram, fragment_ids=_encode_fragment_ids(fragment_ids))
+            for trigram, fragment_ids in postings.items()
+        ),
+        batch_size=SEARCH_INDEX_ENTRY_BATCH_SIZE,
+    )
+
+
+@dataclass
+class SearchMatch:
+    """
+    A fragment whose searched text matches the expression.
+    """
+
+    fragment_id: int
+    """The id of the matching fragment."""
+
+    document_id: int
+    """The id of the document of the fragment."""
+
+    match_count: int
+    """The total number of matches in the searched text."""
+
+    highlights: list[tuple[int, int]] = field(default_factory=list)
+    """The start and end positions of the first matches in the searched text."""
+
+
+class FragmentSearch:
+    """
+    Search the final or source texts of the fragments in a revision with one or more regular expressions.
+
+    For the latest revision, the search index is used to find the fragments that contain all the literal text of
+    an expression. Only the texts of these fragments, and of fragments modified after the index was built, are
+    fetched and matched. If an expression contains no usable literal text, all fragments are matched.
+    """
+
+    def __init__(
+        self,
+        revision: Revision,
+        patterns: re.Pattern | str | Iterable[re.Pattern | str],
+        *,
+        source_texts: bool = False,
+    ):
+        """
+        Create a new search.
+
+        :param revision: The revision to search in.
+        :param patterns: The regular expression, as compiled expression or as text, or a list of them. A
+            fragment matches, if it is matched by any of the expressions.
+        :param source_texts: Search the source texts, which are processed by a transformation, instead of the
+            final texts.
+        :raises re.error: If a pattern is not a valid regular expression.
+        """
+        if isinstance(patterns, (str, re.Pattern)):
+            patterns = [patterns]
+        self.revision = revision
+        self.patterns = [re.compile(pattern) if isinstance(pattern, str) else pattern for pattern in patterns]
+        self.source_texts = source_texts
+
+    def _get_search_index(self) -> tuple[Optional[SearchIndex], list[int]]:
+        """
+        Get the current index and the fragments that were modified after it was built.
+
+        The index is never built while searching, as this would read all texts of the revision. A missing index
+        is requested and the search is done without the index. If too many fragments were modified, a rebuild
+        is requested, and the modified fragments are searched in addition to the index until it is rebuilt.
+        """
+        if not self.revision.is_latest:
+            return None, []
+        # Do not use the cached relation, as the index may have been rebuilt in the meantime.
+        index = SearchIndex.objects.filter(revision=self.revision).first()
+        if index is None:
+            request_search_index(self.revision)
+            return None, []
+        if index.indexed_until is None:
+            return None, []
+        modified_ids = list(
+            Fragment.objects.filter(document__revision=self.revision, modified__gt=index.indexed_until).values_list(
+                "pk", flat=True
+            )
+        )
+        if len(modified_ids) > index.fragment_count * settings.BACKEND_SEARCH_INDEX_STALE_LIMIT:
+            request_search_index(self.revision)
+        return index, modified_ids
+
+    def get_candidate_ids(self) -> Optional[set[int]]:
+        """
+        Get the ids of all fragments, that may match one of the expressions.
+
+        :return: The fragment ids, or `None` if all fragments have to be matched.
+        """
+        pattern_trigram_sets = [pattern_trigrams(pattern) for pattern in self.patterns]
+        if not all(pattern_trigram_sets):
+            return None
+        index, modified_ids = self._get_search_index()
+        if index is None:
+            return None
+        trigrams = set().union(*pattern_trigram_sets)
+        postings: dict[int, set[int]] = defaultdict(set)
+        for trigram, data in index.entries.filter(trigram__in=trigrams).values_list("trigram", "fragment_ids"):
+            postings[trigram].update(_decode_fragment_ids(data))
+        candidate_ids = set(modified_ids)
+        for pattern_trigram_set in pattern_trigram_sets:
+            # If a trigram does not exist in any indexed fragment, the expression can not match.
+            if all(trigram in postings for trigram in pattern_trigram_set):
+                candidate_ids.update(set.intersection(*(postings[trigram] for trigram in pattern_trigram_set)))
+        return candidate_ids
+
+    def _get_texts(self, fragments: QuerySet[Fragment]) -> QuerySet:
+        """
+        Get the searched texts of the given fragments.
+        """
+        if self.source_texts:
+            return fragments.fragment_source_texts()
+        return fragments.fragment_final_texts()
+
+    def iter_texts(self, fragments: Optional[QuerySet[Fragment]] = None) -> Iterator[tuple[int, int, str]]:
+        """
+        Iterate over the searched texts of the fragments, that may match one of the expressions.
+
+        :param fragments: Only search in these fragments, or in all fragments of the revision if `None`.
+        :return: An iterator over `(fragment_id, document_id, text)` tuples, ordered by fragment id.
+        """
+        if fragments is None:
+            fragments = Fragment.objects.filter(document__revision=self.revision)
+        candidate_ids = self.get_candidate_ids()
+        if candidate_ids is None:
+            yield from self._get_texts(fragments).iterator(chunk_size=SEARCH_TEXT_BATCH_SIZE)
+            return
+        candidate_ids = sorted(candidate_ids)
+        for index in range(0, len(candidate_ids), SEARCH_TEXT_BATCH_SIZE):
+            batch = candidate_ids[index : index + SEARCH_TEXT_BATCH_SIZE]
+            yield from self._get_texts(fragments.filter(pk__in=batch))
+
+    def iter_matches(self, fragments: Optional[QuerySet[Fragment]] = None) -> Iterator[SearchMatch]:
+        """
+        Iterate over all fragments, whose searched text matches one of the expressions, ordered by fragment id.
+
+        :param fragments: Only search in these fragments, or in all fragments of the revision if `None`.
+        """
+        for fragment_id, document_id, text in self.iter_texts(fragments):
+            spans = [regex_match.span() for pattern in self.patterns for regex_match in pattern.finditer(text)]
+            if spans:
+                yield SearchMatch(
+                    fragment_id=fragment_id,
+                    document_id=document_id,
+                    match_count=len(spans),
+                    highlights=sorted(spans)[:SEARCH_MAX_HIGHLIGHTS],
+                )
+
+    def get_matching_ids(self, fragments: Optional[QuerySet[Fragment]] = None) -> list[int]:
+        """
+        Get the ids of all fragments, whose searched text matches one of the expressions.
+
+        :param fragments: Only search in these fragments, or in all fragments of the revision if `None`.
+        """
+        return [
+            fragment_id
+            for fragment_id, _, text in self.iter_texts(fragments)
+            if any(pattern.search(text) for pattern in self.patterns)
+        ]
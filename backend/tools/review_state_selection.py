@@ -0,0 +1,140 @@
+#  Copyright © 2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
+#  According to the copyright terms specified in the file "COPYRIGHT.md".
+#  SPDX-License-Identifier: GPL-3.0-or-later
+from dataclasses import dataclass
+from typing import Optional, Self
+
+from django.db import transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from backend.enums.review_state import ReviewState
+from backend.enums.transformation_state import TransformationState
+from backend.models.document import Document
+from backend.models.fragment import Fragment
+from backend.models.revision import Revision
+
+
+@dataclass
+class ReviewStateSelection:
+    """
+    A filtered set of fragments in a revision, whose review state is changed in bulk.
+    """
+
+    revision_id: int
+    """The revision with the fragments."""
+
+    document_ids: Optional[list[int]] = None
+    """Only select fragments from these documents, or from all documents if `None`."""
+
+    transformation_states: Optional[list[TransformationState]] = None
+    """Only select fragments in one of these transformation states, or in all states if `None`."""
+
+    has_text_changes: Optional[bool] = None
+    """Only select fragments with or without text changes, or all fragments if `None`."""
+
+    def get_documents(self) -> QuerySet[Document]:
+        """
+        Get the documents that are affected by this selection.
+        """
+        documents = Document.objects.filter(revision_id=self.revision_id)
+        if self.document_ids is not None:
+            documents = documents.filter(pk__in=self.document_ids)
+        return documents
+
+    def get_fragments(self) -> QuerySet[Fragment]:
+        """
+        Get all selected fragments.
+        """
+        fragments = Fragment.objects.filter(document__revision_id=self.revision_id)
+        if self.document_ids is not None:
+            fragments = fragments.filter(document_id__in=self.document_ids)
+        if self.transformation_states is not None:
+            fragments = fragments.filter(transformation_state__in=[state.value for state in self.transformation_states])
+        if self.has_text_changes is not None:
+            fragments = fragments.filter(has_text_changes=self.has_text_changes)
+        return fragments
+
+    def count(self) -> int:
+        """
+        Count the selected fragments.
+        """
+        return self.get_fragments().count()
+
+    def for_documents(self, document_ids: list[int]) -> Self:
+        """
+        Create a copy of this selection, limited to the given documents.
+
+        :param document_ids: The documents to select from.
+        :return: The new selection.
+        """
+        if self.document_ids is not None:
+            document_ids = [document_id for document_id in document_ids if document_id in self.document_ids]
+        return ReviewStateSelection(
+            revision_id=self.revision_id,
+            document_ids=document_ids,
+            transformation_states=self.transformation_states,
+            has_text_changes=self.has_text_changes,
+        )
+
+    def update_review_state(self, review_state: ReviewState) -> int:
+        """
+        Set the review state of all selected fragments with a single update.
+
+        The state counters of the affected documents and the revision are updated in the same transaction.
+
+        :param review_state: The new review state.
+        :return: The number of changed fragments.
+        """
+        with transaction.atomic():
+            changed_count = (
+                self.get_fragments()
+                .exclude(review_state=review_state.value)
+                .update(review_state=review_state.value, modified=timezone.now())
+            )
+            if changed_count > 0:
+                Document.rebuild_state_counters(self.get_documents())
+                Revision.objects.get(pk=self.revision_id).update_state_counters_from_documents()
+        return changed_count
+
+    def to_json(self) -> dict:
+        """
+        Convert this selection into JSON data, e.g. for the input data of a task.
+        """
+        return {
+            "revision_id": self.revision_id,
+            "document_ids": self.document_ids,
+            "transformation_states": (
+                [state.value for state in self.transformation_states]
+                if self.transformation_states is not None
+                else None
+            ),
+            "has_text_changes": self.has_text_changes,
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> Self:
+        """
+        Create a selection from JSON data.
+
+        :param data: The data, created with `to_json()`.
+        :return: The new selection.
+        :raises ValueError: If the data is not valid.
+        """
+        if not isinstance(data, dict) or not isinstance(data.get("revision_id"), int):
+            raise ValueError("Invalid review state selection.")
+        document_ids = data.get("document_ids")
+        if document_ids is not None and not all(isinstance(document_id, int) for document_id in document_ids):
+            raise ValueError("Invalid document ids in review state selection.")
+        transformation_states = data.get("transformation_states")
+        if transformation_states is not None:
+            transformation_states = [TransformationState(state) for state in transformation_states]
+        has_text_changes = data.get("has_text_changes")
+        if has_text_changes is not None and not isinstance(has_text_changes, bool):
+            raise ValueError("Invalid text change filter in review state selection.")
+        return cls(
+            revision_id=data["revision_id"],
+            document_ids=document_ids,
+            transformation_states=transformation_states,
+            has_text_changes=has_text_changes,
+        )
@@ -0,0 +1,147 @@
+#  Copyright © 2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
+#  According to the copyright terms specified in the file "COPYRIGHT.md".
+#  SPDX-License-Identifier: GPL-3.0-or-later
+from dataclasses import dataclass, field
+
+from django.db.models import QuerySet
+from django.db.models.functions import Lower
+
+from backend.models.document import Document
+from backend.models.fragment import Fragment
+from backend.models.revision import Revision
+from backend.tools.fragment_search import FragmentSearch
+from backend.transformer.data.regex_definition import RegExReplacement
+
+
+@dataclass
+class ReplacementStatistic:
+    """
+    The matches of one replacement in a dry run.
+    """
+
+    replacement: RegExReplacement
+    """The replacement."""
+
+    replacement_count: int = 0
+    """The number of replaced matches."""
+
+    fragment_count: int = 0
+    """The number of fragments with at least one replaced match."""
+
+
+@dataclass
+class DocumentStatistic:
+    """
+    The changes in one document in a dry run.
+    """
+
+    document: Document
+    """The document."""
+
+    replacement_count: int = 0
+    """The number of replaced matches of all replacements."""
+
+    changed_fragment_count: int = 0
+    """The number of fragments whose text is changed."""
+
+
+@dataclass
+class TransformationDryRun:
+    """
+    Apply a sequence of regular expression replacements to fragments, without storing the results.
+
+    The replacements are applied to the source texts, as the transformation processes these texts, and not the
+    final texts of edited or transformed fragments. Only the fragments that may match one of the replacements are
+    fetched, using the search index. All other fragments are counted as unchanged.
+    """
+
+    revision: Revision
+    """The revision with the fragments."""
+
+    replacements: list[RegExReplacement]
+    """The replacements, applied in this order."""
+
+    scanned_fragment_count: int = 0
+    """The number of fragments, whose texts were matched."""
+
+    changed_fragment_ids: list[int] = field(default_factory=list)
+    """The ids of the fragments whose text is changed, ordered by id."""
+
+    replacement_statistics: list[ReplacementStatistic] = field(default_factory=list)
+    """The statistics for each replacement, in the order of the replacements."""
+
+    document_statistics: list[DocumentStatistic] = field(default_factory=list)
+    """The statistics of the documents with replaced matches, ordered by path."""
+
+    def run(self, fragments: QuerySet[Fragment]) -> None:
+        """
+        Apply the replacements to the source texts of the given fragments.
+
+        :param fragments: The fragments to scan.
+        """
+        self.replacement_statistics = [ReplacementStatistic(replacement) for replacement in self.replacements]
+        document_counts: dict[int, tuple[int, int]] = {}
+        patterns = [replacement.regexp for replacement in self.replacements]
+        search = FragmentSearch(self.revision, patterns, source_texts=True)
+        for fragment_id, document_id, text in search.iter_texts(fragments):
+            self.scanned_fragment_count += 1
+            new_text = text
+            fragment_replacement_count = 0
+            for statistic in self.replacement_statistics:
+                new_text, replacement_count = statistic.replacement.transform_and_count(new_text)
+                if replacement_count > 0:
+                    statistic.replacement_count += replacement_count
+                    statistic.fragment_count += 1
+                    fragment_replacement_count += replacement_count
+            is_changed = new_text != text
+            if is_changed:
+                self.changed_fragment_ids.append(fragment_id)
+            if fragment_replacement_count > 0:
+                replacement_count, changed_count = document_counts.get(document_id, (0, 0))
+                document_counts[document_id] = (
+                    replacement_count + fragment_replacement_count,
+                    changed_count + int(is_changed),
+                )
+        documents = Document.objects.filter(pk__in=document_counts.keys()).order_by(Lower("path"), "pk")
+        self.document_statistics = [
+            DocumentStatistic(document, *document_counts[document.pk]) for document in documents
+        ]
+
+    @property
+    def changed_fragment_count(self) -> int:
+        """
+        The number of fragments whose text is changed.
+        """
+        return len(self.changed_fragment_ids)
+
+    @property
+    def replacement_count(self) -> int:
+        """
+        The total number of replaced matches.
+        """
+        return sum(statistic.replacement_count for statistic in self.replacement_statistics)
+
+    def get_statistics(self) -> dict:
+        """
+        Get the statistics of this dry run as JSON data, so they can be displayed without repeating the dry run.
+
+        :return: The counts of the dry run, the statistics for each replacement, and the number of replaced
+            matches for each document id.
+        """
+        return {
+            "scanned_fragment_count": self.scanned_fragment_count,
+            "changed_fragment_count": self.changed_fragment_count,
+            "replacement_count": self.replacement_count,
+            "replacements": [
+                {
+                    "pattern": statistic.replacement.pattern,
+                    "replacement": statistic.replacement.replacement,
+                    "replacement_count": statistic.replacement_count,
+                    "fragment_count": statistic.fragment_count,
+                }
+                for statistic in self.replacement_statistics
+            ],
+            "document_replacement_counts": {
+                str(statistic.document.pk): statistic.replacement_count for statistic in self.document_statistics
+            },
+        }
@@ -2,6 +2,8 @@
 #  According to the copyright terms specified in the file "COPYRIGHT.md".
 #  SPDX-License-Identifier: GPL-3.0-or-later
 
+import re
+
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 
@@ -69,6 +71,16 @@ def filename_validator(value: str):
         )
 
 
+def regular_expression_validator(value: str):
+    """
+    A validator for regular expressions in the syntax of the `re` module.
+    """
+    try:
+        re.compile(value)
+    except re.error as error:
+        raise ValidationError(_("This is not a valid regular expression: %(error)s") % {"error": error})
+
+
 def path_validator(value: str):
     """
     A validator for POSIX style paths that work on unix like operating systems.
@@ -116,3 +116,12 @@ class RegExReplacement(RegExDefinition):
         :return: The transformed text.
         """
         return self.regexp.sub(self.replacement, text)
+
+    def transform_and_count(self, text: str) -> tuple[str, int]:
+        """
+        Transform the given text using this regex definition, and count the replacements.
+
+        :param text: The text to transform.
+        :return: The transformed text and the number of replacements.
+        """
+        return self.regexp.subn(self.replacement, text)
@@ -8,3 +8,13 @@ class TransformerError(Exception):
         super().__init__(message)
         self.failure_input = failure_input
         self.failure_output = failure_output
+
+
+class TransformerStopped(Exception):
+    """
+    Raised by a processor if it aborted the transformation of a fragment, because the user requested a stop.
+
+    The fragment is left unprocessed.
+    """
+
+    pass
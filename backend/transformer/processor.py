@@ -10,6 +10,7 @@ from backend.transformer.settings import TransformerSettingsBase
 from tasks.data_store import data_store
 from tasks.tools.log_level import LogLevel
 from tasks.tools.log_receiver import LogReceiver
+from tasks.tools.stop_token import StopToken
 
 UserSettings = TypeVar("UserSettings", bound=TransformerSettingsBase)
 ProfileSettings = TypeVar("ProfileSettings", bound=TransformerSettingsBase)
@@ -29,7 +30,8 @@ class Processor(LogReceiver, Generic[ProfileSettings, UserSettings]):
 
     The transformation is run in a separate process and can block processing for a long time. Yet, you should
     check the method `is_stop_requested` in regular intervals to make sure the transformation can be stopped
-    on user request.
+    on user request. For blocking operations, like network requests, observe the `stop_token` and raise
+    `TransformerStopped` if it is set.
     """
 
     def __init__(
@@ -38,6 +40,7 @@ class Processor(LogReceiver, Generic[ProfileSettings, UserSettings]):
         log_receiver: LogReceiver,
         profile_settings: ProfileSettings,
         user_settings: Optional[UserSettings] = None,
+        stop_token: Optional[StopToken] = None,
     ):
         """
         Create a new instance of the processor.
@@ -46,6 +49,7 @@ class Processor(LogReceiver, Generic[ProfileSettings, UserSettings]):
         :param log_receiver: The log_receiver instance that is used to log messages.
         :param profile_settings: The profile settings for the transformation.
         :param user_settings: The optional user settings for this transformer.
+        :param stop_token: The token that is set as soon as the user requests to stop the transformation.
         """
         if not isinstance(task_id, str):
             raise TypeError("task_id must be a string.")
@@ -57,6 +61,7 @@ class Processor(LogReceiver, Generic[ProfileSettings, UserSettings]):
         self._log_receiver: LogReceiver = log_receiver
         self.profile_settings: ProfileSettings = profile_settings
         self.user_settings: UserSettings = user_settings
+        self.stop_token: StopToken = stop_token or StopToken()
 
     def log_message(self, level: LogLevel, message: str, details: str = None) -> None:
         self._log_receiver.log_message(level, message, details)
@@ -115,7 +120,8 @@ class Processor(LogReceiver, Generic[ProfileSettings, UserSettings]):
 
         In case a transformation takes a long time, use the method `is_stop_requested` to check every few
         seconds if the user requested to stop (abort) the operation. For transformations that take less than
-        20 seconds, there is usually no need to do that.
+        20 seconds, there is usually no need to do that. If you abort the operation, raise `TransformerStopped`
+        to leave the fragment unprocessed.
 
         Note:
             This method should not throw any exceptions, and handle errors internally. If there are errors during the
@@ -132,6 +138,8 @@ class Processor(LogReceiver, Generic[ProfileSettings, UserSettings]):
         """
         Test if the user chose to stop the current processing.
         """
+        if self.stop_token.is_set:
+            return True
         is_stop, _ = data_store.get_task_stop_request(self.task_id)
         return is_stop
 
@@ -142,6 +150,13 @@ class Processor(LogReceiver, Generic[ProfileSettings, UserSettings]):
         """
         return {}
 
+    def get_metric_values(self) -> dict[str, float]:
+        """
+        Return counters for the metrics of the transformation action, like the number of processed tokens.
+        The values are added to the metrics of the action when the transformation ends.
+        """
+        return {}
+
     def get_status_values(self) -> dict[str, str]:
         """
         Return additional status values to be displayed while the processor is running.
@@ -7,6 +7,7 @@ from typing import Optional, TypeVar, Type
 
 from backend.tools.extension import Extension, ExtensionMeta
 from backend.tools.statistic.statistic_field import StatisticField
+from backend.transformer.data.regex_definition import RegExReplacement
 from backend.transformer.processor import Processor, UserSettings, ProfileSettings
 from backend.transformer.settings import TransformerSettingsBase
 from backend.transformer.settings_handler import SettingsHandler
@@ -131,6 +132,18 @@ class TransformerBase(Extension, metaclass=TransformerMeta):
         """
         return self.processor_class
 
+    def get_replacements(self, profile_settings: TransformerSettingsBase) -> Optional[list[RegExReplacement]]:
+        """
+        Get the regular expression replacements, if this transformer only applies them in sequence.
+
+        The replacements allow a dry run of the transformation, and a selection of the fragments that are
+        changed by the transformation.
+
+        :param profile_settings: The profile settings for the transformer.
+        :return: The replacements, or `None` if the transformer works differently.
+        """
+        return None
+
     @cached_property
     def profile_settings_handler(self) -> SettingsHandler:
         """
@@ -8,9 +8,11 @@ from django import template
 from django.template.context import RenderContext
 from django.template.loader import render_to_string
 from django.templatetags.static import static
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
 
 from design.templatetags.design import page_end_scripts
-from design.views.diff import UnifiedDiff, SplitDiff, DiffResult
+from design.views.diff import UnifiedDiff, SplitDiff, DiffResult, DiffSegment
 
 register = template.Library()
 
@@ -56,6 +58,35 @@ def code_diff_split(diff: SplitDiff, style=""):
     }
 
 
+def _escape_segment_text(text: str) -> str:
+    """
+    Escape the text of a segment.
+
+    The diff templates use `spaceless`, that would remove segments that only consist of whitespace. Therefore,
+    the whitespace in these segments is written as character references.
+    """
+    if text.isspace():
+        return "".join(f"&#{ord(character)};" for character in text)
+    return escape(text)
+
+
+@register.filter
+def diff_segments(segments: list[DiffSegment]) -> str:
+    """
+    Render the segments of a changed line, with the changes inside the line highlighted.
+
+    :param segments: The segments from the diff line.
+    """
+    parts = []
+    for segment in segments:
+        text = _escape_segment_text(segment.text)
+        if segment.is_changed:
+            parts.append(f'<span class="intra-line-change">{text}</span>')
+        else:
+            parts.append(text)
+    return mark_safe("".join(parts))
+
+
 @register.inclusion_tag("design/tags/code_diff_changes.html")
 def code_diff_changes(diff: DiffResult, style=""):
     """
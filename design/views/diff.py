@@ -3,11 +3,14 @@
 #  SPDX-License-Identifier: GPL-3.0-or-later
 import difflib
 import enum
+import hashlib
 import re
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from typing import Optional
 
+from django.core.cache import cache
+
 
 class DiffLineMode(enum.StrEnum):
     """
@@ -20,6 +23,84 @@ class DiffLineMode(enum.StrEnum):
     CHANGE = "change"
 
 
+@dataclass
+class DiffSegment:
+    """
+    A segment of a changed line, for the highlighting of changes inside the line.
+    """
+
+    text: str
+    """The text of the segment."""
+
+    is_changed: bool = False
+    """If this segment was changed."""
+
+
+INTRA_LINE_MAX_LENGTH = 1_000
+"""The maximum length of a line, for that the changes inside the line are highlighted."""
+
+INTRA_LINE_MAX_PAIRS = 500
+"""The maximum number of changed line pairs in a diff, for that the changes inside the lines are highlighted."""
+
+INTRA_LINE_MIN_SIMILARITY = 0.4
+"""The minimum similarity of a line pair. Changes in less similar lines are not highlighted, as it would only
+produce noise."""
+
+RE_TOKEN = re.compile(r"\w+|\s+|[^\w\s]")
+
+
+def _append_segment(segments: list[DiffSegment], text: str, is_changed: bool) -> None:
+    """
+    Append a segment, or extend the last segment, if it has the same state.
+    """
+    if not text:
+        return
+    if segments and segments[-1].is_changed == is_changed:
+        segments[-1].text += text
+    else:
+        segments.append(DiffSegment(text, is_changed))
+
+
+def intra_line_diff(src_text: str, dst_text: str) -> Optional[tuple[list[DiffSegment], list[DiffSegment]]]:
+    """
+    Compare two changed lines word by word.
+
+    If only a single word was replaced by another single word, the two words are compared character by character.
+    The comparison is skipped for long and for very different lines.
+
+    :param src_text: The source line.
+    :param dst_text: The destination line.
+    :return: The segments of the source and destination line, or `None` if the changes are not highlighted.
+    """
+    if len(src_text) > INTRA_LINE_MAX_LENGTH or len(dst_text) > INTRA_LINE_MAX_LENGTH:
+        return None
+    src_tokens = RE_TOKEN.findall(src_text)
+    dst_tokens = RE_TOKEN.findall(dst_text)
+    matcher = difflib.SequenceMatcher(None, src_tokens, dst_tokens, autojunk=False)
+    if matcher.ratio() < INTRA_LINE_MIN_SIMILARITY:
+        return None
+    src_segments: list[DiffSegment] = []
+    dst_segments: list[DiffSegment] = []
+    for tag, src_start, src_end, dst_start, dst_end in matcher.get_opcodes():
+        src_part = "".join(src_tokens[src_start:src_end])
+        dst_part = "".join(dst_tokens[dst_start:dst_end])
+        if tag == "equal":
+            _append_segment(src_segments, src_part, False)
+            _append_segment(dst_segments, dst_part, False)
+            continue
+        if tag == "replace" and src_end - src_start == 1 and dst_end - dst_start == 1:
+            word_matcher = difflib.SequenceMatcher(None, src_part, dst_part, autojunk=False)
+            if word_matcher.ratio() >= 0.5:
+                for word_tag, word_src_start, word_src_end, word_dst_start, word_dst_end in word_matcher.get_opcodes():
+                    is_changed = word_tag != "equal"
+                    _append_segment(src_segments, src_part[word_src_start:word_src_end], is_changed)
+                    _append_segment(dst_segments, dst_part[word_dst_start:word_dst_end], is_changed)
+                continue
+        _append_segment(src_segments, src_part, True)
+        _append_segment(dst_segments, dst_part, True)
+    return src_segments, dst_segments
+
+
 class DiffResult(ABC):
     """
     The base class for a diff result.
@@ -58,22 +139,24 @@ class DiffResult(ABC):
         pass
 
     @abstractmethod
-    def add_delete(self, text: str, src_line: int) -> None:
+    def add_delete(self, text: str, src_line: int, segments: Optional[list[DiffSegment]] = None) -> None:
         """
         Add a line to the current hunk with DELETE mode.
 
         :param text: The text of the line to be deleted.
         :param src_line: The line number in the source file of the line to be deleted.
+        :param segments: Optional segments with the changes inside the line.
         """
         pass
 
     @abstractmethod
-    def add_add(self, text: str, dst_line: int) -> None:
+    def add_add(self, text: str, dst_line: int, segments: Optional[list[DiffSegment]] = None) -> None:
         """
         Add a line to the current hunk with ADD mode.
 
         :param text: A string representing the text of the line.
         :param dst_line: An integer representing the line number where the text should be added
+        :param segments: Optional segments with the changes inside the line.
         """
         pass
 
@@ -96,6 +179,9 @@ class UnifiedLine:
     dst_line: int = None
     """The line number of the destination line."""
 
+    segments: Optional[list[DiffSegment]] = field(default=None, compare=False)
+    """The segments with the changes inside a deleted or added line, if they are highlighted."""
+
 
 @dataclass
 class UnifiedLineHunk:
@@ -130,18 +216,86 @@ class UnifiedDiff(DiffResult):
         )
         self.match_count += 1
 
-    def add_delete(self, text: str, src_line: int) -> None:
-        self._current_hunk.lines.append(UnifiedLine(mode=DiffLineMode.DELETE, text=text, src_line=src_line))
+    def add_delete(self, text: str, src_line: int, segments: Optional[list[DiffSegment]] = None) -> None:
+        self._current_hunk.lines.append(
+            UnifiedLine(mode=DiffLineMode.DELETE, text=text, src_line=src_line, segments=segments)
+        )
         self.delete_count += 1
         self.total_changes += 1
 
-    def add_add(self, text: str, dst_line: int) -> None:
-        self._current_hunk.lines.append(UnifiedLine(mode=DiffLineMode.ADD, text=text, dst_line=dst_line))
+    def add_add(self, text: str, dst_line: int, segments: Optional[list[DiffSegment]] = None) -> None:
+        self._current_hunk.lines.append(
+            UnifiedLine(mode=DiffLineMode.ADD, text=text, dst_line=dst_line, segments=segments)
+        )
         self.add_count += 1
         self.total_changes += 1
 
 
-RE_HUNK = re.compile(r"^@@\s+-(\d+)(?:,\d+)?\s+\+\d+(?:,\d+)?\s+@@.*$")
+DIFF_CONTEXT_LINES = 3
+"""The number of matching lines that are displayed around each change."""
+
+DiffOpcode = tuple[str, int, int, int, int]
+"""An opcode from `SequenceMatcher`: The tag, and the start and end index in the source and destination lines."""
+
+
+def diff_opcode_groups(src_lines: list[str], dst_lines: list[str], *, autojunk: bool = True) -> list[list[DiffOpcode]]:
+    """
+    Compare the lines of two texts and group the changes into hunks.
+
+    These are the same hunks as from `difflib.unified_diff`, but without formatting and parsing a textual diff.
+
+    :param src_lines: The source lines.
+    :param dst_lines: The destination lines.
+    :param autojunk: If lines that occur very often in long texts are ignored by the matcher. Disabling this
+        option gives better results for long texts with many similar lines, but can be a lot slower.
+    :return: A list of hunks, each with a list of opcodes.
+    """
+    matcher = difflib.SequenceMatcher(None, src_lines, dst_lines, autojunk=autojunk)
+    return list(matcher.get_grouped_opcodes(DIFF_CONTEXT_LINES))
+
+
+DIFF_CACHE_KEY_PREFIX = "design.diff"
+"""The prefix for the keys of cached diffs."""
+
+
+def cached_diff_opcode_groups(
+    src_text: str,
+    dst_text: str,
+    src_lines: list[str],
+    dst_lines: list[str],
+    *,
+    cache_key: str,
+    cache_timeout: Optional[int] = None,
+    autojunk: bool = True,
+) -> list[list[DiffOpcode]]:
+    """
+    Get the grouped opcodes for two texts from the configured cache, or compare the texts and cache the result.
+
+    The opcodes do not depend on the line numbers, so the same cache entry is used for unified and split diffs.
+    The cache key is combined with a short hash of both texts, so a cache entry is never used for changed texts.
+
+    :param src_text: The source text.
+    :param dst_text: The destination text.
+    :param src_lines: The source lines.
+    :param dst_lines: The destination lines.
+    :param cache_key: A key that identifies the compared texts, e.g. from the ids of the texts.
+    :param cache_timeout: The time in seconds until the cache entry expires, or `None` for the cache default.
+    :param autojunk: If the matcher ignores very frequent lines in long texts.
+    :return: A list of hunks, each with a list of opcodes.
+    """
+    text_hash = hashlib.blake2b(digest_size=12)
+    text_hash.update(src_text.encode("utf-8", "surrogatepass"))
+    text_hash.update(b"\0")
+    text_hash.update(dst_text.encode("utf-8", "surrogatepass"))
+    key = f"{DIFF_CACHE_KEY_PREFIX}:{cache_key}:{int(autojunk)}:{text_hash.hexdigest()}"
+    groups = cache.get(key)
+    if groups is None:
+        groups = [tuple(group) for group in diff_opcode_groups(src_lines, dst_lines, autojunk=autojunk)]
+        if cache_timeout is None:
+            cache.set(key, groups)
+        else:
+            cache.set(key, groups, timeout=cache_timeout)
+    return groups
 
 
 def _diff(
@@ -152,6 +306,10 @@ def _diff(
     dst_line: Optional[int],
     src_label: Optional[str],
     dst_label: Optional[str],
+    autojunk: bool = True,
+    cache_key: Optional[str] = None,
+    cache_timeout: Optional[int] = None,
+    intra_line: bool = True,
 ) -> None:
     """
     Create a diff for the given texts.
@@ -163,6 +321,10 @@ def _diff(
     :param dst_line: Optional destination start line number.
     :param src_label: Optional label for the source.
     :param dst_label: Optional label for the destination.
+    :param autojunk: If the matcher ignores very frequent lines in long texts.
+    :param cache_key: An optional key to cache the compared lines, see `cached_diff_opcode_groups()`.
+    :param cache_timeout: The time in seconds until a cached diff expires.
+    :param intra_line: If the changes inside changed lines are highlighted.
     """
     if not src_line or not isinstance(src_line, int):
         src_line = 1
@@ -176,34 +338,51 @@ def _diff(
         result.dst_label = dst_label
     src_index = 0
     dst_index = 0
+    intra_line_budget = INTRA_LINE_MAX_PAIRS
     if src_text != dst_text:
-        diff_result = difflib.unified_diff(src_lines, dst_lines, lineterm="")
-        initial_skip = 2
-        for diff_line in diff_result:
-            if initial_skip > 0:
-                initial_skip -= 1
-                continue
-            if match := RE_HUNK.match(diff_line):
-                hunk_src_start = int(match.group(1)) - 1
-                if hunk_src_start > src_index:
-                    result.start_hunk(hidden=True)
-                    while hunk_src_start > src_index:
-                        result.add_match(src_lines[src_index], src_index + src_line, dst_index + dst_line)
-                        src_index += 1
-                        dst_index += 1
-                result.start_hunk()
-            elif len(diff_line) == 0 or diff_line[0] == " ":
-                result.add_match(src_lines[src_index], src_index + src_line, dst_index + dst_line)
-                src_index += 1
-                dst_index += 1
-            elif diff_line[0] == "-":
-                result.add_delete(src_lines[src_index], src_index + src_line)
-                src_index += 1
-            elif diff_line[0] == "+":
-                result.add_add(dst_lines[dst_index], dst_index + dst_line)
-                dst_index += 1
-            else:
-                raise RuntimeError(f"Unrecognized line start from `difflib.unified_diff`: {diff_line}")
+        if cache_key is not None:
+            groups = cached_diff_opcode_groups(
+                src_text,
+                dst_text,
+                src_lines,
+                dst_lines,
+                cache_key=cache_key,
+                cache_timeout=cache_timeout,
+                autojunk=autojunk,
+            )
+        else:
+            groups = diff_opcode_groups(src_lines, dst_lines, autojunk=autojunk)
+        for group in groups:
+            hunk_src_start = group[0][1]
+            if hunk_src_start > src_index:
+                result.start_hunk(hidden=True)
+                while hunk_src_start > src_index:
+                    result.add_match(src_lines[src_index], src_index + src_line, dst_index + dst_line)
+                    src_index += 1
+                    dst_index += 1
+            result.start_hunk()
+            for tag, src_start, src_end, dst_start, dst_end in group:
+                if tag == "equal":
+                    for index in range(src_start, src_end):
+                        result.add_match(src_lines[index], index + src_line, index - src_start + dst_start + dst_line)
+                else:
+                    # Changed lines are paired in order, like in the split diff.
+                    line_pairs = []
+                    if tag == "replace" and intra_line:
+                        pair_count = min(src_end - src_start, dst_end - dst_start, intra_line_budget)
+                        intra_line_budget -= pair_count
+                        line_pairs = [
+                            intra_line_diff(src_lines[src_start + index], dst_lines[dst_start + index])
+                            for index in range(pair_count)
+                        ]
+                    for index in range(src_start, src_end):
+                        line_pair = line_pairs[index - src_start] if index - src_start < len(line_pairs) else None
+                        result.add_delete(src_lines[index], index + src_line, line_pair[0] if line_pair else None)
+                    for index in range(dst_start, dst_end):
+                        line_pair = line_pairs[index - dst_start] if index - dst_start < len(line_pairs) else None
+                        result.add_add(dst_lines[index], index + dst_line, line_pair[1] if line_pair else None)
+                src_index = src_end
+                dst_index = dst_end
     if src_index < len(src_lines):
         result.start_hunk(hidden=True)
         while src_index < len(src_lines):
@@ -220,6 +399,10 @@ def unified_diff(
     dst_line: int = None,
     src_label: str = None,
     dst_label: str = None,
+    autojunk: bool = True,
+    cache_key: str = None,
+    cache_timeout: int = None,
+    intra_line: bool = True,
 ) -> UnifiedDiff:
     """
     Create a unified diff from the two given texts.
@@ -230,10 +413,26 @@ def unified_diff(
     :param dst_line: The fist line number of the destination text.
     :param src_label: Optional label for the source text.
     :param dst_label: Optional label for the destination text.
+    :param autojunk: If the matcher ignores very frequent lines in long texts.
+    :param cache_key: An optional key to cache the compared lines, e.g. from the ids of the texts.
+    :param cache_timeout: The time in seconds until a cached diff expires, or `None` for the cache default.
+    :param intra_line: If the changes inside changed lines are highlighted.
     :return: A list of unified lines objects to be rendered.
     """
     result = UnifiedDiff()
-    _diff(result, src_text, dst_text, src_line, dst_line, src_label, dst_label)
+    _diff(
+        result,
+        src_text,
+        dst_text,
+        src_line,
+        dst_line,
+        src_label,
+        dst_label,
+        autojunk,
+        cache_key,
+        cache_timeout,
+        intra_line,
+    )
     return result
 
 
@@ -258,6 +457,12 @@ class SplitLine:
     is_match: bool = False
     """If this line is a match."""
 
+    src_segments: Optional[list[DiffSegment]] = field(default=None, compare=False)
+    """The segments with the changes inside the source line, if they are highlighted."""
+
+    dst_segments: Optional[list[DiffSegment]] = field(default=None, compare=False)
+    """The segments with the changes inside the destination line, if they are highlighted."""
+
 
 @dataclass
 class SplitLineHunk:
@@ -307,30 +512,33 @@ class SplitDiff(DiffResult):
         self.match_count += 1
         self._last_add_in_hunk = len(self._current_hunk.lines)
 
-    def add_delete(self, text: str, src_line: int) -> None:
+    def add_delete(self, text: str, src_line: int, segments: Optional[list[DiffSegment]] = None) -> None:
         """
         Add a line to the current hunk with DELETE mode.
 
         :param text: The text of the line to be deleted.
         :param src_line: The line number in the source file of the line to be deleted.
+        :param segments: Optional segments with the changes inside the line.
         """
-        self._current_hunk.lines.append(SplitLine(src_text=text, src_line=src_line))
+        self._current_hunk.lines.append(SplitLine(src_text=text, src_line=src_line, src_segments=segments))
         self.delete_count += 1
         self.total_changes += 1
 
-    def add_add(self, text: str, dst_line: int) -> None:
+    def add_add(self, text: str, dst_line: int, segments: Optional[list[DiffSegment]] = None) -> None:
         """
         Add a line to the current hunk with ADD mode.
 
         :param text: A string representing the text of the line.
         :param dst_line: An integer representing the line number where the text should be added
+        :param segments: Optional segments with the changes inside the line.
         """
         if len(self._current_hunk.lines) > self._last_add_in_hunk:
             line = self._current_hunk.lines[self._last_add_in_hunk]
             line.dst_line = dst_line
             line.dst_text = text
+            line.dst_segments = segments
         else:
-            self._current_hunk.lines.append(SplitLine(dst_text=text, dst_line=dst_line))
+            self._current_hunk.lines.append(SplitLine(dst_text=text, dst_line=dst_line, dst_segments=segments))
         self._last_add_in_hunk += 1
         self.add_count += 1
         self.total_changes += 1
@@ -344,6 +552,10 @@ def split_diff(
     dst_line: int = None,
     src_label: str = None,
     dst_label: str = None,
+    autojunk: bool = True,
+    cache_key: str = None,
+    cache_timeout: int = None,
+    intra_line: bool = True,
 ) -> SplitDiff:
     """
     Create a unified diff from the two given texts.
@@ -354,8 +566,24 @@ def split_diff(
     :param dst_line: The fist line number of the destination text.
     :param src_label: Optional label for the source text.
     :param dst_label: Optional label for the destination text.
+    :param autojunk: If the matcher ignores very frequent lines in long texts.
+    :param cache_key: An optional key to cache the compared lines, e.g. from the ids of the texts.
+    :param cache_timeout: The time in seconds until a cached diff expires, or `None` for the cache default.
+    :param intra_line: If the changes inside changed lines are highlighted.
     :return: A list of unified lines objects to be rendered.
     """
     result = SplitDiff()
-    _diff(result, src_text, dst_text, src_line, dst_line, src_label, dst_label)
+    _diff(
+        result,
+        src_text,
+        dst_text,
+        src_line,
+        dst_line,
+        src_label,
+        dst_label,
+        autojunk,
+        cache_key,
+        cache_timeout,
+        intra_line,
+    )
     return result
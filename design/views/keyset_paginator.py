@@ -0,0 +1,95 @@
+#  Copyright © 2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
+#  According to the copyright terms specified in the file "COPYRIGHT.md".
+#  SPDX-License-Identifier: GPL-3.0-or-later
+
+from functools import cached_property
+from typing import Any, Optional
+
+from django.core.paginator import EmptyPage, Page, Paginator
+from django.db.models import QuerySet
+
+
+class KeysetPaginator(Paginator):
+    """
+    A paginator that fetches pages using the value of a unique, ordered key instead of an offset.
+
+    The queryset must be ordered ascending by `key_field` and the key must be unique in the queryset.
+    A page is fetched with `key >= anchor`, where the anchor is the key of the first object on the page.
+    Fetching a page also reads one additional row, that becomes the anchor of the next page. Anchors of
+    pages that were not visited yet are located with a query that only reads the key column, which can
+    be answered from an index.
+
+    If the total number of objects is already known, e.g. from a counter, pass it as `count` to avoid the
+    `COUNT(*)` query. If the anchor of a page does not exist, because the known count was too high, the objects
+    are counted, and the page number is validated again.
+    """
+
+    def __init__(
+        self,
+        object_list: QuerySet,
+        per_page: int,
+        *,
+        key_field: str,
+        count: Optional[int] = None,
+        page_anchors: Optional[dict[int, Any]] = None,
+    ):
+        """
+        Create a new keyset paginator.
+
+        :param object_list: The queryset, ordered by the key field.
+        :param per_page: The number of objects per page.
+        :param key_field: The name of the unique key field.
+        :param count: The total number of objects, if known.
+        :param page_anchors: Known anchors from previous requests, by page number.
+        """
+        super().__init__(object_list, per_page)
+        self.key_field = key_field
+        self._known_count = count
+        self.page_anchors: dict[int, Any] = dict(page_anchors or {})
+
+    @cached_property
+    def count(self) -> int:
+        if self._known_count is not None:
+            return self._known_count
+        return super().count
+
+    def _get_anchor(self, number: int) -> Optional[Any]:
+        if number == 1:
+            return None
+        if number in self.page_anchors:
+            return self.page_anchors[number]
+        offset = (number - 1) * self.per_page
+        return self.object_list.values_list(self.key_field, flat=True)[offset : offset + 1].first()
+
+    def _discard_known_count(self) -> None:
+        """
+        Discard the known count, so the objects are counted in the database.
+        """
+        self._known_count = None
+        self.__dict__.pop("count", None)
+        self.__dict__.pop("num_pages", None)
+
+    def page(self, number) -> Page:
+        number = self.validate_number(number)
+        anchor = self._get_anchor(number)
+        if anchor is None and number > 1 and self._known_count is not None:
+            self._discard_known_count()
+            number = self.validate_number(number)
+            anchor = self._get_anchor(number)
+        if anchor is None and number > 1:
+            return self._get_page([], number, self)  # The objects of the page were deleted in the meantime.
+        object_list = self.object_list
+        if anchor is not None:
+            object_list = object_list.filter(**{f"{self.key_field}__gte": anchor})
+        objects = list(object_list[: self.per_page + 1])
+        if len(objects) > self.per_page:
+            self.page_anchors[number + 1] = getattr(objects.pop(), self.key_field)
+        if objects:
+            self.page_anchors[number] = getattr(objects[0], self.key_field)
+        return self._get_page(objects, number, self)
+
+    def get_page(self, number) -> Page:
+        try:
+            return super().get_page(number)
+        except EmptyPage:
+            return self.page(self.num_pages)  # The page no longer exists, after the objects were counted.
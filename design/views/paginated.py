@@ -2,13 +2,13 @@
 #  According to the copyright terms specified in the file "COPYRIGHT.md".
 #  SPDX-License-Identifier: GPL-3.0-or-later
 
-from functools import cached_property
-from typing import Union
+from typing import Optional, Union
 
 from django.core.paginator import Paginator
 from django.db.models import QuerySet
 
 from design.views.action import ActionHandlerResponse
+from design.views.keyset_paginator import KeysetPaginator
 
 
 class PaginatedChildrenMixin:
@@ -36,14 +36,20 @@ class PaginatedChildrenMixin:
 
     The queryset for the children must exist and return a list with all children in a defined order.
     In your HTML template, use `paginator_page.objects` to show only the objects for a given page.
+
+    For large lists, set `paginator_key_field` to a unique field the queryset is ordered by. In this case,
+    pages are fetched using the key of their first object instead of an offset, and the keys of the visited
+    pages are kept in the session. If the number of children is already known, overwrite
+    `get_paginator_count()` to avoid counting them for every request.
     """
 
     _MAX_PAGE_COUNT = 10_000  # A reasonable maximum number of pages.
     _SESSION_PAGE = ".paginator.page"
     _SESSION_PARENT_ID = ".paginator.parent_id"
     _SESSION_ITEMS_PER_PAGE = ".paginator.items_per_page"
+    _SESSION_PAGE_ANCHORS = ".paginator.page_anchors"
 
-    paginator_items_per_page_choices = [10, 25, 50, 100, 250, 500, 1000]
+    paginator_items_per_page_choices = [10, 25, 50, 100]
     """A list of possible choices for items per page."""
 
     paginator_items_per_page_default = 10
@@ -52,6 +58,9 @@ class PaginatedChildrenMixin:
     paginator_session_prefix = ""
     """The default prefix for the session variables, controlling the pagination."""
 
+    paginator_key_field: Optional[str] = None
+    """A unique field the children are ordered by, to fetch the pages without an offset."""
+
     def get_paginator_session_prefix(self) -> str:
         """
         Get the session prefix for all paginator variables.
@@ -77,6 +86,14 @@ class PaginatedChildrenMixin:
         """
         raise NotImplementedError("Please implement `get_paginator_queryset`!")
 
+    def get_paginator_count(self) -> Optional[int]:
+        """
+        Return the total number of child objects, if it is known without counting them.
+
+        :return: The number of child objects, or `None` to count the objects in the queryset.
+        """
+        return None
+
     @property
     def paginator_page(self) -> int:
         value = self.request.session.get(self._paginator_session_var_name(self._SESSION_PAGE), 1)
@@ -94,13 +111,14 @@ class PaginatedChildrenMixin:
             self._paginator_session_var_name(self._SESSION_ITEMS_PER_PAGE),
             self.paginator_items_per_page_default,
         )
-        if not value or not isinstance(value, int) or not (0 <= value <= self._MAX_PAGE_COUNT):
+        if not isinstance(value, int) or value not in self.paginator_items_per_page_choices:
             return self.paginator_items_per_page_default
         return value
 
     @paginator_items_per_page.setter
     def paginator_items_per_page(self, value: int):
         self.request.session[self._paginator_session_var_name(self._SESSION_ITEMS_PER_PAGE)] = value
+        self._set_page_anchors({})
 
     def _paginator_session_var_name(self, name) -> str:
         return self.get_paginator_session_prefix() + name
@@ -111,17 +129,47 @@ class PaginatedChildrenMixin:
         self.request.session[self._paginator_session_var_name(self._SESSION_PARENT_ID)] = current_parent_id
         return last_parent_id != current_parent_id
 
+    def _get_page_anchors(self, count: int) -> dict[int, object]:
+        data = self.request.session.get(self._paginator_session_var_name(self._SESSION_PAGE_ANCHORS))
+        if not isinstance(data, dict) or data.get("count") != count or not isinstance(data.get("anchors"), dict):
+            return {}
+        try:
+            return {int(number): anchor for number, anchor in data["anchors"].items()}
+        except ValueError:
+            return {}
+
+    def _set_page_anchors(self, anchors: dict[int, object], count: Optional[int] = None):
+        self.request.session[self._paginator_session_var_name(self._SESSION_PAGE_ANCHORS)] = {
+            "count": count,
+            "anchors": {str(number): anchor for number, anchor in anchors.items()},
+        }
+
+    def _create_paginator(self) -> Paginator:
+        queryset = self.get_paginator_queryset()
+        if not self.paginator_key_field:
+            return Paginator(queryset, self.paginator_items_per_page)
+        paginator = KeysetPaginator(
+            queryset,
+            self.paginator_items_per_page,
+            key_field=self.paginator_key_field,
+            count=self.get_paginator_count(),
+        )
+        paginator.page_anchors = self._get_page_anchors(paginator.count)
+        return paginator
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         if self._has_parent_id_changed():
             self.paginator_page = 1
+            self._set_page_anchors({})
         page = self.paginator_page
-        queryset = self.get_paginator_queryset()
-        paginator = Paginator(queryset, self.paginator_items_per_page)
+        paginator = self._create_paginator()
         if not (1 <= page <= paginator.num_pages):
             page = 1
             self.paginator_page = 1
         paginator_page = paginator.get_page(page)
+        if isinstance(paginator, KeysetPaginator):
+            self._set_page_anchors(paginator.page_anchors, paginator.count)
         context.update(
             {
                 "paginator": paginator,
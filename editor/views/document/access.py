@@ -53,7 +53,7 @@ class DocumentAccessMixin(ProjectAccessMixin):
 
     @cached_property
     def fragment_count(self) -> int:
-        return self.document.fragments.count()
+        return self.document.fragment_count
 
     @cached_property
     def document_size_unit(self) -> str:
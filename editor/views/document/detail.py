@@ -28,6 +28,7 @@ class DocumentView(
     model = models.Document
     template_name = "editor/document/detail.html"
     paginator_session_prefix = "editor.document"
+    paginator_key_field = "position"
     page_icon_name = "file"
 
     def handle_goto_parent(self) -> ActionHandlerResponse:
@@ -58,7 +59,10 @@ class DocumentView(
         return self.document.pk
 
     def get_paginator_queryset(self) -> QuerySet:
-        return self.document.fragments.order_by("position").select_related("edit", "transformation")
+        return self.document.fragments.order_by("position").with_text_summary()
+
+    def get_paginator_count(self) -> Optional[int]:
+        return self.document.fragment_count
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -4,26 +4,35 @@
 from datetime import datetime
 from pathlib import Path
 
-from django.http import Http404, FileResponse
+from django.http import Http404, FileResponse, StreamingHttpResponse
+from django.utils.http import content_disposition_header
 from django.views import View
 
+from backend.enums.egress_step import EgressStep
 from editor.views.egress.access import EgressAccessMixin
 
 
 class EgressDownloadView(EgressAccessMixin, View):
     """
-    A view that allows downloading an exported ZIP file that was prepared by the egress assistant.
+    A view that allows downloading an exported ZIP file that was prepared by the egress assistant. If the export
+    was small enough to skip the background task, the ZIP file is generated while it is downloaded.
 
     The main reason why this view is to protect the download and only make it accessible to the authenticated
     that runs the assistant.
     """
 
     def get(self, request, *args, **kwargs):
-        if not self.assistant:
+        if not self.assistant or self.assistant.step != EgressStep.DONE:
             raise Http404()
+        filename = f"export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+        if not self.assistant.working_directory:
+            # Small exports are generated on the fly, while they are downloaded.
+            export = self.assistant.create_export()
+            response = StreamingHttpResponse(export.iter_zip(), content_type="application/zip")
+            response["Content-Disposition"] = content_disposition_header(True, filename)
+            return response
         path = Path(self.assistant.working_directory) / "export.zip"
         if not path.is_file():
             raise Http404()
-        filename = f"export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
         response = FileResponse(path.open("rb"), as_attachment=True, filename=filename)
         return response
@@ -32,7 +32,7 @@ class EgressSetupForm(forms.ModelForm):
 
     class Meta:
         model = EgressAssistant
-        fields = ["destination"]
+        fields = ["destination", "only_changed"]
 
 
 class EgressSetupView(EgressAccessMixin, FormView):
@@ -56,6 +56,8 @@ class EgressSetupView(EgressAccessMixin, FormView):
         return form
 
     def get_success_url(self):
+        if self.assistant.step == EgressStep.DONE:
+            return self.get_step_url(EgressStep.DONE)
         return self.get_step_url(EgressStep.RUNNING)
 
     def get_form_submit_text(self) -> str:
@@ -100,10 +102,14 @@ class EgressSetupView(EgressAccessMixin, FormView):
                         document=document,
                     )
         # After updating/creating the assistant object, start the export.
-        self.assistant.start_export(
-            success_url=self.get_step_url(EgressStep.DONE),
-            failure_url=self.get_step_url(EgressStep.SETUP),
-        )
+        # Small exports are generated while they are downloaded, larger ones are prepared by a task.
+        if self.assistant.is_streamed_export():
+            self.assistant.start_streamed_export()
+        else:
+            self.assistant.start_export(
+                success_url=self.get_step_url(EgressStep.DONE),
+                failure_url=self.get_step_url(EgressStep.SETUP),
+            )
         return self.form_valid(form)
 
     def add_checks(self, check_list: CheckList) -> None:
@@ -4,7 +4,6 @@
 from functools import cached_property
 from typing import Optional
 
-from django.db.models import Q
 from django.shortcuts import redirect
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
@@ -49,17 +48,10 @@ class FragmentViewBase(FragmentAccessMixin, UpdateReviewStateMixin, TreeNavigati
     def handle_goto_next_review(self, state: ReviewState = None) -> ActionHandlerResponse:
         if state is None:
             state = ReviewState(self.fragment.review_state)
-        fragments = (
-            Fragment.objects.filter(document__revision=self.revision, review_state=state.value)
-            .filter(
-                Q(document__path=self.document.path, position__gt=self.fragment.position)
-                | Q(document__path__gt=self.document.path)
-            )
-            .order_by("document__path", "position")
-        )
-        if not fragments.exists():
+        fragment_id = Fragment.get_next_id_in_review_state(self.revision, state, after=self.fragment)
+        if fragment_id is None:
             return reverse(f"project_no_{state.name.lower()}", kwargs={"pk": self.project.pk})
-        return reverse("fragment", kwargs={"pk": fragments.first().pk})
+        return reverse("fragment", kwargs={"pk": fragment_id})
 
     @cached_property
     def has_next_fragment(self) -> bool:
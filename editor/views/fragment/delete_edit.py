@@ -41,4 +41,5 @@ class DeleteEditView(FragmentAccessMixin, DeleteView):
             if not fragment.has_edit:
                 return
             fragment.delete_edit()
+            fragment.save()
             return HttpResponseRedirect(success_url)
@@ -3,6 +3,7 @@
 #  SPDX-License-Identifier: GPL-3.0-or-later
 import enum
 
+from django.conf import settings
 from django.db import transaction
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
@@ -81,20 +82,26 @@ class FragmentReviewView(FragmentViewBase):
         first_line_number = self.fragment.first_line_number
         if self.has_edit:
             destination = self.fragment.edit.text
+            dst_content_id = self.fragment.edit.content_id
             dst_label = _("Edit")
         elif self.has_transformation:
             destination = self.fragment.transformation.text
+            dst_content_id = self.fragment.transformation.content_id
             dst_label = _("Transformation")
         else:
             destination = source
+            dst_content_id = self.fragment.content_id
             dst_label = _("Source")
+        diff_parameters = {
+            "src_line": first_line_number,
+            "src_label": _("Source"),
+            "dst_label": dst_label,
+            "cache_key": f"{self.fragment.content_id}:{dst_content_id}",
+            "cache_timeout": settings.BACKEND_DIFF_CACHE_TIMEOUT,
+        }
         if self.diff_mode == DiffMode.UNIFIED:
-            context["diff"] = unified_diff(
-                source, destination, src_line=first_line_number, src_label=_("Source"), dst_label=dst_label
-            )
+            context["diff"] = unified_diff(source, destination, **diff_parameters)
         else:
-            context["diff"] = split_diff(
-                source, destination, src_line=first_line_number, src_label=_("Source"), dst_label=dst_label
-            )
+            context["diff"] = split_diff(source, destination, **diff_parameters)
         context["diff_mode"] = self.diff_mode
         return context
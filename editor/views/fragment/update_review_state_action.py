@@ -33,14 +33,14 @@ class UpdateReviewStateMixin:
             new_review_state = ReviewState(int(self.action_value))
             with transaction.atomic():
                 if not self.project.can_be_edited:
-                    return reverse("project_cannot_edit", kwargs=self.project.pk) + f"next={self.request.path}"
+                    return reverse("project_cannot_edit", kwargs={"pk": self.project.pk}) + f"?next={self.request.path}"
                 fragment = self._get_fragment_for_review_state_update()
                 old_state = fragment.review_state
                 fragment.review_state = new_review_state
                 fragment.save()
                 if goto_next and hasattr(self, "handle_goto_next_review"):
                     return self.handle_goto_next_review(ReviewState(old_state))
-        except ValueError or ObjectDoesNotExist as error:
+        except (ValueError, ObjectDoesNotExist) as error:
             logger.warning(f"Failed to update the review state. Reason: {error}")
             pass  # Ignore these, as they only occur when the request is tampered with.
         return None
@@ -3,7 +3,7 @@
 #  SPDX-License-Identifier: GPL-3.0-or-later
 
 from functools import cached_property
-from typing import Union
+from typing import Optional, Union
 
 from django import forms
 from django.db.models import QuerySet, When, Value, Case
@@ -28,6 +28,7 @@ class IngestPreview(IngestAccessMixin, PaginatedChildrenMixin, ActionFormView):
     template_name = "editor/ingest/preview.html"
     form_class = IngestPreviewForm
     paginator_session_prefix = "editor.ingest.preview"
+    paginator_key_field = "position"
 
     def handle_document_previous(self) -> ActionHandlerResponse:
         if self.document_index > 0:
@@ -101,7 +102,10 @@ class IngestPreview(IngestAccessMixin, PaginatedChildrenMixin, ActionFormView):
         return self.document.pk
 
     def get_paginator_queryset(self) -> QuerySet:
-        return self.document.fragments.order_by("position")
+        return self.document.fragments.order_by("position").with_text_summary()
+
+    def get_paginator_count(self) -> Optional[int]:
+        return self.document.fragment_count
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -10,7 +10,6 @@ from django.db.models.functions import Lower
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 
-from backend.enums import TransformerStatus
 from backend.models import Document, Fragment
 from backend.syntax_handler import syntax_manager
 from design.views.assistant.mixin import AssistantModelType, AssistantStepsType, AssistantMixin
@@ -188,11 +187,7 @@ class ProjectAssistantMixin(AssistantMixin, Generic[AssistantStepsType, Assistan
             check_list.add(CheckState.OK, _("All processed fragments have been reviewed and accepted."))
 
     def add_transformer_failure_check(self, check_list: CheckList) -> None:
-        transformer_failure_count = self.revision.documents.filter(
-            fragments__edit__isnull=True,
-            fragments__transformation__isnull=False,
-            fragments__transformation__status=TransformerStatus.FAILURE.value,
-        ).count()
+        transformer_failure_count = self.revision.documents.filter(transformation_failed_count__gt=0).count()
         if transformer_failure_count > 0:
             check_list.add(
                 CheckState.WARNING,
@@ -203,7 +198,7 @@ class ProjectAssistantMixin(AssistantMixin, Generic[AssistantStepsType, Assistan
             check_list.add(CheckState.OK, _("No fragments have unedited failed transformations."))
 
     def add_unprocessed_fragments_check(self, check_list: CheckList) -> None:
-        unprocessed_fragment_count = Fragment.objects.filter(edit__isnull=True, transformation__isnull=True).count()
+        unprocessed_fragment_count = self.revision.transformation_source_count
         if unprocessed_fragment_count > 0:
             check_list.add(
                 CheckState.WARNING,
@@ -4,17 +4,23 @@
 
 from functools import cached_property
 
+from django.conf import settings
+from django.contrib import messages
 from django.db import transaction
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 
 from backend import models
-from backend.enums import ReviewState
+from backend.enums import ReviewState, ReviewStateCounts
+from backend.enums.transformation_state import TransformationState, TransformationStateCounts
 from backend.models import Fragment
+from backend.tools.review_state_selection import ReviewStateSelection
 from design.views.action import ActionDetailView, ActionHandlerResponse
 from editor.views.session import SESSION_SELECTED_DOCUMENTS
 from editor.views.transformation.access import ProjectAccessMixin
 from backend.tools.document_tree import DocumentTree, DocumentTreeNodeType
+from tasks.models import Task
+from tasks.models.task import TaskParameter
 
 
 class ProjectDetailView(ProjectAccessMixin, ActionDetailView):
@@ -59,13 +65,10 @@ class ProjectDetailView(ProjectAccessMixin, ActionDetailView):
         return reverse("transformation", kwargs={"pk": self.project.pk})
 
     def _handle_review(self, state: ReviewState) -> ActionHandlerResponse:
-        fragments = Fragment.objects.filter(document__revision=self.revision, review_state=state.value).order_by(
-            "document__path", "position"
-        )
-        if not fragments.exists():
+        fragment_id = Fragment.get_next_id_in_review_state(self.revision, state)
+        if fragment_id is None:
             return reverse("project_no_pending", kwargs={"pk": self.project.pk})
-        fragment = fragments.first()
-        return reverse("fragment", kwargs={"pk": fragment.pk})
+        return reverse("fragment", kwargs={"pk": fragment_id})
 
     def handle_review(self) -> ActionHandlerResponse:
         """
@@ -82,25 +85,47 @@ class ProjectDetailView(ProjectAccessMixin, ActionDetailView):
             new_state = ReviewState[action_state.upper()]
         except KeyError:
             return None
+        selection = ReviewStateSelection(revision_id=self.revision.pk)
+        match action_set:
+            case "all":
+                pass
+            case "selected":
+                selection.document_ids = self.get_selected_document_ids()
+            case "unchanged":
+                selection.has_text_changes = False
+            case "changed":
+                selection.has_text_changes = True
+            case "transformed":
+                selection.transformation_states = [TransformationState.SUCCESS]
+            case _:
+                return None
+        if not self.project.can_be_edited:
+            return reverse("project_cannot_edit", kwargs={"pk": self.project.pk})
+        if selection.count() <= settings.BACKEND_REVIEW_UPDATE_TASK_THRESHOLD:
+            changed_count = selection.update_review_state(new_state)
+            messages.success(
+                self.request,
+                _("Changed the review state of %(count)d fragments to “%(state)s”.")
+                % {"count": changed_count, "state": new_state.label},
+            )
+            return None
+        project_url = reverse("project", kwargs={"pk": self.project.pk})
         with transaction.atomic():
-            match action_set:
-                case "all":
-                    Fragment.objects.all().update(review_state=new_state.value)
-                case "selected":
-                    selected_document_ids = self.get_selected_document_ids()
-                    Fragment.objects.filter(document__id__in=selected_document_ids).update(review_state=new_state.value)
-                case "unchanged":
-                    for fragment in Fragment.objects.all():
-                        if not fragment.has_text_changes:
-                            fragment.review_state = new_state.value
-                            fragment.save()
-                case "changed":
-                    for fragment in Fragment.objects.all():
-                        if fragment.has_text_changes:
-                            fragment.review_state = new_state.value
-                            fragment.save()
-                case _:
-                    return None
+            Task.objects.start_task(
+                TaskParameter(
+                    task_runner=self.project.task_runner,
+                    user=self.request.user,
+                    action="update_review_states",
+                    input_data={"selection": selection.to_json(), "review_state": new_state.value},
+                    success_url=project_url,
+                    failure_url=project_url,
+                    stopped_url=project_url,
+                )
+            )
+        messages.info(
+            self.request,
+            _("The review states are changed in the background. The project is locked until the update is done."),
+        )
         return None
 
     def handle_new_revision(self) -> ActionHandlerResponse:
@@ -123,6 +148,7 @@ class ProjectDetailView(ProjectAccessMixin, ActionDetailView):
             (_("Set Selected to %(state)s"), "selected", "list-check"),
             (_("Set Unchanged to %(state)s"), "unchanged", "equals"),
             (_("Set Changed to %(state)s"), "changed", "not-equal"),
+            (_("Set Transformed to %(state)s"), "transformed", "magic-wand-sparkles"),
         ]
         button_fields = []
         for selection_set in selection_sets:
@@ -140,8 +166,10 @@ class ProjectDetailView(ProjectAccessMixin, ActionDetailView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        review_states = self.revision.review_states()
-        transformation_states = self.revision.transformation_states()
+        review_states = self.document_tree.review_states or ReviewStateCounts(initialize_with_zero=True)
+        transformation_states = self.document_tree.transformation_states or TransformationStateCounts(
+            initialize_with_zero=True
+        )
         main_action = ""
         if not self.is_latest_revision:
             pass  # No default action if we are viewing an old version.
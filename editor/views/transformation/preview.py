@@ -57,7 +57,7 @@ class TransformationPreview(TransformationAccessMixin, FormView):
         if "document_id" in self.kwargs:
             document_id = self.kwargs["document_id"]
             document = Document.objects.get(pk=document_id)
-            fragments = self.selected_fragments.filter(document=document).order_by("position")
+            fragments = self.selected_fragments.filter(document=document).order_by("position").with_text_summary()
             context.update(
                 {
                     "document_id": document_id,
@@ -67,7 +67,12 @@ class TransformationPreview(TransformationAccessMixin, FormView):
                 }
             )
         else:
-            context.update({"documents": self.selected_documents})
+            dry_run = self.assistant.get_dry_run_statistics()
+            if dry_run is not None:
+                replacement_counts = dry_run["document_replacement_counts"]
+                for entry in self.selected_documents:
+                    entry["replacement_count"] = replacement_counts.get(str(entry["document"].pk), 0)
+            context.update({"documents": self.selected_documents, "dry_run": dry_run})
         return context
 
     def post(self, request, *args, **kwargs):
@@ -29,6 +29,8 @@ class TransformationSetupForm(forms.ModelForm):
             "review_pending",
             "review_approved",
             "review_rejected",
+            "search_pattern",
+            "only_matching",
             "stop_consecutive_failures",
             "stop_total_failures",
             "rollback_on_failure",
@@ -40,11 +42,19 @@ class TransformationSetupForm(forms.ModelForm):
             "review_approved": _("Approved"),
             "review_rejected": _("Rejected"),
             "transformed_states": _("Changes"),
+            "search_pattern": _("Text Pattern"),
+            "only_matching": _("Only transform fragments that are changed by the regular expressions."),
             "stop_consecutive_failures": _("Consecutive Failures"),
             "stop_total_failures": _("Total Failures"),
             "rollback_on_failure": _("Rollback on Failure"),
             "auto_approve_unchanged": _("Automatically approve transformed fragments with no changes."),
         }
+        help_texts = {
+            "search_pattern": _(
+                "Only transform fragments whose text matches this regular expression. Leave empty to transform all "
+                "fragments."
+            ),
+        }
 
 
 class TransformationSetup(TransformationAccessMixin, FormView):
@@ -67,6 +77,7 @@ class TransformationSetup(TransformationAccessMixin, FormView):
 
     def form_valid(self, form):
         form.save()
+        self.assistant.update_matching_fragments()
         self.assistant.step = TransformationStep.PREVIEW
         self.assistant.save()
         return super().form_valid(form)
@@ -77,4 +88,6 @@ class TransformationSetup(TransformationAccessMixin, FormView):
         for n in [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 15, 20, 30, 40, 50, 75, 100]:
             failure_choices.append((n, str(n)))
         context["failure_choices"] = failure_choices
+        profile = self.assistant.profile
+        context["has_replacements"] = profile.transformer.get_replacements(profile.get_settings()) is not None
         return context
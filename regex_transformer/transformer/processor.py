@@ -2,12 +2,14 @@
 #  According to the copyright terms specified in the file "COPYRIGHT.md".
 #  SPDX-License-Identifier: GPL-3.0-or-later
 import time
+from typing import Optional
 
 from backend.enums import TransformerStatus
 from backend.transformer.context import TransformerFragmentContext
 from backend.transformer.processor import Processor
 from backend.transformer.result import ProcessorResult
 from regex_transformer.transformer.profile_settings import RegExProfileSettings
+from regex_transformer.transformer.replacement_plan import ReplacementPlan
 
 
 class RegExProcessor(Processor[RegExProfileSettings, None]):
@@ -15,7 +17,15 @@ class RegExProcessor(Processor[RegExProfileSettings, None]):
     The processor to transform document fragments using configured regular expressions.
     """
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.plan: Optional[ReplacementPlan] = None  # The plan to apply all definitions.
+
+    def initialize(self):
+        definitions = self.profile_settings.definitions
+        self.plan = ReplacementPlan(definitions)
+        self.log_info(f"Applying {len(definitions)} replacements in up to {self.plan.pass_count} passes.")
+
     def transform(self, content: str, context: TransformerFragmentContext) -> ProcessorResult:
-        for definition in self.profile_settings.definitions:
-            content = definition.transform(content)
+        content = self.plan.transform(content)
         return ProcessorResult(content=content, status=TransformerStatus.SUCCESS)
@@ -0,0 +1,224 @@
+#  Copyright © 2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
+#  According to the copyright terms specified in the file "COPYRIGHT.md".
+#  SPDX-License-Identifier: GPL-3.0-or-later
+import re
+from re import _parser as sre_parse  # The parser of the standard library is used to analyze the patterns.
+from typing import Optional
+
+from backend.tools.fragment_search import required_literals
+from backend.transformer.data.regex_definition import RegExReplacement
+
+LITERAL_ALTERNATION_MIN_COUNT = 150
+"""The minimum number of literal patterns in a step, to replace them using one combined expression.
+
+For fewer patterns, searching and replacing each literal text on its own is faster in CPython.
+"""
+
+LITERAL_ALTERNATION_MIN_COUNT_RARE_START = 10
+"""The minimum number of literal patterns, if no pattern starts with a lower-case letter or white space.
+
+The combined expression is only tried at positions with a possible first character. As lower-case letters and
+white space are the most frequent characters in texts, it is a lot faster for patterns starting with other
+characters, like capitalized words.
+"""
+
+
+def _literal_text(definition: RegExReplacement) -> Optional[str]:
+    """
+    Get the text that is matched by a definition, if its pattern only consists of case-sensitive literal characters.
+    """
+    pattern = definition.regexp
+    parsed = sre_parse.parse(pattern.pattern, pattern.flags)
+    if parsed.state.flags & re.IGNORECASE or len(parsed) == 0:
+        return None
+    if any(opcode is not sre_parse.LITERAL for opcode, _ in parsed):
+        return None
+    return "".join(chr(argument) for _, argument in parsed)
+
+
+def _trie_expression(node: dict) -> str:
+    """
+    Create a regular expression for the literal texts in a trie, with a branch for each common prefix.
+    """
+    parts = []
+    while len(node) == 1:
+        ((character, node),) = node.items()
+        parts.append(re.escape(character))
+    if node:
+        branches = [re.escape(character) + _trie_expression(child) for character, child in node.items()]
+        parts.append("(?:" + "|".join(branches) + ")")
+    return "".join(parts)
+
+
+class _LiteralStep:
+    """
+    Replace the matches of several definitions with literal patterns.
+
+    If the step contains many definitions, their patterns are combined into one expression, structured as a trie,
+    and the replacement for each match is looked up in a table. Otherwise, the literal texts are replaced one after
+    the other.
+
+    A definition is only added, if the combined pass has the same result as applying the definitions in sequence.
+    The combined pass replaces the leftmost match of any pattern, so a match of a new pattern must never start
+    before, or at the same position as, a match of a previous pattern that overlaps it. Also, a new pattern must
+    not overlap the replacement of any previous definition, as the replacements are not scanned again. As a
+    consequence, no pattern of the step is a prefix of another one, so a match at a position is unambiguous.
+    """
+
+    def __init__(self):
+        self.replacements: dict[str, str] = {}
+        self.definitions: list[RegExReplacement] = []
+        self._pattern_prefixes: set[str] = set()
+        self._replacement_prefixes: set[str] = set()
+        self._replacement_suffixes: set[str] = set()
+        self._regexp: Optional[re.Pattern] = None
+
+    def accepts(self, pattern_text: str) -> bool:
+        """
+        Test if a literal pattern can be applied in the same pass as the previous definitions of this step.
+        """
+        for text in self.replacements:
+            if text in pattern_text or text.startswith(pattern_text):
+                return False
+        for text in self.replacements.values():
+            if text in pattern_text or pattern_text in text:
+                return False
+        for length in range(1, len(pattern_text)):
+            prefix = pattern_text[:length]
+            suffix = pattern_text[-length:]
+            if suffix in self._pattern_prefixes or suffix in self._replacement_prefixes:
+                return False
+            if prefix in self._replacement_suffixes:
+                return False
+        return True
+
+    def add(self, definition: RegExReplacement, pattern_text: str, replacement_text: str) -> None:
+        """
+        Add a definition to this step.
+        """
+        self.definitions.append(definition)
+        self.replacements[pattern_text] = replacement_text
+        self._pattern_prefixes.update(pattern_text[:length] for length in range(1, len(pattern_text)))
+        self._replacement_prefixes.update(replacement_text[:length] for length in range(1, len(replacement_text)))
+        self._replacement_suffixes.update(replacement_text[-length:] for length in range(1, len(replacement_text)))
+
+    def compile(self) -> None:
+        """
+        Compile the patterns of all definitions into one regular expression, if there are enough of them.
+        """
+        if any(text[0].islower() or text[0].isspace() for text in self.replacements):
+            minimum_count = LITERAL_ALTERNATION_MIN_COUNT
+        else:
+            minimum_count = LITERAL_ALTERNATION_MIN_COUNT_RARE_START
+        if len(self.replacements) < minimum_count:
+            return
+        trie: dict = {}
+        for pattern_text in self.replacements:
+            node = trie
+            for character in pattern_text:
+                node = node.setdefault(character, {})
+        self._regexp = re.compile(_trie_expression(trie))
+
+    @property
+    def is_sequential(self) -> bool:
+        """
+        If the definitions of this step are applied one after the other.
+        """
+        return self._regexp is None
+
+    def _replace(self, match: re.Match) -> str:
+        return self.replacements[match.group()]
+
+    def transform(self, text: str) -> tuple[str, bool]:
+        if not self.is_sequential:
+            text, replacement_count = self._regexp.subn(self._replace, text)
+            return text, replacement_count > 0
+        is_changed = False
+        for pattern_text, replacement_text in self.replacements.items():
+            if pattern_text in text:
+                text = text.replace(pattern_text, replacement_text)
+                is_changed = True
+        return text, is_changed
+
+
+class _PatternStep:
+    """
+    Apply a single definition.
+
+    The definition is skipped for texts that do not contain the longest literal text of its pattern.
+    """
+
+    def __init__(self, definition: RegExReplacement):
+        self.definitions = [definition]
+        literals = required_literals(definition.regexp)
+        self.required_literal = max(literals, key=len).lower() if literals else None
+
+    def transform(self, text: str) -> tuple[str, bool]:
+        text, replacement_count = self.definitions[0].transform_and_count(text)
+        return text, replacement_count > 0
+
+
+class ReplacementPlan:
+    """
+    An optimized execution plan for a sequence of regular expression replacements.
+
+    Consecutive definitions with literal, case-sensitive patterns are grouped into steps, as long as their matches
+    can not interact. Large groups are applied in a single pass, with the patterns compiled as a trie, so the
+    regular expression engine checks common prefixes only once. The literal texts of smaller groups are replaced
+    using fast string operations. All other definitions are applied one after the other, but are skipped for
+    texts that do not contain the literal text their pattern requires.
+
+    The result is always the same as applying all definitions in sequence.
+    """
+
+    def __init__(self, definitions: list[RegExReplacement]):
+        """
+        Create the plan for the given definitions.
+
+        :param definitions: The definitions, in the order they are applied.
+        :raises re.error: If a pattern or a replacement is not valid.
+        """
+        self.steps: list[_LiteralStep | _PatternStep] = []
+        literal_step: Optional[_LiteralStep] = None
+        for definition in definitions:
+            definition.transform("")  # Fail early for an invalid replacement template.
+            pattern_text = _literal_text(definition)
+            if pattern_text is None:
+                literal_step = None
+                self.steps.append(_PatternStep(definition))
+                continue
+            if literal_step is None or not literal_step.accepts(pattern_text):
+                literal_step = _LiteralStep()
+                self.steps.append(literal_step)
+            literal_step.add(definition, pattern_text, definition.transform(pattern_text))
+        for step in self.steps:
+            if isinstance(step, _LiteralStep):
+                step.compile()
+
+    @property
+    def pass_count(self) -> int:
+        """
+        The maximum number of passes over a text, to apply all definitions.
+        """
+        return sum(
+            len(step.definitions) if isinstance(step, _LiteralStep) and step.is_sequential else 1 for step in self.steps
+        )
+
+    def transform(self, text: str) -> str:
+        """
+        Apply all definitions to a text.
+
+        :param text: The text to transform.
+        :return: The transformed text.
+        """
+        lower_text: Optional[str] = None
+        for step in self.steps:
+            if isinstance(step, _PatternStep) and step.required_literal is not None:
+                if lower_text is None:
+                    lower_text = text.lower()
+                if step.required_literal not in lower_text:
+                    continue
+            text, is_changed = step.transform(text)
+            if is_changed:
+                lower_text = None
+        return text
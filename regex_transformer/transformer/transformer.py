@@ -1,10 +1,14 @@
 #  Copyright © 2023-2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
 #  According to the copyright terms specified in the file "COPYRIGHT.md".
 #  SPDX-License-Identifier: GPL-3.0-or-later
+from typing import Optional
+
 from backend.transformer import TransformerBase
+from backend.transformer.data.regex_definition import RegExReplacement
 from django.utils.translation import gettext_lazy as _
 
 from regex_transformer.transformer.processor import RegExProcessor
+from regex_transformer.transformer.profile_settings import RegExProfileSettings
 from regex_transformer.transformer.profile_settings_handler import RegExProfileSettingsHandler
 
 
@@ -22,3 +26,6 @@ class RegExTransformer(TransformerBase):
     title_background_color_class = "has-background-re-transformer-dark"
     short_name = "RE"
     icon_name = "code"
+
+    def get_replacements(self, profile_settings: RegExProfileSettings) -> Optional[list[RegExReplacement]]:
+        return profile_settings.definitions
@@ -5,3 +5,4 @@
 from .base import ActionBase
 from .exception import ActionError
 from .manager import ActionManager, action_manager
+from .task_queue import TaskQueue
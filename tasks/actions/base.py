@@ -4,6 +4,7 @@
 
 import logging
 from abc import ABCMeta, abstractmethod
+from contextlib import AbstractContextManager
 from datetime import datetime, UTC, timedelta
 from typing import Optional
 
@@ -12,8 +13,11 @@ from math import isclose
 from django.utils.translation import gettext_lazy as _
 
 from tasks.actions.exception import ActionStoppedByUser
+from tasks.actions.metrics import ActionMetrics
 from tasks.tools.log_receiver import LogReceiver
+from tasks.tools.stop_token import StopToken
 from tasks.actions.status import TaskStatusField
+from tasks.actions.task_queue import TaskQueue
 from tasks.actions.status_keys import (
     STATUS_NAME_COMPLETED,
     STATUS_NAME_STARTED,
@@ -61,6 +65,9 @@ class ActionBase(LogReceiver, metaclass=ActionBaseMeta):
     status_fields = []
     """Additional status fields to be displayed for this action."""
 
+    queue: str = TaskQueue.DEFAULT
+    """The Celery queue this action is routed to. Can be overridden using the `TASKS_ACTION_QUEUES` setting."""
+
     def __init__(self, task_id: str, log: logging.Logger):
         self.task_id = task_id
         self._log = log
@@ -69,6 +76,8 @@ class ActionBase(LogReceiver, metaclass=ActionBaseMeta):
         self._started_at: datetime = datetime.now(UTC)
         self._next_estimate: Optional[timedelta] = None
         self._last_estimates: list[timedelta] = []
+        self.metrics: ActionMetrics = ActionMetrics()
+        self.stop_token: StopToken = StopToken()
 
     @classmethod
     def get_progress_title(cls) -> str:
@@ -80,6 +89,13 @@ class ActionBase(LogReceiver, metaclass=ActionBaseMeta):
         """Get the static subject for the progress display."""
         return cls.progress_subject
 
+    @classmethod
+    def get_queue(cls) -> str:
+        """Get the name of the Celery queue for this action."""
+        from django.conf import settings
+
+        return settings.TASKS_ACTION_QUEUES.get(cls.name, str(cls.queue))
+
     @classmethod
     def get_status_fields(cls) -> list[TaskStatusField]:
         """Get the list of status fields to be displayed for this action."""
@@ -93,14 +109,37 @@ class ActionBase(LogReceiver, metaclass=ActionBaseMeta):
         status_fields.extend(cls.status_fields)
         return status_fields
 
+    def span(self, name: str) -> AbstractContextManager[None]:
+        """
+        Measure the time spent in a named phase of this action.
+
+        Use it like `with self.span("split"): ...`. The durations of spans with the same name are summed up
+        and stored with the task output.
+
+        :param name: The name of the phase.
+        """
+        return self.metrics.span(name)
+
+    def add_metric(self, name: str, value: float = 1) -> None:
+        """
+        Add a value to a named counter of this action, e.g. the number of processed tokens.
+
+        :param name: The name of the counter.
+        :param value: The value to add.
+        """
+        self.metrics.add(name, value)
+
     def check_if_stop_requested(self) -> None:
         """
         Check if a stop request has been made for the current task.
 
         :raises: ActionStopped if a stop request has been made
         """
+        if self.stop_token.is_set:
+            raise ActionStoppedByUser()
         should_stop, _ = data_store.get_task_stop_request(self.task_id)
         if should_stop:
+            self.stop_token.set()
             raise ActionStoppedByUser()
 
     def set_progress(self, current_step: float, total_steps: float, text="", status_values: dict[str, str] = None):
@@ -55,6 +55,11 @@ class ActionManager:
         action_type: type[ActionBase] = self._registered_actions[action]
         return action_type.get_progress_subject()
 
+    @cache
+    def get_queue(self, action: str) -> str:
+        action_type: type[ActionBase] = self._registered_actions[action]
+        return action_type.get_queue()
+
     @cache
     def get_status_fields(self, action: str) -> list[TaskStatusField]:
         action_type: type[ActionBase] = self._registered_actions[action]
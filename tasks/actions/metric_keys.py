@@ -0,0 +1,17 @@
+#  Copyright © 2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
+#  According to the copyright terms specified in the file "COPYRIGHT.md".
+#  SPDX-License-Identifier: GPL-3.0-or-later
+
+METRIC_START_LATENCY_SUM = "start_latency_seconds_sum"
+METRIC_START_LATENCY_COUNT = "start_latency_seconds_count"
+METRIC_RUNS = "runs_total"
+METRIC_DURATION_SUM = "duration_seconds_sum"
+METRIC_SPAN_SUM = "span_seconds_sum"
+METRIC_SPAN_COUNT = "span_seconds_count"
+
+# Counters, exported with a "_total" suffix.
+METRIC_DB_QUERIES = "db_queries"
+METRIC_REDIS_COMMANDS = "redis_commands"
+METRIC_LLM_REQUESTS = "llm_requests"
+METRIC_LLM_INPUT_TOKENS = "llm_input_tokens"
+METRIC_LLM_OUTPUT_TOKENS = "llm_output_tokens"
@@ -0,0 +1,107 @@
+#  Copyright © 2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
+#  According to the copyright terms specified in the file "COPYRIGHT.md".
+#  SPDX-License-Identifier: GPL-3.0-or-later
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from django.db import connections
+
+from tasks.actions.metric_keys import (
+    METRIC_DB_QUERIES,
+    METRIC_DURATION_SUM,
+    METRIC_REDIS_COMMANDS,
+    METRIC_RUNS,
+    METRIC_SPAN_COUNT,
+    METRIC_SPAN_SUM,
+)
+
+
+class ActionMetrics:
+    """
+    Collects timing and counter metrics while an action is running.
+
+    Spans measure the time spent in named phases of an action. If a span with the same name is entered
+    multiple times, e.g. for every processed fragment, the durations are summed up. Counters are arbitrary
+    named values, like the number of processed tokens.
+    """
+
+    def __init__(self):
+        self.duration: float = 0.0
+        self.span_durations: dict[str, float] = {}
+        self.span_counts: dict[str, int] = {}
+        self.counters: dict[str, float] = {}
+
+    def add(self, name: str, value: float = 1) -> None:
+        """
+        Add a value to a counter.
+
+        :param name: The name of the counter, e.g. "llm_input_tokens".
+        :param value: The value to add.
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """
+        Measure the time spent in a named phase.
+
+        :param name: The name of the phase, e.g. "split".
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.span_durations[name] = self.span_durations.get(name, 0.0) + time.perf_counter() - start
+            self.span_counts[name] = self.span_counts.get(name, 0) + 1
+
+    @contextmanager
+    def collect(self) -> Iterator[None]:
+        """
+        Measure the total duration and count the database queries and Redis commands of a run.
+        """
+        from tasks.data_store import data_store
+
+        def count_query(execute, sql, params, many, context):
+            self.add(METRIC_DB_QUERIES)
+            return execute(sql, params, many, context)
+
+        redis_command_count = data_store.command_count
+        start = time.perf_counter()
+        try:
+            with connections["default"].execute_wrapper(count_query):
+                yield
+        finally:
+            self.duration += time.perf_counter() - start
+            self.add(METRIC_REDIS_COMMANDS, data_store.command_count - redis_command_count)
+
+    def to_json(self) -> dict:
+        """
+        Get all collected values in a JSON compatible format, to be stored with the task.
+        """
+        return {
+            "duration": round(self.duration, 6),
+            "spans": {
+                name: {"duration": round(duration, 6), "count": self.span_counts[name]}
+                for name, duration in self.span_durations.items()
+            },
+            "counters": dict(self.counters),
+        }
+
+    def to_metric_values(self, result: str) -> dict[str, float]:
+        """
+        Convert the collected values into metric values that are accumulated for each action.
+
+        :param result: The result of the run, e.g. "success".
+        :return: The metric names and values.
+        """
+        values: dict[str, float] = {
+            f"{METRIC_RUNS}:{result}": 1.0,
+            METRIC_DURATION_SUM: self.duration,
+        }
+        for name, duration in self.span_durations.items():
+            values[f"{METRIC_SPAN_SUM}:{name}"] = duration
+            values[f"{METRIC_SPAN_COUNT}:{name}"] = float(self.span_counts[name])
+        for name, value in self.counters.items():
+            values[f"{name}_total"] = float(value)
+        return values
@@ -0,0 +1,25 @@
+#  Copyright © 2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
+#  According to the copyright terms specified in the file "COPYRIGHT.md".
+#  SPDX-License-Identifier: GPL-3.0-or-later
+import enum
+
+
+class TaskQueue(enum.StrEnum):
+    """
+    The Celery queues actions are routed to.
+
+    Each queue can be served by a dedicated worker pool, so short interactive actions are not blocked
+    by long-running ones. A worker started without `-Q` consumes from all queues.
+    """
+
+    DEFAULT = "celery"
+    """The default queue for actions that do not specify one."""
+
+    INGEST = "ingest"
+    """CPU-bound and usually short actions, like analyzing uploads and splitting documents."""
+
+    TRANSFORM = "transform"
+    """Long-running, mostly I/O-bound transformations, like requests to a language model."""
+
+    EGRESS = "egress"
+    """Export actions that read whole revisions and write archives."""
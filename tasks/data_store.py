@@ -4,9 +4,10 @@
 
 import json
 import logging
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime, UTC
-from typing import Union, Optional, Tuple
+from typing import Union, Optional, Tuple, Iterator
 
 import redis
 from django.core.signing import Signer, BadSignature
@@ -16,10 +17,27 @@ from django.utils.translation import gettext
 from tasks.models.task_result import TaskResult
 from tasks.models.task_status import TaskStatus
 from tasks.tools.log_level import LogLevel
+from tasks.tools.stop_token import StopToken
 
 logger = logging.getLogger(__name__)
 
 
+class _CountingRedis(redis.Redis):
+    """
+    A Redis client that counts the round trips to the server. A pipeline counts as one round trip.
+    """
+
+    command_count: int = 0
+
+    def execute_command(self, *args, **options):
+        self.command_count += 1
+        return super().execute_command(*args, **options)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        self.command_count += 1
+        return super().pipeline(transaction, shard_hint)
+
+
 @dataclass
 class DataStatus:
     time: datetime
@@ -51,12 +69,17 @@ class DataStore:
     The interface to access the redis service from the backend.
 
     This interface is used by backend tasks and also from the frontend.
+
+    All keys for a task expire after `TASKS_DATA_KEY_TTL` seconds, so no data is left behind in Redis
+    if the task object is removed without cleaning up its data.
     """
 
     KEY_PREFIX = "erbsland_dev.task"
     KEY_STATUS = "status"
     KEY_REQUEST_STOP = "request_stop"
     KEY_LOG = "log"
+    KEY_METRICS = "metrics"
+    STOP_LISTENER_POLL_INTERVAL = 0.2
 
     def __init__(self):
         from django.conf import settings
@@ -65,13 +88,19 @@ class DataStore:
             f"Create connection to redis using host={settings.TASKS_DATA_REDIS_HOST} "
             f"port={settings.TASKS_DATA_REDIS_PORT} db={settings.TASKS_DATA_REDIS_DB_NUM}"
         )
-        self._redis = redis.Redis(
+        self._redis = _CountingRedis(
             host=settings.TASKS_DATA_REDIS_HOST,
             port=settings.TASKS_DATA_REDIS_PORT,
             db=settings.TASKS_DATA_REDIS_DB_NUM,
             decode_responses=True,
         )
         self._signer = Signer()
+        self._key_ttl = int(settings.TASKS_DATA_KEY_TTL)
+
+    @property
+    def command_count(self) -> int:
+        """The number of round trips to the Redis server from this process."""
+        return self._redis.command_count
 
     def _get_task_key(self, task_id: str, name: str):
         return f"{self.KEY_PREFIX}.{task_id}.{name}"
@@ -86,8 +115,10 @@ class DataStore:
         """
         if not isinstance(task_id, str):
             raise TypeError(f"task_id must be str, not {type(task_id)}")
-        self._redis.hset(
-            self._get_task_key(task_id, self.KEY_STATUS),
+        status_key = self._get_task_key(task_id, self.KEY_STATUS)
+        pipeline = self._redis.pipeline(transaction=False)
+        pipeline.hset(
+            status_key,
             mapping={
                 "time": datetime.now(UTC).isoformat(),
                 "status": TaskStatus.CREATED.name,
@@ -98,7 +129,11 @@ class DataStore:
                 "next_url": "",
             },
         )
-        self.set_task_stop_request(task_id, False)
+        pipeline.expire(status_key, self._key_ttl)
+        pipeline.set(
+            self._get_task_key(task_id, self.KEY_REQUEST_STOP), self._get_stop_request_value(False), ex=self._key_ttl
+        )
+        pipeline.execute()
 
     def update_task_progress(self, task_id: str, progress: float, status_values: dict[str, str], text: str) -> None:
         """
@@ -155,8 +190,10 @@ class DataStore:
         signed_url = ""
         if next_url:
             signed_url = self._signer.sign(str(next_url))
-        self._redis.hset(
-            self._get_task_key(task_id, self.KEY_STATUS),
+        status_key = self._get_task_key(task_id, self.KEY_STATUS)
+        pipeline = self._redis.pipeline(transaction=False)
+        pipeline.hset(
+            status_key,
             mapping={
                 "time": datetime.now(UTC).isoformat(),
                 "status": TaskStatus.FINISHED.name,
@@ -167,6 +204,8 @@ class DataStore:
                 "next_url": signed_url,
             },
         )
+        pipeline.expire(status_key, self._key_ttl)
+        pipeline.execute()
 
     def get_task_status(self, task_id: str) -> Optional[DataStatus]:
         """
@@ -231,8 +270,18 @@ class DataStore:
         if not isinstance(should_stop, bool):
             raise TypeError(f"should_stop must be bool, not {type(should_stop)}")
         task_key = self._get_task_key(task_id, self.KEY_REQUEST_STOP)
-        stop_request = f'{"true" if should_stop else "false"};{datetime.now(UTC).isoformat()}'
-        self._redis.set(task_key, stop_request)
+        if not should_stop:
+            self._redis.set(task_key, self._get_stop_request_value(False), ex=self._key_ttl)
+            return
+        # Notify a running task immediately, using the name of the key as channel.
+        pipeline = self._redis.pipeline(transaction=False)
+        pipeline.set(task_key, self._get_stop_request_value(True), ex=self._key_ttl)
+        pipeline.publish(task_key, "true")
+        pipeline.execute()
+
+    @staticmethod
+    def _get_stop_request_value(should_stop: bool) -> str:
+        return f'{"true" if should_stop else "false"};{datetime.now(UTC).isoformat()}'
 
     def get_task_stop_request(self, task_id: str) -> Tuple[bool, datetime]:
         """
@@ -244,8 +293,8 @@ class DataStore:
         if not isinstance(task_id, str):
             raise TypeError(f"task_id must be str, not {type(task_id)}")
         task_key = self._get_task_key(task_id, self.KEY_REQUEST_STOP)
-        should_stop_str, time_str = self._redis.get(task_key).split(";")
         try:
+            should_stop_str, time_str = (self._redis.get(task_key) or "").split(";")
             should_stop = should_stop_str == "true"
             time = datetime.fromisoformat(time_str)
         except ValueError:
@@ -253,6 +302,41 @@ class DataStore:
             time = datetime.now(UTC)
         return should_stop, time
 
+    @contextmanager
+    def listen_for_stop_request(self, task_id: str, stop_token: StopToken) -> Iterator[None]:
+        """
+        Set the stop token as soon as a stop request for the task is published, in the context of this manager.
+
+        The messages are received in a background thread. If the subscription fails, the stop token is
+        not set, and the stop request is only detected by polling `get_task_stop_request()`.
+
+        :param task_id: The ID of the task.
+        :param stop_token: The stop token to set.
+        """
+        if not isinstance(task_id, str):
+            raise TypeError(f"task_id must be str, not {type(task_id)}")
+        task_key = self._get_task_key(task_id, self.KEY_REQUEST_STOP)
+
+        def handle_message(message: dict) -> None:
+            if message.get("data") == "true":
+                stop_token.set()
+
+        listener_thread = None
+        try:
+            pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{task_key: handle_message})
+            listener_thread = pubsub.run_in_thread(sleep_time=self.STOP_LISTENER_POLL_INTERVAL, daemon=True)
+            # Catch stop requests that were made before the subscription.
+            if self.get_task_stop_request(task_id)[0]:
+                stop_token.set()
+        except redis.RedisError as error:
+            logger.warning(f"Could not listen for stop requests of task {task_id}: {error}")
+        try:
+            yield
+        finally:
+            if listener_thread:
+                listener_thread.stop()
+
     def write_log(self, task_id: str, level: LogLevel, message: str, details: str):
         """
         Write a log entry.
@@ -270,7 +354,10 @@ class DataStore:
             message = str(message)
         task_key = self._get_task_key(task_id, self.KEY_LOG)
         fields = {"level": str(level.value), "message": message, "details": details}
-        self._redis.xadd(task_key, fields=fields, maxlen=5000)
+        pipeline = self._redis.pipeline(transaction=False)
+        pipeline.xadd(task_key, fields=fields, maxlen=5000)
+        pipeline.expire(task_key, self._key_ttl)
+        pipeline.execute()
 
     def read_log(self, task_id: str, after_timestamp: Optional[str] = None) -> list[dict[str, str]]:
         """
@@ -304,14 +391,68 @@ class DataStore:
         log_entries.reverse()
         return log_entries
 
+    def _get_metrics_key(self, action: str):
+        return f"{self.KEY_PREFIX}.{self.KEY_METRICS}.{action}"
+
+    def add_action_metrics(self, action: str, values: dict[str, float]) -> None:
+        """
+        Add values to the accumulated metrics of an action.
+
+        The metrics are kept across tasks and are never reset, like counters.
+
+        :param action: The name of the action.
+        :param values: The metric names and the values to add.
+        """
+        if not isinstance(action, str):
+            raise TypeError(f"action must be str, not {type(action)}")
+        if not isinstance(values, dict):
+            raise TypeError(f"values must be dict, not {type(values)}")
+        key = self._get_metrics_key(action)
+        pipeline = self._redis.pipeline(transaction=False)
+        for name, value in values.items():
+            pipeline.hincrbyfloat(key, name, float(value))
+        pipeline.execute()
+
+    def get_action_metrics(self) -> dict[str, dict[str, float]]:
+        """
+        Get the accumulated metrics of all actions.
+
+        :return: A dictionary with the action names as keys and the metric values as dictionary.
+        """
+        prefix = self._get_metrics_key("")
+        result: dict[str, dict[str, float]] = {}
+        for key in self._redis.scan_iter(match=f"{prefix}*"):
+            action = key[len(prefix) :]
+            values = {}
+            for name, value in self._redis.hgetall(key).items():
+                try:
+                    values[name] = float(value)
+                except ValueError:
+                    pass  # We do not trust the data from the Redis store.
+            result[action] = values
+        return result
+
     def del_all_task_data(self, task_id: str) -> None:
         if not isinstance(task_id, str):
             raise TypeError(f"task_id must be str, not {type(task_id)}")
-        self._redis.delete(
-            self._get_task_key(task_id, self.KEY_STATUS),
-            self._get_task_key(task_id, self.KEY_REQUEST_STOP),
-            self._get_task_key(task_id, self.KEY_LOG),
-        )
+        self.del_task_data_for_tasks([task_id])
+
+    def del_task_data_for_tasks(self, task_ids: list[str], batch_size: int = 500) -> None:
+        """
+        Delete all data of the given tasks, using one `DEL` command per batch of tasks.
+
+        :param task_ids: The IDs of the tasks.
+        :param batch_size: The maximum number of tasks to delete with one command.
+        """
+        if not isinstance(task_ids, list):
+            raise TypeError(f"task_ids must be list, not {type(task_ids)}")
+        for start in range(0, len(task_ids), batch_size):
+            keys = []
+            for task_id in task_ids[start : start + batch_size]:
+                keys.extend(
+                    self._get_task_key(task_id, name) for name in (self.KEY_STATUS, self.KEY_REQUEST_STOP, self.KEY_LOG)
+                )
+            self._redis.delete(*keys)
 
 
 class LazyDataStore(LazyObject):
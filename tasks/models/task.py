@@ -5,9 +5,10 @@
 import uuid
 from dataclasses import dataclass, field
 from datetime import timedelta
-from functools import partial, cached_property
+from functools import cached_property
 from typing import Optional
 
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.db import models, transaction
 from django.utils import timezone, translation
@@ -54,14 +55,13 @@ class TaskManager(models.Manager):
 
         **You must call this method inside an atomic operation.**
 
-        The `run_task_action()` is started when the transaction is committed.
-        For extra safety, the task is waiting up to 10 seconds for the task object to appear if it does not
-        exist at the start.
+        The `run_task_action()` is started when the transaction is committed. The task payload carries all
+        data that is required to start the action, so the background process only needs a single fetch of
+        the task object.
 
         :param param: The task parameters.
         :return: The new task object.
         """
-        from tasks.tasks import run_task_action
         from tasks.actions import action_manager
 
         # only create a task if there is not already one running.
@@ -87,21 +87,52 @@ class TaskManager(models.Manager):
         )
         # Initialize the status in the broker to allow a dynamic status, even the background process fails to start.
         data_store.create_task_status(str(task.pk))
-        # At this point, the task object should be accessible by the backend process.
         # Only start the backend task after all database operations were successfully committed.
-        transaction.on_commit(partial(run_task_action.delay, str(task.pk)))
+        transaction.on_commit(task.enqueue)
         return task
 
     def clean_up(self):
         """
-        Clean-up tasks that are finished and are older than 5 minutes.
+        Clean-up tasks that are finished and are older than `TASKS_FINISHED_TASK_RETENTION`.
+
+        The tasks are deleted with a single query and their data in Redis with one command per batch.
         """
+        time_threshold = timezone.now() - timedelta(seconds=settings.TASKS_FINISHED_TASK_RETENTION)
         with transaction.atomic():
-            time_threshold = timezone.now() - timedelta(minutes=5)
             tasks = self.filter(status=TaskStatus.FINISHED, modified__lt=time_threshold)
-            for task in tasks:
-                task.delete()
-                data_store.del_all_task_data(str(task.pk))
+            task_ids = [str(pk) for pk in tasks.values_list("pk", flat=True)]
+            if not task_ids:
+                return
+            self.filter(pk__in=task_ids).delete()
+        data_store.del_task_data_for_tasks(task_ids)
+
+    def fail_lost_tasks(self) -> int:
+        """
+        Finish tasks whose worker died, with a failure.
+
+        A running task is lost if its progress was not updated for `TASKS_STALE_TASK_TIMEOUT` seconds. A task
+        that was never started is lost after `TASKS_QUEUED_TASK_TIMEOUT` seconds. Without this, the task
+        runner of a lost task would be blocked forever.
+
+        :return: The number of tasks that were marked as failed.
+        """
+        now = timezone.now()
+        stale_threshold = now - timedelta(seconds=settings.TASKS_STALE_TASK_TIMEOUT)
+        queued_threshold = now - timedelta(seconds=settings.TASKS_QUEUED_TASK_TIMEOUT)
+        candidates = self.filter(
+            models.Q(status=TaskStatus.RUNNING, modified__lt=stale_threshold)
+            | models.Q(status=TaskStatus.CREATED, modified__lt=queued_threshold)
+        )
+        lost_count = 0
+        for task in candidates:
+            if task.task_status == TaskStatus.RUNNING:
+                # The status in Redis is updated with every progress update and serves as heartbeat.
+                data_status = data_store.get_task_status(str(task.pk))
+                if data_status is not None and data_status.time >= stale_threshold:
+                    continue
+            if task.set_lost():
+                lost_count += 1
+        return lost_count
 
 
 class Task(models.Model):
@@ -188,6 +219,65 @@ class Task(models.Model):
             raise TypeError(f"TaskStatus must be of type TaskStatus, got {type(value)}")
         self.status = value.value
 
+    def get_start_payload(self) -> dict:
+        """
+        Get the payload that is passed to the background process to start this task.
+
+        :return: A JSON compatible dictionary.
+        """
+        return {
+            "action": self.action,
+            "input_data": self.input_data,
+            "language_code": self.language_code,
+            "queued_at": timezone.now().isoformat(),
+        }
+
+    def enqueue(self) -> None:
+        """
+        Send this task to the task queue of its action.
+
+        Only call this method after the task object was committed to the database.
+        """
+        from tasks.tasks import run_task_action
+        from tasks.actions import action_manager
+
+        run_task_action.apply_async(
+            args=[str(self.pk)],
+            kwargs={"payload": self.get_start_payload()},
+            queue=action_manager.get_queue(self.action),
+        )
+
+    def set_lost(self) -> bool:
+        """
+        Finish this task with a failure, because the background process running it was lost.
+
+        The update is conditional, so a task that finished in the meantime is not modified.
+
+        :return: `True` if the task was marked as failed.
+        """
+        output_data = {"status": "failed", "reason": "The background process was lost."}
+        updated_count = Task.objects.filter(pk=self.pk, status=self.status).update(
+            status=TaskStatus.FINISHED.value,
+            result=TaskResult.FAILURE.value,
+            output_data=output_data,
+            modified=timezone.now(),
+        )
+        if not updated_count:
+            return False
+        self.task_status = TaskStatus.FINISHED
+        self.task_result = TaskResult.FAILURE
+        self.output_data = output_data
+        with translation.override(self.language_code or None):
+            text = str(
+                _("%(subject)s failed: %(message)s")
+                % {
+                    "subject": str(self.get_progress_subject()),
+                    "message": str(_("The background process was lost.")),
+                }
+            )
+        data_store.set_task_finished(str(self.pk), TaskResult.FAILURE, {}, text, self.failure_url)
+        return True
+
     def get_next_url(self) -> str:
         """
         Get the next url if the task has finished.
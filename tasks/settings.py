@@ -22,6 +22,31 @@ TASKS_CELERY_TASK_SOFT_TIME_LIMIT: int = 24 * 60 * 60
 TASKS_CELERY_TASK_TIME_LIMIT: int = 24 * 60 * 60 + 60
 """Allow a task to run for 24 hours. Hard timeout +60 seconds after soft timeout."""
 
+TASKS_CELERY_TASK_DEFAULT_QUEUE: str = "celery"
+"""The queue for actions that do not specify their own queue."""
+
+TASKS_CELERY_TASK_QUEUES: dict[str, dict] = {
+    "celery": {"exchange": "celery", "routing_key": "celery"},
+    "ingest": {"exchange": "ingest", "routing_key": "ingest"},
+    "transform": {"exchange": "transform", "routing_key": "transform"},
+    "egress": {"exchange": "egress", "routing_key": "egress"},
+}
+"""All queues actions are routed to. A worker started without `-Q` consumes from all of them."""
+
+TASKS_CELERY_WORKER_PREFETCH_MULTIPLIER: int = 1
+"""Only reserve one task per worker process, so long-running tasks do not hold back queued short ones."""
+
+TASKS_CELERY_BEAT_SCHEDULE: dict[str, dict] = {
+    "clean_up_tasks": {"task": "tasks.tasks.clean_up_tasks", "schedule": 5 * 60},
+    "delete_unused_content": {"task": "backend.tasks.delete_unused_content", "schedule": 60 * 60},
+    "build_search_indexes": {"task": "backend.tasks.build_search_indexes", "schedule": 5 * 60},
+}
+"""The periodic jobs that are started by `celery beat`. By default, abandoned tasks are cleaned up every 5 minutes,
+unused content blocks are deleted every hour, and requested search indexes are built every 5 minutes."""
+
+TASKS_ACTION_QUEUES: dict[str, str] = {}
+"""Override the queue for individual actions. Maps the action name to the queue name."""
+
 TASKS_DATA_REDIS_HOST: str = "127.0.0.1"
 """The redis configuration for the tasks system. The hostname or IP address."""
 
@@ -30,3 +55,18 @@ TASKS_DATA_REDIS_PORT: int = 6379
 
 TASKS_DATA_REDIS_DB_NUM: int = 1
 """The redis configuration for the tasks system. The DB number. """
+
+TASKS_DATA_KEY_TTL: int = 7 * 24 * 60 * 60
+"""The time in seconds after which the status, stop request and log of a task expire in Redis."""
+
+TASKS_FINISHED_TASK_RETENTION: int = 5 * 60
+"""The time in seconds finished tasks are kept, so the user can review the result."""
+
+TASKS_STALE_TASK_TIMEOUT: int = 2 * 60 * 60
+"""The time in seconds without progress update after which a running task is considered lost."""
+
+TASKS_QUEUED_TASK_TIMEOUT: int = 24 * 60 * 60
+"""The time in seconds after which a task that never started is considered lost."""
+
+TASKS_METRICS_TOKEN: str = ""
+"""A secret token that grants access to the metrics view for monitoring systems. Empty: Only staff users."""
@@ -3,6 +3,7 @@
 #  SPDX-License-Identifier: GPL-3.0-or-later
 
 import time
+from datetime import datetime, UTC
 from typing import Optional
 
 from celery.exceptions import TaskError
@@ -12,14 +13,21 @@ from django.utils.translation import gettext_lazy as _
 
 from tasks.actions import ActionBase
 from tasks.actions.exception import ActionError, ActionStoppedByUser
+from tasks.actions.metric_keys import METRIC_START_LATENCY_SUM, METRIC_START_LATENCY_COUNT
 from tasks.celery_app import app
 
 logger = get_task_logger(__name__)
 
+TASK_OBJECT_RETRY_DELAYS = [0.05, 0.1, 0.2, 0.4, 0.8, 1.6]
+"""The delays in seconds between the attempts to fetch the task object."""
+
 
 def get_task_object(task_id: str):
     """
-    Get the task object. Wait up to 10 seconds until the object is available.
+    Get the task object.
+
+    The task is only queued after the task object was committed, so the first fetch usually succeeds.
+    If the object is not visible yet (e.g. because of a replication lag), retry with a short exponential backoff.
 
     :param task_id: The task ID
     :return: The task object.
@@ -27,24 +35,62 @@ def get_task_object(task_id: str):
     """
     from tasks.models import Task
 
-    for _ in range(20):
+    for delay in [*TASK_OBJECT_RETRY_DELAYS, None]:
         try:
             return Task.objects.get(pk=task_id)
         except Task.DoesNotExist:
-            pass
-        time.sleep(0.5)
-    raise ActionError("Task object was not ready in 10 seconds after the task started.")
+            if delay is None:
+                break
+        time.sleep(delay)
+    raise ActionError(
+        f"Task object was not ready in {sum(TASK_OBJECT_RETRY_DELAYS):0.2f} seconds after the task started."
+    )
+
+
+def record_start_latency(action: str, queued_at: Optional[str]) -> None:
+    """
+    Record the time between queuing a task and the start of its action.
+
+    :param action: The name of the action.
+    :param queued_at: The time in ISO format when the task was queued.
+    """
+    from tasks.data_store import data_store
+
+    try:
+        latency = (datetime.now(UTC) - datetime.fromisoformat(queued_at)).total_seconds()
+    except (TypeError, ValueError):
+        return  # Ignore tasks without or with an invalid queue time.
+    logger.debug(f"Start latency for action '{action}': {latency:0.3f} seconds")
+    data_store.add_action_metrics(
+        action, {METRIC_START_LATENCY_SUM: max(latency, 0.0), METRIC_START_LATENCY_COUNT: 1.0}
+    )
+
+
+def record_action_metrics(action: ActionBase, task_result: "TaskResult") -> None:
+    """
+    Add the metrics collected while running an action to the accumulated metrics of the action type.
+
+    :param action: The action that finished.
+    :param task_result: The result of the task.
+    """
+    from tasks.data_store import data_store
+
+    data_store.add_action_metrics(action.name, action.metrics.to_metric_values(task_result.name.lower()))
 
 
 @app.task(ignore_result=True, soft_time_limit=24 * 60 * 60, time_limit=24 * 60 * 60 + 60)
-def run_task_action(task_id: str):
+def run_task_action(task_id: str, payload: Optional[dict] = None):
     """
     Run task that will perform the configured action.
 
     :param task_id: The task ID from the database
+    :param payload: The start payload from `Task.get_start_payload()`. Tasks that were queued
+        without payload read all values from the task object.
     """
     if not isinstance(task_id, str):
         raise TaskError("task_id must be a string.")
+    if payload is not None and not isinstance(payload, dict):
+        raise TaskError("payload must be a dictionary.")
 
     from django.db import transaction
     from tasks.data_store import data_store
@@ -57,8 +103,10 @@ def run_task_action(task_id: str):
         logger.debug("Get the task object.")
         task = get_task_object(task_id)
     except ActionError as ex:
-        logger.excepion(ex)
+        logger.exception(ex)
         return
+    if not payload:
+        payload = {"action": task.action, "input_data": task.input_data, "language_code": task.language_code}
     try:
         from tasks.actions.manager import action_manager
 
@@ -66,14 +114,16 @@ def run_task_action(task_id: str):
         with transaction.atomic():
             task.task_status = TaskStatus.RUNNING
             task.save()
-        translation.activate(task.language_code)  # Activate the frontend language for the task.
+        record_start_latency(payload["action"], payload.get("queued_at"))
+        translation.activate(payload["language_code"])  # Activate the frontend language for the task.
         text = _("Starting %(subject)s") % {"subject": task.get_progress_subject()}
         data_store.update_task_progress(task_id, 0.0, {}, text)
-        logger.debug(f"Create action instance for: {task.action}")
-        action = action_manager.create_action(task.action, task_id, logger)
+        logger.debug(f"Create action instance for: {payload['action']}")
+        action = action_manager.create_action(payload["action"], task_id, logger)
         logger.debug(f"Starting action")
         try:
-            action.run(task.input_data)
+            with action.metrics.collect(), data_store.listen_for_stop_request(task_id, action.stop_token):
+                action.run(payload["input_data"])
             logger.debug(f"Successfully finished the action.")
             task_result = TaskResult.SUCCESS
             output_data = action.get_output_data()
@@ -100,6 +150,8 @@ def run_task_action(task_id: str):
                 "message": str(action_error.message),
             }
 
+        output_data = {**output_data, "metrics": action.metrics.to_json()}
+        record_action_metrics(action, task_result)
         logger.debug(f"Writing task result: {task_result} - {text}")
         with transaction.atomic():
             task.task_status = TaskStatus.FINISHED
@@ -117,14 +169,20 @@ def run_task_action(task_id: str):
                 action.on_failed(ex)
             except Exception as error:
                 logger.error(f"There was an exception raised in the `on_failed()` call: {error}")
-                logger.excepion(error, stack_info=True)
+                logger.exception(error, stack_info=True)
         text = _("The task failed with an unexpected problem: %(message)s") % {"message": str(ex)}
         try:
             data_store.set_task_finished(task_id, TaskResult.FAILURE, {}, text, task.failure_url)
         except Exception as error:
             # If the problem was the connection to the data store, ignore it, but log it.
-            logger.excepion(error, stack_info=True)
+            logger.exception(error, stack_info=True)
         output_data = {"status": "failed", "reason": str(ex)}
+        if action:
+            output_data["metrics"] = action.metrics.to_json()
+            try:
+                record_action_metrics(action, TaskResult.FAILURE)
+            except Exception as error:
+                logger.exception(error, stack_info=True)
         with transaction.atomic():
             task.task_status = TaskStatus.FINISHED
             task.task_result = TaskResult.FAILURE
@@ -136,3 +194,16 @@ def run_task_action(task_id: str):
         )
         logger.debug(f"Passing exception to system.")
         raise ex
+
+
+@app.task(ignore_result=True)
+def clean_up_tasks():
+    """
+    Periodic task, started by `celery beat`, that fails lost tasks and removes finished ones.
+    """
+    from tasks.models import Task
+
+    lost_count = Task.objects.fail_lost_tasks()
+    if lost_count:
+        logger.warning(f"Marked {lost_count} lost task(s) as failed.")
+    Task.objects.clean_up()
@@ -0,0 +1,72 @@
+#  Copyright © 2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
+#  According to the copyright terms specified in the file "COPYRIGHT.md".
+#  SPDX-License-Identifier: GPL-3.0-or-later
+import re
+
+from tasks.actions.metric_keys import (
+    METRIC_DB_QUERIES,
+    METRIC_DURATION_SUM,
+    METRIC_LLM_INPUT_TOKENS,
+    METRIC_LLM_OUTPUT_TOKENS,
+    METRIC_LLM_REQUESTS,
+    METRIC_REDIS_COMMANDS,
+    METRIC_RUNS,
+    METRIC_SPAN_COUNT,
+    METRIC_SPAN_SUM,
+    METRIC_START_LATENCY_COUNT,
+    METRIC_START_LATENCY_SUM,
+)
+
+METRIC_PREFIX = "erbsland_former_action_"
+
+RE_INVALID_NAME_CHARACTERS = re.compile(r"[^a-zA-Z0-9_]")
+
+LABEL_NAMES = {
+    METRIC_RUNS: "result",
+    METRIC_SPAN_SUM: "span",
+    METRIC_SPAN_COUNT: "span",
+}
+"""The name of the additional label for metrics that store a label value after a colon."""
+
+HELP_TEXTS = {
+    METRIC_RUNS: "The number of finished runs of the action.",
+    METRIC_DURATION_SUM: "The total time spent running the action.",
+    METRIC_SPAN_SUM: "The total time spent in a phase of the action.",
+    METRIC_SPAN_COUNT: "The number of times a phase of the action was entered.",
+    METRIC_START_LATENCY_SUM: "The total time between queuing and starting the action.",
+    METRIC_START_LATENCY_COUNT: "The number of measured action starts.",
+    f"{METRIC_DB_QUERIES}_total": "The number of database queries.",
+    f"{METRIC_REDIS_COMMANDS}_total": "The number of round trips to Redis.",
+    f"{METRIC_LLM_REQUESTS}_total": "The number of requests to a language model.",
+    f"{METRIC_LLM_INPUT_TOKENS}_total": "The number of input tokens sent to a language model.",
+    f"{METRIC_LLM_OUTPUT_TOKENS}_total": "The number of output tokens received from a language model.",
+}
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_action_metrics(action_metrics: dict[str, dict[str, float]]) -> str:
+    """
+    Render the accumulated action metrics in the Prometheus text exposition format.
+
+    :param action_metrics: The metrics, as returned by `DataStore.get_action_metrics()`.
+    :return: The metrics as text.
+    """
+    samples: dict[str, list[str]] = {}
+    for action, values in sorted(action_metrics.items()):
+        for field, value in sorted(values.items()):
+            base_name, _, label_value = field.partition(":")
+            labels = f'action="{_escape_label_value(action)}"'
+            if label_value:
+                label_name = LABEL_NAMES.get(base_name, "name")
+                labels += f',{label_name}="{_escape_label_value(label_value)}"'
+            samples.setdefault(base_name, []).append(f"{labels}}} {float(value)!r}")
+    lines = []
+    for base_name, entries in samples.items():
+        name = METRIC_PREFIX + RE_INVALID_NAME_CHARACTERS.sub("_", base_name)
+        lines.append(f"# HELP {name} {HELP_TEXTS.get(base_name, 'A counter of the action.')}")
+        lines.append(f"# TYPE {name} counter")
+        lines.extend(f"{name}{{{entry}" for entry in entries)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,78 @@
+#  Copyright © 2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
+#  According to the copyright terms specified in the file "COPYRIGHT.md".
+#  SPDX-License-Identifier: GPL-3.0-or-later
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+logger = logging.getLogger(__name__)
+
+
+class StopToken:
+    """
+    A cancellation token that is set when the user requests to stop a task.
+
+    While an action runs, the token is set from a background thread as soon as a stop request is published
+    in Redis. Long-running operations, like requests to a language model, can observe the token to abort
+    immediately instead of waiting for the next progress update.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: list[Callable[[], None]] = []
+
+    @property
+    def is_set(self) -> bool:
+        """If a stop was requested."""
+        return self._event.is_set()
+
+    def set(self) -> None:
+        """
+        Set this token and call all registered callbacks.
+
+        This method is thread-safe and can be called multiple times.
+        """
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as error:
+                logger.warning(f"A stop callback raised an exception: {error}")
+
+    def wait(self, timeout: float) -> bool:
+        """
+        Wait until this token is set, or the timeout expired.
+
+        :param timeout: The timeout in seconds.
+        :return: `True` if the token is set.
+        """
+        return self._event.wait(timeout)
+
+    @contextmanager
+    def on_stop(self, callback: Callable[[], None]) -> Iterator[None]:
+        """
+        Register a callback that is called from the listener thread when the token is set.
+
+        The callback is only registered in the context of this manager. If the token is already set,
+        the callback is called immediately.
+
+        :param callback: The callback, e.g. to close a connection.
+        """
+        with self._lock:
+            is_set = self._event.is_set()
+            if not is_set:
+                self._callbacks.append(callback)
+        if is_set:
+            callback()
+        try:
+            yield
+        finally:
+            with self._lock:
+                if callback in self._callbacks:
+                    self._callbacks.remove(callback)
@@ -5,7 +5,9 @@
 from django.urls import path
 
 from tasks.views.api import ApiView
+from tasks.views.metrics import MetricsView
 
 urlpatterns = [
     path("api/", ApiView.as_view(), name="task_api"),
+    path("metrics/", MetricsView.as_view(), name="task_metrics"),
 ]
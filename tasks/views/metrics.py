@@ -0,0 +1,35 @@
+#  Copyright © 2024 Tobias Erbsland https://erbsland.dev/ and EducateIT GmbH https://educateit.ch/
+#  According to the copyright terms specified in the file "COPYRIGHT.md".
+#  SPDX-License-Identifier: GPL-3.0-or-later
+import hmac
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse, HttpResponseForbidden
+from django.views import View
+
+from tasks.data_store import data_store
+from tasks.tools.prometheus import render_action_metrics
+
+
+class MetricsView(View):
+    """
+    Expose the accumulated action metrics in the Prometheus text format.
+
+    Access is granted to staff users, or to clients that send the token from `TASKS_METRICS_TOKEN`
+    as bearer token in the `Authorization` header.
+    """
+
+    def _has_access(self, request: HttpRequest) -> bool:
+        if request.user.is_authenticated and request.user.is_staff:
+            return True
+        token = settings.TASKS_METRICS_TOKEN
+        if not token:
+            return False
+        authorization = request.headers.get("Authorization", "")
+        return hmac.compare_digest(authorization.encode(), f"Bearer {token}".encode())
+
+    def get(self, request: HttpRequest, *args, **kwargs):
+        if not self._has_access(request):
+            return HttpResponseForbidden()
+        text = render_action_metrics(data_store.get_action_metrics())
+        return HttpResponse(text, content_type="text/plain; version=0.0.4; charset=utf-8")